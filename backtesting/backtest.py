@@ -1,7 +1,15 @@
+import bisect
+import itertools
+import os
+import pickle
 import backtrader as bt
 import pandas as pd
 from datetime import datetime, timedelta
+from config.settings import BACKTEST_STATE_DIR
 from data.market_data import get_historical_data
+from strategies.indicators import SeededEMA
+from strategies.live_signals import DayTradeSignal, SwingTradeSignal
+from utils import clock
 
 class DayTradeStrategy(bt.Strategy):
     params = (("sma_period", 10),)
@@ -49,34 +57,54 @@ class BacktestStrategy(bt.Strategy):
 
 def get_dynamic_dates():
     """Returns the start and end dates for backtesting (last 1 year, ending yesterday)."""
-    end_date = datetime.today() - timedelta(days=1)
+    end_date = datetime.fromtimestamp(clock.time()) - timedelta(days=1)
     start_date = end_date - timedelta(days=365)
     return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
 
-def run_swing_trade_backtest(symbol, timeframe="day"):
-    """Runs a swing trade backtest and returns performance metrics."""
-    
-    start_date, end_date = get_dynamic_dates()
-    df = get_historical_data(symbol, start_date, end_date, timeframe)
-    
-    if df.empty:
-        print(f"⚠️ No historical data available for {symbol}. Skipping swing trade backtest.")
-        return None
-    
-    data = bt.feeds.PandasData(dataname=df)
+# ✅ Backtest configurations used to approve symbols for each trading style
+# (`grid` holds the parameter values walk-forward mode may choose from on each training window)
+BACKTEST_JOBS = {
+    "swing": {
+        "label": "Swing Trade", "strategy": BacktestStrategy, "timeframe": "day", "cash": 10000, "commission": 0.001,
+        "grid": {"short_window": [5, 10, 20], "long_window": [50, 100]},
+    },
+    "day_trade": {
+        "label": "Day Trade", "strategy": DayTradeStrategy, "timeframe": "5Min", "cash": 5000, "commission": 0.002,
+        "grid": {"sma_period": [5, 10, 20]},
+    },
+}
+
+# ✅ Bar-by-bar signal rules equivalent to each backtrader strategy (used by the incremental and walk-forward modes)
+SIGNAL_RULES = {
+    BacktestStrategy: SwingTradeSignal,
+    DayTradeStrategy: DayTradeSignal,
+}
+
+WALK_FORWARD_TRAIN_DAYS = 90
+WALK_FORWARD_TEST_DAYS = 30
+
+def to_feed_frame(df):
+    """Drops the symbol level Alpaca adds to the index so backtrader can read the timestamps."""
+    if isinstance(df.index, pd.MultiIndex):
+        return df.droplevel("symbol")
+    return df
+
+def run_backtest(symbol, df, job):
+    """Runs one backtest job on already-fetched bars and returns performance metrics."""
+    data = bt.feeds.PandasData(dataname=to_feed_frame(df))
 
     cerebro = bt.Cerebro()
-    cerebro.addstrategy(BacktestStrategy)
+    cerebro.addstrategy(job["strategy"])
     cerebro.adddata(data)
-    cerebro.broker.set_cash(10000)
-    cerebro.broker.setcommission(commission=0.001)
+    cerebro.broker.set_cash(job["cash"])
+    cerebro.broker.setcommission(commission=job["commission"])
 
     starting_value = cerebro.broker.getvalue()
-    
+
     try:
         results = cerebro.run()
     except Exception as e:
-        print(f"❌ Swing trade backtest failed for {symbol}: {e}")
+        print(f"❌ {job['label']} backtest failed for {symbol}: {e}")
         return None
 
     final_value = cerebro.broker.getvalue()
@@ -86,7 +114,7 @@ def run_swing_trade_backtest(symbol, timeframe="day"):
     win_rate = (strategy.wins / total_trades) * 100 if total_trades > 0 else 0
     profit_loss_pct = ((final_value - starting_value) / starting_value) * 100
 
-    print(f"Swing Trade Backtest for {symbol}:")
+    print(f"{job['label']} Backtest for {symbol}:")
     print(f" - Final Portfolio Value: ${final_value:.2f}")
     print(f" - Profit/Loss: {profit_loss_pct:.2f}%")
     print(f" - Win Rate: {win_rate:.2f}%")
@@ -98,6 +126,20 @@ def run_swing_trade_backtest(symbol, timeframe="day"):
         "win_rate": win_rate
     }
 
+def run_swing_trade_backtest(symbol, timeframe="day"):
+    """Runs a swing trade backtest and returns performance metrics."""
+    
+    start_date, end_date = get_dynamic_dates()
+    df = get_historical_data(symbol, start_date, end_date, timeframe)
+    
+    if df.empty:
+        print(f"⚠️ No historical data available for {symbol}. Skipping swing trade backtest.")
+        return None
+
+    from backtesting.result_cache import cached_backtest  # ✅ Imported here: result_cache imports this module
+
+    return cached_backtest(symbol, df, BACKTEST_JOBS["swing"], "backtrader", run_backtest)
+
 def run_day_trade_backtest(symbol):
     """Runs a day trade backtest using 5-minute candles."""
     
@@ -107,30 +149,207 @@ def run_day_trade_backtest(symbol):
     if df.empty:
         print(f"⚠️ No historical data available for {symbol}. Skipping day trade backtest.")
         return None
-    
-    data = bt.feeds.PandasData(dataname=df)
-    cerebro = bt.Cerebro()
-    cerebro.addstrategy(DayTradeStrategy)
-    cerebro.adddata(data)
-    cerebro.broker.set_cash(5000)
-    cerebro.broker.setcommission(commission=0.002)
 
-    starting_value = cerebro.broker.getvalue()
+    from backtesting.result_cache import cached_backtest
 
-    try:
-        results = cerebro.run()
-    except Exception as e:
-        print(f"❌ Day trade backtest failed for {symbol}: {e}")
+    return cached_backtest(symbol, df, BACKTEST_JOBS["day_trade"], "backtrader", run_backtest)
+
+def strategy_params(job):
+    """Default parameters of a job's backtrader strategy."""
+    return dict(job["strategy"].params._getpairs())
+
+class IncrementalBacktest:
+    """
+    Bar-by-bar replica of a BACKTEST_JOBS strategy under backtrader's default broker rules (one share,
+    signals on the close, fills at the next bar's open) whose whole state can be pickled and carried
+    forward, so a refresh only simulates the bars added since the last run.
+
+    The value, trade count and win count are checkpointed after every bar, so metrics for any trailing
+    window are differences between two checkpoints instead of a fresh simulation of the window.
+    """
+
+    def __init__(self, job, params=None):
+        self.params = params or strategy_params(job)
+        self.rule = SIGNAL_RULES[job["strategy"]](ema_class=SeededEMA, **self.params)
+        self.cash = job["cash"]
+        self.commission = job["commission"]
+        self.starting_value = job["cash"]
+        self.position = 0
+        self.entry_price = None
+        self.pending = None  # ✅ "buy"/"sell" order waiting for the next bar's open
+        self.trades = 0
+        self.wins = 0
+        self.last_timestamp = None
+        self.checkpoints = []  # ✅ (epoch ns, value, trades, wins) after every bar; plain numbers keep the pickle small
+
+    def feed(self, timestamp, open_, close, trade=True):
+        """
+        Processes one bar. With `trade=False` only the indicators advance (warm-up before a test window).
+        """
+        if self.pending == "buy":
+            self.cash -= open_ * (1 + self.commission)
+            self.position, self.entry_price = 1, open_
+        elif self.pending == "sell":
+            self.cash += open_ * (1 - self.commission)
+            self.position, self.entry_price = 0, None
+        self.pending = None
+
+        signal = self.rule.update({"close": close})
+        if trade:
+            if not self.position:
+                if signal == 1:
+                    self.pending = "buy"
+                    self.trades += 1
+            elif signal == -1:
+                if close > self.entry_price:
+                    self.wins += 1
+                self.pending = "sell"
+
+        self.last_timestamp = timestamp
+        self.checkpoints.append((timestamp.value, float(self.cash + self.position * close), self.trades, self.wins))
+
+    def feed_frame(self, df, trade=True):
+        """Feeds every bar of a DataFrame newer than the last one seen."""
+        bars = to_feed_frame(df)
+        if self.last_timestamp is not None:
+            bars = bars[bars.index > self.last_timestamp]
+        for timestamp, open_, close in zip(bars.index, bars["open"].to_numpy(), bars["close"].to_numpy()):
+            self.feed(timestamp, open_, close, trade)
+
+    def trim(self, since):
+        """Drops checkpoints no longer needed for windows starting at or after `since`."""
+        i = bisect.bisect_left(self.checkpoints, pd.Timestamp(since).value, key=lambda checkpoint: checkpoint[0])
+        del self.checkpoints[:max(i - 1, 0)]
+
+    def metrics(self, since=None):
+        """
+        Performance since `since` (a timestamp; None = since the first bar), measured from the
+        portfolio value at that point, so it includes any position already open when the window starts.
+        """
+        if not self.checkpoints:
+            return {"final_value": self.starting_value, "profit_loss_pct": 0.0, "win_rate": 0, "trades": 0, "wins": 0}
+
+        base_value, base_trades, base_wins = self.starting_value, 0, 0
+        if since is not None:
+            i = bisect.bisect_left(self.checkpoints, pd.Timestamp(since).value, key=lambda checkpoint: checkpoint[0])
+            if i > 0:
+                _, base_value, base_trades, base_wins = self.checkpoints[i - 1]
+
+        _, value, trades, wins = self.checkpoints[-1]
+        trades, wins = trades - base_trades, wins - base_wins
+        return {
+            "final_value": value,
+            "profit_loss_pct": ((value - base_value) / base_value) * 100,
+            "win_rate": (wins / trades) * 100 if trades > 0 else 0,
+            "trades": trades,
+            "wins": wins,
+        }
+
+def state_path(symbol, job):
+    """Where the carried-forward state of one (symbol, job) pair is kept."""
+    return os.path.join(BACKTEST_STATE_DIR, f"{symbol}_{job['strategy'].__name__}_{job['timeframe']}.pkl")
+
+def load_state(symbol, job):
+    path = state_path(symbol, job)
+    if not os.path.exists(path):
         return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
 
-    final_value = cerebro.broker.getvalue()
+def save_state(symbol, job, state):
+    """Writes the state atomically so a crash never leaves a half-written file."""
+    os.makedirs(BACKTEST_STATE_DIR, exist_ok=True)
+    path = state_path(symbol, job)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(state, f)
+    os.replace(path + ".tmp", path)
 
-    strategy = results[0]
-    total_trades = strategy.trades
-    win_rate = (strategy.wins / total_trades) * 100 if total_trades > 0 else 0
-    profit_loss_pct = ((final_value - starting_value) / starting_value) * 100
+def run_incremental_backtest(symbol, df, job):
+    """
+    Incremental mode: resumes the saved simulation for this symbol and job and feeds it only the bars
+    of `df` it has not seen yet, then reports the trailing window that `df` covers. The first run
+    (or a run after a gap in the data or a parameter change) simulates all of `df`.
+    """
+    bars = to_feed_frame(df)
+    state = load_state(symbol, job)
+    if state is not None and (state.params != strategy_params(job) or state.last_timestamp < bars.index[0]):
+        state = None  # ✅ Stale: parameters changed or bars are missing since the last run
+    if state is None:
+        state = IncrementalBacktest(job)
+
+    new_bars = len(bars) if state.last_timestamp is None else int((bars.index > state.last_timestamp).sum())
+    state.feed_frame(bars)
+    state.trim(bars.index[0])
+    save_state(symbol, job, state)
+
+    result = state.metrics(since=bars.index[0])
+    print(f"{job['label']} Backtest for {symbol} (incremental, {new_bars} new bars):")
+    print(f" - Final Portfolio Value: ${result['final_value']:.2f}")
+    print(f" - Profit/Loss: {result['profit_loss_pct']:.2f}%")
+    print(f" - Win Rate: {result['win_rate']:.2f}%")
+
+    return {
+        "symbol": symbol,
+        "final_value": result["final_value"],
+        "profit_loss_pct": result["profit_loss_pct"],
+        "win_rate": result["win_rate"]
+    }
+
+def walk_forward_windows(index, train_days=WALK_FORWARD_TRAIN_DAYS, test_days=WALK_FORWARD_TEST_DAYS):
+    """Splits a timestamp index into rolling (train_start, test_start, test_end) windows; test windows do not overlap."""
+    windows = []
+    test_start = index[0] + pd.Timedelta(days=train_days)
+    while test_start < index[-1]:
+        test_end = test_start + pd.Timedelta(days=test_days)
+        windows.append((test_start - pd.Timedelta(days=train_days), test_start, test_end))
+        test_start = test_end
+    return windows
+
+def _simulate_window(job, params, train, test):
+    """Warms the indicators on `train` without trading, then trades through `test`."""
+    simulation = IncrementalBacktest(job, params)
+    simulation.feed_frame(train, trade=False)
+    simulation.feed_frame(test)
+    return simulation.metrics(since=test.index[0])
+
+def run_walk_forward(symbol, df, job, train_days=WALK_FORWARD_TRAIN_DAYS, test_days=WALK_FORWARD_TEST_DAYS, optimize=True):
+    """
+    Walk-forward mode: for each rolling window, picks the best parameters from the job's grid on the
+    training bars (or keeps the defaults with `optimize=False`) and scores them only on the following
+    test bars. Returns the same metrics as `run_backtest`, compounded over the out-of-sample windows.
+    """
+    bars = to_feed_frame(df)
+    grid = job.get("grid") if optimize else None
+    combos = [strategy_params(job)]
+    if grid:
+        combos = [dict(strategy_params(job), **dict(zip(grid, values))) for values in itertools.product(*grid.values())]
+
+    growth, trades, wins = 1.0, 0, 0
+    for train_start, test_start, test_end in walk_forward_windows(bars.index, train_days, test_days):
+        train = bars[(bars.index >= train_start) & (bars.index < test_start)]
+        test = bars[(bars.index >= test_start) & (bars.index < test_end)]
+        if train.empty or test.empty:
+            continue
+
+        params = combos[0]
+        if len(combos) > 1:
+            scores = []
+            for combo in combos:
+                simulation = IncrementalBacktest(job, combo)
+                simulation.feed_frame(train)
+                scores.append(simulation.metrics()["profit_loss_pct"])
+            params = combos[scores.index(max(scores))]
+
+        window = _simulate_window(job, params, train, test)
+        growth *= 1 + window["profit_loss_pct"] / 100
+        trades += window["trades"]
+        wins += window["wins"]
+
+    final_value = job["cash"] * growth
+    profit_loss_pct = (growth - 1) * 100
+    win_rate = (wins / trades) * 100 if trades > 0 else 0
 
-    print(f"Day Trade Backtest for {symbol}:")
+    print(f"{job['label']} Backtest for {symbol} (walk-forward, {train_days}d train / {test_days}d test):")
     print(f" - Final Portfolio Value: ${final_value:.2f}")
     print(f" - Profit/Loss: {profit_loss_pct:.2f}%")
     print(f" - Win Rate: {win_rate:.2f}%")
@@ -0,0 +1,117 @@
+import itertools
+import sys
+from concurrent.futures import as_completed
+import numpy as np
+import pandas as pd
+from backtesting import vectorized
+from backtesting.runner import get_shared_frame, make_shared_pool, prefetch_bars
+from config.settings import BACKTEST_WORKERS
+from strategies import registry
+
+LEADERBOARD_COLUMNS = ["rank", "symbol", "strategy", "params", "final_value", "profit_loss_pct", "win_rate", "trades"]
+
+# ✅ Searchable strategies (signals come from strategies.registry under the same name): default grid and a filter for nonsensical combos
+STRATEGIES = {
+    "sma_crossover": {
+        "grid": {"short_period": range(5, 105, 5), "long_period": range(20, 310, 10)},
+        "valid": lambda p: p["short_period"] < p["long_period"],
+    },
+    "ema_crossover": {
+        "grid": {"short_period": range(3, 51), "long_period": range(10, 101, 2)},
+        "valid": lambda p: p["short_period"] < p["long_period"],
+    },
+    "rsi": {
+        "grid": {"rsi_period": range(5, 31), "rsi_oversold": range(15, 45, 5), "rsi_overbought": range(55, 90, 5)},
+        "valid": lambda p: p["rsi_oversold"] < p["rsi_overbought"],
+    },
+    "breakout": {
+        "grid": {"period": range(5, 121)},
+        "valid": lambda p: True,
+    },
+    "vwap": {
+        "grid": {"period": range(3, 121)},
+        "valid": lambda p: True,
+    },
+}
+
+def parameter_combos(strategy_name, grid=None, n_samples=None, seed=None):
+    """
+    Expands a parameter grid into a list of param dicts.
+    With `n_samples`, returns a random subset instead (random search).
+    """
+    spec = STRATEGIES[strategy_name]
+    grid = grid or spec["grid"]
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    combos = [combo for combo in combos if spec["valid"](combo)]
+
+    if n_samples is not None and n_samples < len(combos):
+        rng = np.random.default_rng(seed)
+        combos = [combos[i] for i in sorted(rng.choice(len(combos), size=n_samples, replace=False))]
+
+    return combos
+
+def optimize(symbol, df, strategy_name, combos, cash=10000, commission=0.001):
+    """Evaluates every param combo for one symbol and returns unranked result rows."""
+    panel = registry.BarPanel.from_frames({symbol: df})
+    cache = {}  # ✅ Each distinct indicator window is computed once and shared by every combo that asks for it
+    rows = []
+
+    for params in combos:
+        entries, exits = registry.evaluate(panel, [strategy_name], {strategy_name: params}, cache)[strategy_name]
+        result = vectorized.simulate(panel["open"], panel["close"], entries, exits, cash, commission)
+        rows.append({
+            "symbol": symbol,
+            "strategy": strategy_name,
+            "params": params,
+            "final_value": result["final_value"],
+            "profit_loss_pct": result["profit_loss_pct"],
+            "win_rate": result["win_rate"],
+            "trades": result["trades"],
+        })
+
+    return rows
+
+def _optimize_job(symbol, timeframe, strategy_name, combos, cash, commission):
+    """Runs one (symbol, strategy) sweep inside a worker process."""
+    df = get_shared_frame((symbol, timeframe))
+    if df is None or df.empty:
+        return []
+    return optimize(symbol, df, strategy_name, combos, cash, commission)
+
+def rank(rows, top=None):
+    """Sorts result rows into a leaderboard (best profit first, win rate breaks ties)."""
+    leaderboard = pd.DataFrame(rows, columns=LEADERBOARD_COLUMNS[1:])
+    leaderboard = leaderboard.sort_values(["profit_loss_pct", "win_rate"], ascending=False, ignore_index=True)
+    leaderboard.insert(0, "rank", range(1, len(leaderboard) + 1))
+    return leaderboard.head(top) if top else leaderboard
+
+def optimize_universe(symbols, strategy_names=tuple(STRATEGIES), timeframe="day", n_samples=None, seed=None,
+                      cash=10000, commission=0.001, max_workers=BACKTEST_WORKERS, top=None):
+    """
+    Sweeps parameters for every (symbol, strategy) pair across a process pool and
+    returns a ranked leaderboard. Bars are fetched once and shared with the workers.
+    """
+    frames = prefetch_bars(symbols, [timeframe])
+    combos = {name: parameter_combos(name, n_samples=n_samples, seed=seed) for name in strategy_names}
+    rows = []
+
+    with make_shared_pool(frames, max_workers) as pool:
+        futures = {
+            pool.submit(_optimize_job, symbol, timeframe, name, combos[name], cash, commission): (symbol, name)
+            for symbol in symbols for name in strategy_names
+        }
+        for future in as_completed(futures):
+            symbol, name = futures[future]
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                print(f"❌ Parameter sweep failed for {symbol} ({name}): {e}")
+
+    print(f"🔍 Evaluated {len(rows)} parameter combinations across {len(symbols)} symbols.")
+    return rank(rows, top)
+
+if __name__ == "__main__":
+    # ✅ python -m backtesting.optimizer <strategy> SYMBOL [SYMBOL ...]
+    leaderboard = optimize_universe(sys.argv[2:], strategy_names=[sys.argv[1]], top=20)
+    print(leaderboard.to_string(index=False))
@@ -0,0 +1,152 @@
+import sys
+import numpy as np
+import pandas as pd
+from backtesting import vectorized
+from backtesting.backtest import BACKTEST_JOBS, strategy_params, to_feed_frame
+from backtesting.runner import prefetch_bars
+from config.settings import DAILY_INVESTMENT_LIMIT, MAX_OPEN_POSITIONS
+
+def build_panel(frames):
+    """
+    Aligns per-symbol bars on one timestamp axis. Returns (timestamps, symbols, open, close) where
+    open/close are (bars x symbols) float arrays with NaN wherever a symbol has no bar.
+    """
+    frames = {symbol: to_feed_frame(df) for symbol, df in frames.items() if df is not None and not df.empty}
+    symbols = list(frames)
+    opens = pd.DataFrame({symbol: df["open"] for symbol, df in frames.items()}).sort_index()
+    closes = pd.DataFrame({symbol: df["close"] for symbol, df in frames.items()}).reindex(opens.index)
+    return opens.index, symbols, opens[symbols].to_numpy(dtype=np.float64), closes[symbols].to_numpy(dtype=np.float64)
+
+def panel_signals(frames, timestamps, symbols, job):
+    """Entry/exit masks for every symbol, computed on each symbol's own bars and placed on the panel axis."""
+    signal_function = vectorized.SIGNALS[job["strategy"]]
+    params = strategy_params(job)
+    entries = np.zeros((len(timestamps), len(symbols)), dtype=bool)
+    exits = np.zeros_like(entries)
+
+    for j, symbol in enumerate(symbols):
+        bars = to_feed_frame(frames[symbol])
+        rows = timestamps.get_indexer(bars.index)
+        symbol_entries, symbol_exits = signal_function(bars["close"].to_numpy(dtype=np.float64), **params)
+        entries[rows, j] = symbol_entries
+        exits[rows, j] = symbol_exits
+
+    return entries, exits
+
+def simulate_portfolio(timestamps, open_, close, entries, exits, cash, commission,
+                       daily_limit=DAILY_INVESTMENT_LIMIT, max_positions=MAX_OPEN_POSITIONS, max_trade_fraction=0.5):
+    """
+    Simulates every symbol at once with one shared cash balance, the way the live bot trades:
+    signals are read on the close and fill at the symbol's next open. Each buy is sized to
+    `max_trade_fraction` of the daily limit (like `utils.helpers`); buys stop for the day once
+    `daily_limit` has been committed, and no more than `max_positions` positions are held or pending.
+    Candidates on the same bar are taken in symbol order. Returns metrics and the equity curve.
+    """
+    n_bars, n_symbols = close.shape
+    if n_bars == 0:
+        return {"final_value": cash, "profit_loss_pct": 0.0, "win_rate": 0, "trades": 0, "wins": 0,
+                "max_drawdown_pct": 0.0, "equity": pd.Series(dtype=float, name="equity")}
+
+    starting_value = cash
+    qty = np.zeros(n_symbols)
+    entry_price = np.full(n_symbols, np.nan)
+    pending_buy = np.zeros(n_symbols)  # ✅ shares ordered, waiting for the next open
+    pending_sell = np.zeros(n_symbols, dtype=bool)
+    last_close = np.full(n_symbols, np.nan)
+    equity = np.empty(n_bars)
+    days = timestamps.normalize()
+    trade_size = daily_limit * max_trade_fraction
+    spent_today, current_day = 0.0, None
+    trades = wins = 0
+
+    for t in range(n_bars):
+        opens = open_[t]
+        has_bar = ~np.isnan(opens)
+
+        # ✅ Fill yesterday's orders at this bar's open (symbols without a bar keep waiting)
+        sells = pending_sell & has_bar
+        if sells.any():
+            cash += (qty[sells] * opens[sells] * (1 - commission)).sum()
+            qty[sells] = 0
+            entry_price[sells] = np.nan
+            pending_sell[sells] = False
+
+        buys = np.flatnonzero((pending_buy > 0) & has_bar)
+        if len(buys):
+            cost = pending_buy[buys] * opens[buys] * (1 + commission)
+            affordable = np.cumsum(cost) <= cash  # ✅ A gap up can make later orders unaffordable
+            filled = buys[affordable]
+            cash -= cost[affordable].sum()
+            qty[filled] = pending_buy[filled]
+            entry_price[filled] = opens[filled]
+            pending_buy[buys] = 0
+            trades += len(filled)
+
+        closes = close[t]
+        np.copyto(last_close, closes, where=~np.isnan(closes))
+        equity[t] = cash + np.nansum(qty * last_close)
+
+        if days[t] != current_day:
+            current_day, spent_today = days[t], 0.0
+
+        # ✅ Exits: sell whole positions on an exit signal
+        exiting = exits[t] & (qty > 0) & ~pending_sell
+        wins += int((closes[exiting] > entry_price[exiting]).sum())
+        pending_sell |= exiting
+
+        # ✅ Entries: fill free position slots in symbol order within the day's remaining budget
+        slots = max_positions - int(((qty > 0) | (pending_buy > 0)).sum())
+        if slots <= 0:
+            continue
+        candidates = np.flatnonzero(entries[t] & (qty == 0) & (pending_buy == 0) & ~np.isnan(closes))
+        if not len(candidates):
+            continue
+
+        shares = np.floor(trade_size / closes[candidates])
+        candidates, shares = candidates[shares >= 1], shares[shares >= 1]
+        committed = np.cumsum(shares * closes[candidates])
+        take = (committed <= min(daily_limit - spent_today, cash)) & (np.arange(len(candidates)) < slots)
+        pending_buy[candidates[take]] = shares[take]
+        spent_today += (shares[take] * closes[candidates[take]]).sum()
+
+    final_value = equity[-1]
+    peak = np.maximum.accumulate(equity)
+    return {
+        "final_value": final_value,
+        "profit_loss_pct": ((final_value - starting_value) / starting_value) * 100,
+        "win_rate": (wins / trades) * 100 if trades > 0 else 0,
+        "trades": trades,
+        "wins": wins,
+        "max_drawdown_pct": float(((peak - equity) / peak).max() * 100),
+        "equity": pd.Series(equity, index=timestamps, name="equity"),
+    }
+
+def run_portfolio_backtest(frames, job_name="swing", cash=None, daily_limit=DAILY_INVESTMENT_LIMIT,
+                           max_positions=MAX_OPEN_POSITIONS, verbose=True):
+    """
+    Backtests one BACKTEST_JOBS strategy across all symbols in `frames` ({symbol: bars}) with a shared
+    broker instead of one broker per symbol. `cash` defaults to the job's per-symbol cash.
+    """
+    job = BACKTEST_JOBS[job_name]
+    timestamps, symbols, open_, close = build_panel(frames)
+    entries, exits = panel_signals(frames, timestamps, symbols, job)
+    result = simulate_portfolio(
+        timestamps, open_, close, entries, exits,
+        cash=job["cash"] if cash is None else cash, commission=job["commission"],
+        daily_limit=daily_limit, max_positions=max_positions
+    )
+
+    if verbose:
+        print(f"{job['label']} Portfolio Backtest ({len(symbols)} symbols, {len(timestamps)} bars):")
+        print(f" - Final Portfolio Value: ${result['final_value']:.2f}")
+        print(f" - Profit/Loss: {result['profit_loss_pct']:.2f}%")
+        print(f" - Win Rate: {result['win_rate']:.2f}% over {result['trades']} trades")
+        print(f" - Max Drawdown: {result['max_drawdown_pct']:.2f}%")
+
+    return result
+
+if __name__ == "__main__":
+    # ✅ python -m backtesting.portfolio <job> SYMBOL [SYMBOL ...]
+    job_name = sys.argv[1]
+    frames = prefetch_bars(sys.argv[2:], [BACKTEST_JOBS[job_name]["timeframe"]])
+    run_portfolio_backtest({symbol: df for (symbol, _), df in frames.items()}, job_name)
@@ -0,0 +1,130 @@
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import numpy as np
+from backtesting.backtest import WALK_FORWARD_TEST_DAYS, WALK_FORWARD_TRAIN_DAYS, strategy_params
+from config.settings import BACKTEST_CACHE_FILE, BACKTEST_CACHE_SIZE
+from data import bar_store
+
+CACHE_VERSION = 1  # ✅ Bump when an engine's simulation changes so old results stop matching
+
+class ResultCache:
+    """
+    Backtest results in SQLite, keyed by everything that decides them (see `result_key`). Holds at most
+    `max_entries` results; the least recently used ones are evicted first. Safe to share between the
+    backtest worker processes: each process opens its own connection and SQLite serializes the writes.
+    """
+
+    def __init__(self, path=BACKTEST_CACHE_FILE, max_entries=BACKTEST_CACHE_SIZE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, symbol TEXT, strategy TEXT, result BLOB, used REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+
+    def get(self, key):
+        """The cached result for `key` (None on a miss); a hit counts as a use for eviction."""
+        with self.lock:
+            row = self.conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0])
+
+    def put(self, key, symbol, strategy, result):
+        """Stores a result, then evicts the least recently used ones beyond `max_entries`."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (key, symbol, strategy, result, used) VALUES (?, ?, ?, ?, ?)",
+                (key, symbol, strategy, pickle.dumps(result), time.time())
+            )
+            self.conn.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM results")
+
+# ✅ One cache per process: a connection inherited through fork must not be used by the child
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache():
+    """This process's ResultCache (None when BACKTEST_CACHE_SIZE is 0)."""
+    if BACKTEST_CACHE_SIZE <= 0:
+        return None
+    with _caches_lock:
+        cache = _caches.get(os.getpid())
+        if cache is None:
+            cache = _caches[os.getpid()] = ResultCache()
+        return cache
+
+def fingerprint(df):
+    """Checksum of a frame's bars (timestamps and every column), whatever its index layout."""
+    timestamps, columns = bar_store.frame_to_arrays(df)
+    digest = hashlib.blake2b(timestamps.tobytes(), digest_size=16)
+    for col in bar_store.COLUMNS:
+        digest.update(np.ascontiguousarray(columns[col]).tobytes())
+    return digest.hexdigest()
+
+_sources = {}
+
+def _source_hash(strategy):
+    """Hash of a strategy class's source, so editing its rules invalidates its cached results."""
+    if strategy not in _sources:
+        try:
+            source = inspect.getsource(strategy)
+        except (OSError, TypeError):
+            source = ""
+        _sources[strategy] = hashlib.blake2b(source.encode(), digest_size=8).hexdigest()
+    return _sources[strategy]
+
+def result_key(symbol, job, engine, bars_fingerprint):
+    """Cache key of one backtest: symbol, bars, strategy class and parameters, cash, commission and engine."""
+    strategy = job["strategy"]
+    parts = (
+        CACHE_VERSION, symbol, job["timeframe"], bars_fingerprint,
+        f"{strategy.__module__}.{strategy.__qualname__}", _source_hash(strategy),
+        sorted(strategy_params(job).items()), sorted((name, list(values)) for name, values in job.get("grid", {}).items()),
+        job["cash"], job["commission"], engine, WALK_FORWARD_TRAIN_DAYS, WALK_FORWARD_TEST_DAYS,
+    )
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+def cached_backtest(symbol, df, job, engine, run):
+    """
+    Returns the cached result of running `run(symbol, df, job)` with `engine` on these exact bars, or runs it
+    and caches the result. Failed backtests (None) are not cached, so they are retried next time.
+    """
+    cache = get_cache()
+    if cache is None:
+        return run(symbol, df, job)
+
+    key = result_key(symbol, job, engine, fingerprint(df))
+    result = cache.get(key)
+    if result is not None:
+        print(f"♻️ {job['label']} backtest for {symbol}: bars unchanged, reusing the cached result.")
+        return result
+
+    result = run(symbol, df, job)
+    if result is not None:
+        cache.put(key, symbol, job["strategy"].__name__, result)
+    return result
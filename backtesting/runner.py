@@ -0,0 +1,119 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import pandas as pd
+from backtesting.backtest import BACKTEST_JOBS, get_dynamic_dates, run_backtest, run_incremental_backtest, run_walk_forward
+from backtesting.result_cache import cached_backtest
+from backtesting.vectorized import run_panel_backtests, run_vectorized_backtest
+from config.settings import BACKTEST_ENGINE, BACKTEST_WORKERS, FETCH_WORKERS
+from data.bar_buffer import CompactFrames
+from data.market_data import get_historical_data
+
+ENGINES = {
+    "backtrader": run_backtest,
+    "vectorized": run_vectorized_backtest,
+    "incremental": run_incremental_backtest,
+    "walk_forward": run_walk_forward,
+}
+
+RESULT_COLUMNS = ["symbol", "strategy", "timeframe", "final_value", "profit_loss_pct", "win_rate"]
+
+# ✅ (symbol, timeframe) -> bars, shared with worker processes
+_frames = {}
+
+def _init_worker(frames):
+    """Stores the pre-fetched bars in a worker process."""
+    global _frames
+    _frames = frames
+
+def _run_job(symbol, job_name, engine):
+    """Runs one (symbol, strategy) backtest inside a worker process."""
+    job = BACKTEST_JOBS[job_name]
+    df = get_shared_frame((symbol, job["timeframe"]))
+
+    if df is None or df.empty:
+        print(f"⚠️ No historical data available for {symbol}. Skipping {job['label'].lower()} backtest.")
+        return None
+
+    result = cached_backtest(symbol, df, job, engine, ENGINES[engine])  # ✅ Unchanged bars and parameters reuse the stored result
+    if result is not None:
+        result["strategy"] = job_name
+        result["timeframe"] = job["timeframe"]
+    return result
+
+def prefetch_bars(symbols, timeframes, start_date=None, end_date=None, compact=False):
+    """
+    Loads bars (the backtest window by default) for every symbol/timeframe pair using a thread pool.
+    With `compact`, each frame is moved into a CompactFrames buffer as soon as it arrives, so large
+    universes are held as float32/uint32 arrays instead of full DataFrames.
+    """
+    if start_date is None or end_date is None:
+        start_date, end_date = get_dynamic_dates()
+    frames = CompactFrames() if compact else {}
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        futures = {
+            pool.submit(get_historical_data, symbol, start_date, end_date, timeframe): (symbol, timeframe)
+            for symbol in symbols for timeframe in timeframes
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"⚠️ Could not load {key[1]} bars for {key[0]}: {e}")
+                continue
+
+            if compact:
+                frames.add(key, df)
+            else:
+                frames[key] = df
+
+    return frames
+
+def get_shared_frame(key):
+    """Returns pre-fetched bars for a (symbol, timeframe) key inside a worker process."""
+    return _frames.get(key)
+
+def make_shared_pool(frames, max_workers=BACKTEST_WORKERS):
+    """
+    Creates the worker pool; the bars are sent once per worker through the initializer, never per job.
+    Workers are never forked from this process: by the time the bot backtests, other threads (the Telegram
+    dispatcher, order pool, metrics export) may hold locks a forked child would inherit locked forever.
+    They start from a forkserver instead (spawn where there is none).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["backtesting.runner"])  # ✅ Workers start with the engines already imported
+    else:
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_worker, initargs=(frames,))
+
+def run_backtests(symbols, jobs=tuple(BACKTEST_JOBS), max_workers=BACKTEST_WORKERS, engine=BACKTEST_ENGINE, frames=None):
+    """
+    Backtests every (symbol, strategy) pair across a process pool, on `frames` ({(symbol, timeframe): bars}
+    already loaded for the backtest window) or on freshly prefetched bars.
+    Returns one row per successful backtest with the RESULT_COLUMNS columns.
+    """
+    if frames is None:
+        frames = prefetch_bars(symbols, {BACKTEST_JOBS[job_name]["timeframe"] for job_name in jobs})
+    if engine == "panel":
+        # ✅ One batched pass over the whole universe per timeframe; no worker processes needed
+        wanted = set(symbols)
+        rows = run_panel_backtests({key: frames[key] for key in frames if key[0] in wanted}, jobs)
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    rows = []
+
+    with make_shared_pool(frames, max_workers) as pool:
+        futures = {pool.submit(_run_job, symbol, job_name, engine): (symbol, job_name) for symbol in symbols for job_name in jobs}
+        for future in as_completed(futures):
+            symbol, job_name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ {job_name} backtest failed for {symbol}: {e}")
+                continue
+
+            if result is not None:
+                rows.append(result)
+
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
@@ -0,0 +1,211 @@
+import sys
+import numpy as np
+import pandas as pd
+from backtesting.backtest import BACKTEST_JOBS, BacktestStrategy, DayTradeStrategy, get_dynamic_dates, run_backtest, strategy_params, to_feed_frame
+from strategies import registry
+
+# ✅ Metrics compared between the two engines in parity mode
+PARITY_KEYS = ("final_value", "profit_loss_pct", "win_rate")
+
+def sma(values, period):
+    """Simple moving average; NaN until `period` values are available."""
+    return pd.Series(values).rolling(window=period).mean().to_numpy()
+
+def _seeded_ewm(values, period, alpha):
+    """Exponential smoothing seeded with the SMA of the first `period` non-NaN values."""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) < period:
+        return result
+
+    seed_idx = valid[0] + period - 1
+    seeded = values[seed_idx:].copy()
+    seeded[0] = values[valid[0]:seed_idx + 1].mean()
+
+    result[seed_idx:] = pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return result
+
+def ema(values, period):
+    """
+    Exponential moving average seeded with the SMA of the first `period` values,
+    which is how backtrader's EMA starts. Leading NaNs in `values` are skipped.
+    """
+    return _seeded_ewm(values, period, 2 / (period + 1))
+
+def smma(values, period):
+    """Wilder's smoothed moving average (backtrader's SmoothedMovingAverage)."""
+    return _seeded_ewm(values, period, 1 / period)
+
+def rsi(values, period=14):
+    """Relative strength index using Wilder smoothing, as backtrader's RSI does."""
+    change = np.diff(np.asarray(values, dtype=np.float64), prepend=np.nan)
+    up = smma(np.where(np.isnan(change), np.nan, np.maximum(change, 0)), period)
+    down = smma(np.where(np.isnan(change), np.nan, np.maximum(-change, 0)), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + up / down)
+
+def macd(values, fast=12, slow=26, signal=9):
+    """Returns the MACD line and its signal line (backtrader's default 12/26/9)."""
+    macd_line = ema(values, fast) - ema(values, slow)
+    return macd_line, ema(macd_line, signal)
+
+def swing_signals(close, short_window=10, long_window=50):
+    """Entry/exit masks for `BacktestStrategy` (SMA trend plus MACD confirmation)."""
+    sma_short, sma_long = sma(close, short_window), sma(close, long_window)
+    macd_line, macd_signal = macd(close)
+    entries = (sma_short > sma_long) & (macd_line > macd_signal)
+    exits = (sma_short < sma_long) & (macd_line < macd_signal)
+    return entries, exits
+
+def day_trade_signals(close, sma_period=10):
+    """Entry/exit masks for `DayTradeStrategy` (price vs SMA plus MACD confirmation)."""
+    sma_line = sma(close, sma_period)
+    macd_line, macd_signal = macd(close)
+    entries = (close > sma_line) & (macd_line > macd_signal)
+    exits = (close < sma_line) & (macd_line < macd_signal)
+    return entries, exits
+
+# ✅ Vectorized equivalents of the backtrader strategies in BACKTEST_JOBS
+SIGNALS = {
+    BacktestStrategy: swing_signals,
+    DayTradeStrategy: day_trade_signals,
+}
+
+def simulate(open_, close, entries, exits, cash, commission):
+    """
+    Simulates a long-only, one-share strategy from entry/exit masks the way backtrader's default
+    broker does: signals are evaluated on the close and orders fill at the next bar's open.
+    `entries` and `exits` must never both be true on the same bar. Assumes cash always covers one share.
+    """
+    n = len(close)
+    if n == 0:
+        return {"final_value": cash, "profit_loss_pct": 0.0, "win_rate": 0, "trades": 0, "wins": 0}
+
+    # ✅ Desired position after each bar: last event wins (1 after an entry, 0 after an exit)
+    events = np.where(entries, 1.0, np.where(exits, 0.0, np.nan))
+    desired = pd.Series(events).ffill().fillna(0).to_numpy()
+    held = np.concatenate([[0.0], desired[:-1]])  # Position seen by the strategy on each bar
+
+    orders = np.diff(np.concatenate([[0.0], desired]))  # +1 buy signal, -1 sell signal
+    buy_bars = np.flatnonzero(orders > 0)
+    sell_bars = np.flatnonzero(orders < 0)
+
+    # ✅ Orders fill on the next bar's open; anything signalled on the last bar never fills
+    filled_buys = buy_bars[buy_bars + 1 < n]
+    filled_sells = sell_bars[sell_bars + 1 < n]
+    buy_prices = open_[filled_buys + 1]
+    sell_prices = open_[filled_sells + 1]
+
+    final_cash = cash - (buy_prices * (1 + commission)).sum() + (sell_prices * (1 - commission)).sum()
+    final_value = final_cash + held[-1] * close[-1]
+
+    # ✅ Each exit closes the most recent entry; a win is a close above the entry fill price
+    entry_prices = buy_prices[:len(sell_bars)]
+    wins = int((close[sell_bars] > entry_prices).sum())
+    trades = len(buy_bars)
+
+    return {
+        "final_value": final_value,
+        "profit_loss_pct": ((final_value - cash) / cash) * 100,
+        "win_rate": (wins / trades) * 100 if trades > 0 else 0,
+        "trades": trades,
+        "wins": wins,
+    }
+
+def run_vectorized_backtest(symbol, df, job, verbose=True):
+    """Fast-path equivalent of `run_backtest`: same job definition, same metrics dict."""
+    bars = to_feed_frame(df)
+    open_ = bars["open"].to_numpy(dtype=np.float64)
+    close = bars["close"].to_numpy(dtype=np.float64)
+
+    params = dict(job["strategy"].params._getpairs())
+    entries, exits = SIGNALS[job["strategy"]](close, **params)
+    result = simulate(open_, close, entries, exits, job["cash"], job["commission"])
+
+    if verbose:
+        print(f"{job['label']} Backtest for {symbol} (vectorized):")
+        print(f" - Final Portfolio Value: ${result['final_value']:.2f}")
+        print(f" - Profit/Loss: {result['profit_loss_pct']:.2f}%")
+        print(f" - Win Rate: {result['win_rate']:.2f}%")
+
+    return {
+        "symbol": symbol,
+        "final_value": result["final_value"],
+        "profit_loss_pct": result["profit_loss_pct"],
+        "win_rate": result["win_rate"]
+    }
+
+def registry_params(job_name):
+    """Registry parameters reproducing a BACKTEST_JOBS strategy: its backtrader defaults, with backtrader's seeded EMAs."""
+    return {**strategy_params(BACKTEST_JOBS[job_name]), "ema": "ema"}
+
+def run_panel_backtests(frames, job_names=tuple(BACKTEST_JOBS)):
+    """
+    Backtests every symbol in `frames` ({(symbol, timeframe): bars}) on the registry versions of the BACKTEST_JOBS
+    strategies: one batched registry pass per timeframe produces the signals of the whole universe, then each
+    symbol is simulated on its own rows. Returns result rows like `run_vectorized_backtest`'s, tagged with the job.
+    """
+    rows = []
+    for timeframe in sorted({BACKTEST_JOBS[job_name]["timeframe"] for job_name in job_names}):
+        names = [job_name for job_name in job_names if BACKTEST_JOBS[job_name]["timeframe"] == timeframe]
+        panel = registry.BarPanel.from_frames({symbol: df for (symbol, tf), df in frames.items() if tf == timeframe})
+        signals = registry.evaluate(panel, names, {job_name: registry_params(job_name) for job_name in names})
+
+        for job_name in names:
+            job = BACKTEST_JOBS[job_name]
+            entries, exits = signals[job_name]
+            for i, symbol in enumerate(panel.symbols):
+                bars = panel.rows(i)
+                result = simulate(panel["open"][bars], panel["close"][bars], entries[bars], exits[bars], job["cash"], job["commission"])
+                rows.append({
+                    "symbol": symbol,
+                    "strategy": job_name,
+                    "timeframe": timeframe,
+                    "final_value": result["final_value"],
+                    "profit_loss_pct": result["profit_loss_pct"],
+                    "win_rate": result["win_rate"],
+                })
+
+        print(f"📊 Panel backtests: {len(panel.symbols)} symbols x {len(names)} strategies on {timeframe} bars.")
+    return rows
+
+def run_parity_check(symbol, df, job, tolerance=1e-6):
+    """Runs both engines on the same bars and reports how far the vectorized results diverge."""
+    fast = run_vectorized_backtest(symbol, df, job, verbose=False)
+    slow = run_backtest(symbol, df, job)
+    if slow is None:
+        return None
+
+    divergence = {key: abs(fast[key] - slow[key]) for key in PARITY_KEYS}
+    match = all(diff <= tolerance for diff in divergence.values())
+
+    status = "✅ Engines agree" if match else "⚠️ Engines diverge"
+    print(f"{status} on {job['label'].lower()} backtest for {symbol}: "
+          + ", ".join(f"{key} Δ={diff:.6g}" for key, diff in divergence.items()))
+
+    return {
+        "symbol": symbol,
+        "vectorized": fast,
+        "backtrader": slow,
+        "divergence": divergence,
+        "match": match
+    }
+
+if __name__ == "__main__":
+    # ✅ Parity mode: python -m backtesting.vectorized AAPL MSFT ...
+    from data.market_data import get_historical_data
+
+    start_date, end_date = get_dynamic_dates()
+    mismatches = 0
+    for symbol in sys.argv[1:]:
+        for job in BACKTEST_JOBS.values():
+            df = get_historical_data(symbol, start_date, end_date, job["timeframe"])
+            if df.empty:
+                print(f"⚠️ No historical data available for {symbol}. Skipping parity check.")
+                continue
+            report = run_parity_check(symbol, df, job)
+            if report is not None and not report["match"]:
+                mismatches += 1
+
+    sys.exit(1 if mismatches else 0)
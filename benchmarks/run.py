@@ -0,0 +1,330 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import pickle
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+# ✅ Benchmarks never touch real services or the real data folders: dummy credentials
+# (fakes replace every client, so nothing should even build one) and a scratch directory for every store
+_scratch = tempfile.mkdtemp(prefix="bench-")
+os.environ.setdefault("ALPACA_TEST_API_KEY", "benchmark")
+os.environ.setdefault("ALPACA_TEST_SECRET_KEY", "benchmark")
+os.environ["BAR_STORE_DIR"] = os.path.join(_scratch, "bars")
+os.environ["BACKTEST_STATE_DIR"] = os.path.join(_scratch, "backtest_state")
+os.environ["BACKTEST_CACHE_FILE"] = os.path.join(_scratch, "backtest_cache.db")
+os.environ["LEDGER_FILE"] = os.path.join(_scratch, "trades.db")
+os.environ.pop("BAR_FIXTURE_DIR", None)
+
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import FakeDataClient, synthetic_bar_source, synthetic_universe
+from backtesting import vectorized
+from backtesting.backtest import BACKTEST_JOBS, IncrementalBacktest, run_backtest, run_incremental_backtest, run_walk_forward, save_state, to_feed_frame
+from backtesting.optimizer import optimize, parameter_combos
+from backtesting.portfolio import run_portfolio_backtest
+from data import bar_store, market_data
+from data.bar_buffer import CompactFrames
+from strategies.indicators import MACD, RSI, SMA
+
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+DEFAULT_BASELINE = os.path.join("benchmarks", "results", "baseline.json")
+MEMORY_FLOOR_MB = 1.0  # ✅ Peaks below this are too small to compare meaningfully
+
+def bench_bar_store_write(config):
+    frames = synthetic_universe(config.symbols, config.bars, "day", seed=config.seed)
+    start = min(to_feed_frame(df).index[0] for df in frames.values())
+    end = max(to_feed_frame(df).index[-1] for df in frames.values())
+
+    def run():
+        for symbol, df in frames.items():
+            bar_store.write_bars(symbol, "bench", df, start=start, synced_through=end)
+
+    return run, config.symbols * config.bars, "bars"
+
+def bench_bar_store_load(config):
+    frames = synthetic_universe(config.symbols, config.bars, "day", seed=config.seed)
+    for symbol, df in frames.items():
+        bar_store.write_bars(symbol, "day", df, start=to_feed_frame(df).index[0], synced_through=to_feed_frame(df).index[-1])
+
+    def run():
+        for symbol in frames:
+            bar_store.load_bars(symbol, "day")
+
+    return run, config.symbols * config.bars, "bars"
+
+def bench_historical_data(config):
+    """Store-backed `get_historical_data` once the store is synced (the every-morning path)."""
+    market_data.set_bar_source(synthetic_bar_source(config.seed))
+    end = pd.Timestamp("2025-01-01", tz="UTC")
+    start = end - timedelta(days=config.bars)
+    symbols = [f"HIST{i:04d}" for i in range(config.symbols)]
+    for symbol in symbols:
+        market_data.get_historical_data(symbol, start, end)
+
+    def run():
+        for symbol in symbols:
+            market_data.get_historical_data(symbol, start, end)
+
+    return run, config.symbols * config.bars, "bars"
+
+def bench_compact_frames(config):
+    """Moving prefetched 5-minute frames into compact buffers (peak memory ~ what the morning pass keeps)."""
+    frames = synthetic_universe(config.symbols, config.intraday_bars, "5Min", seed=config.seed)
+
+    def run():
+        compact = CompactFrames()
+        for symbol, df in frames.items():
+            compact.add((symbol, "5Min"), df)
+
+    return run, config.symbols * config.intraday_bars, "bars"
+
+def bench_vectorized_indicators(config):
+    closes = [to_feed_frame(df)["close"].to_numpy() for df in synthetic_universe(config.symbols, config.bars, seed=config.seed).values()]
+
+    def run():
+        for close in closes:
+            vectorized.sma(close, 50)
+            vectorized.ema(close, 20)
+            vectorized.rsi(close)
+            vectorized.macd(close)
+
+    return run, config.symbols * config.bars, "bars"
+
+def bench_streaming_indicators(config):
+    closes = to_feed_frame(synthetic_universe(1, config.intraday_bars, "5Min", seed=config.seed)["SYM0000"])["close"].tolist()
+
+    def run():
+        sma, macd, rsi = SMA(50), MACD(), RSI()
+        for close in closes:
+            sma.update(close)
+            macd.update(close)
+            rsi.update(close)
+
+    return run, len(closes), "updates"
+
+def bench_backtrader(config):
+    frames = synthetic_universe(min(config.symbols, 3), config.bars, seed=config.seed)
+
+    def run():
+        for symbol, df in frames.items():
+            run_backtest(symbol, df, BACKTEST_JOBS["swing"])
+
+    return run, len(frames) * config.bars, "bars"
+
+def bench_vectorized_backtest(config):
+    frames = synthetic_universe(config.symbols, config.bars, seed=config.seed)
+
+    def run():
+        for symbol, df in frames.items():
+            vectorized.run_vectorized_backtest(symbol, df, BACKTEST_JOBS["swing"], verbose=False)
+
+    return run, config.symbols * config.bars, "bars"
+
+def bench_incremental_refresh(config):
+    """One daily refresh (78 new 5-minute bars, a regular session) of a carried-forward simulation."""
+    job = BACKTEST_JOBS["day_trade"]
+    df = synthetic_universe(1, config.intraday_bars, "5Min", seed=config.seed)["SYM0000"]
+    bars = to_feed_frame(df)
+    last_day = bars.index[-78]
+
+    state = IncrementalBacktest(job)
+    state.feed_frame(bars[bars.index < last_day])
+    save_state("SYM0000", job, state)
+    blob = pickle.dumps(state)
+
+    def run():
+        save_state("SYM0000", job, pickle.loads(blob))  # ✅ Rewind to yesterday's state
+        run_incremental_backtest("SYM0000", df, job)
+
+    return run, int((bars.index >= last_day).sum()), "new bars"
+
+def bench_walk_forward(config):
+    frames = synthetic_universe(min(config.symbols, 3), config.bars, seed=config.seed)
+
+    def run():
+        for symbol, df in frames.items():
+            run_walk_forward(symbol, df, BACKTEST_JOBS["swing"])
+
+    return run, len(frames) * config.bars, "bars"
+
+def bench_portfolio(config):
+    frames = synthetic_universe(config.symbols, config.bars, seed=config.seed)
+    return lambda: run_portfolio_backtest(frames, "swing", verbose=False), config.symbols * config.bars, "bars"
+
+def bench_optimizer(config):
+    df = synthetic_universe(1, config.bars, seed=config.seed)["SYM0000"]
+    combos = parameter_combos("sma_crossover", n_samples=50, seed=config.seed)
+    return lambda: optimize("SYM0000", df, "sma_crossover", combos), len(combos), "combos"
+
+def bench_live_tick(config):
+    """
+    One polling pass of `bot.poll_tick` (quotes, signal books, exit checks, order submission) against fake
+    data and broker clients, including settling the orders it submits.
+    """
+    import bot
+    from notifications import telegram
+    from strategies.live_signals import DayTradeSignal, SignalBook, SwingTradeSignal
+    from trading import execute
+    from trading.fake_broker import FakeBroker
+    from trading.order_manager import OrderManager
+    from utils.clients import set_client
+
+    set_client("data", FakeDataClient(config.seed))
+    market_data.set_bar_source(market_data.fetch_alpaca_bars)
+    telegram._dispatcher = telegram.TelegramDispatcher(send=lambda text: {"ok": True}, window=0)
+    execute.order_manager = OrderManager(FakeBroker(price_of=lambda symbol: 100.0, latency=0, fill_duration=0), poll_interval=0.01)
+
+    symbols = [f"LIVE{i:04d}" for i in range(config.symbols)]
+    approved = {symbol: {"swing": True, "day_trade": True} for symbol in symbols}
+    swing_signals = SignalBook(SwingTradeSignal, timeframe="day", lookback=timedelta(days=365))
+    day_signals = SignalBook(DayTradeSignal, timeframe="5Min", lookback=timedelta(days=5))
+    swing_signals.warm_up(symbols)
+    day_signals.warm_up(symbols)
+
+    # ✅ Half the symbols hold a position so the exit check has work to do
+    execute.open_trades.clear()
+    for symbol in symbols[::2]:
+        execute.open_trades[symbol] = {"entry_price": 100.0, "qty": 10, "strategy": "swing", "stop_loss": 50.0, "take_profit": 200.0}
+    execute.risk_monitor.load(execute.open_trades)
+
+    def run():
+        market_data.clear_price_cache()
+        bot.poll_tick(approved, swing_signals, day_signals)
+        execute.order_manager.wait(5)
+
+    return run, len(symbols), "symbols"
+
+# ✅ name -> setup(config) returning (run, units of work per run, unit name)
+BENCHMARKS = {
+    "data.bar_store_write": bench_bar_store_write,
+    "data.bar_store_load": bench_bar_store_load,
+    "data.historical_data": bench_historical_data,
+    "data.compact_frames": bench_compact_frames,
+    "indicators.vectorized": bench_vectorized_indicators,
+    "indicators.streaming": bench_streaming_indicators,
+    "backtest.backtrader": bench_backtrader,
+    "backtest.vectorized": bench_vectorized_backtest,
+    "backtest.incremental_refresh": bench_incremental_refresh,
+    "backtest.walk_forward": bench_walk_forward,
+    "backtest.portfolio": bench_portfolio,
+    "backtest.optimizer": bench_optimizer,
+    "live.poll_tick": bench_live_tick,
+}
+
+def _quiet(run):
+    """Wraps `run` so the progress prints of the code under test do not flood the report."""
+    def quiet_run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+    return quiet_run
+
+def measure(run, units, unit, repeat):
+    """Wall time over `repeat` runs (after one warm-up run), then peak traced memory of one more run."""
+    run = _quiet(run)
+    run()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "wall_median_s": median,
+        "wall_min_s": min(timings),
+        "peak_memory_mb": peak / 2**20,
+        "throughput": units / median if median > 0 else float("inf"),
+        "unit": f"{unit}/s",
+    }
+
+def compare(results, baseline, threshold):
+    """Returns [(name, metric, baseline value, new value)] for every metric worse than baseline by more than `threshold`."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        if result["wall_median_s"] > base["wall_median_s"] * (1 + threshold):
+            regressions.append((name, "wall_median_s", base["wall_median_s"], result["wall_median_s"]))
+        if max(result["peak_memory_mb"], base["peak_memory_mb"]) >= MEMORY_FLOOR_MB \
+                and result["peak_memory_mb"] > base["peak_memory_mb"] * (1 + threshold):
+            regressions.append((name, "peak_memory_mb", base["peak_memory_mb"], result["peak_memory_mb"]))
+    return regressions
+
+def write_json(path, data):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data, indicator, backtest and live-tick hot paths on synthetic data.")
+    parser.add_argument("--symbols", type=int, default=50, help="Symbols per universe")
+    parser.add_argument("--bars", type=int, default=1000, help="Daily bars per symbol")
+    parser.add_argument("--intraday-bars", type=int, default=20000, help="5-minute bars for the intraday cases")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="Run only benchmarks whose name contains one of these")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown/memory growth before flagging (0.25 = 25%%)")
+    config = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not config.only or any(part in name for part in config.only)]
+    results = {}
+    for name in names:
+        print(f"⏱️ {name}...", flush=True)
+        run, units, unit = BENCHMARKS[name](config)
+        results[name] = measure(run, units, unit, config.repeat)
+        r = results[name]
+        print(f"   {r['wall_median_s'] * 1000:.2f} ms median, {r['peak_memory_mb']:.1f} MB peak, {r['throughput']:,.0f} {r['unit']}")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "config": {key: getattr(config, key) for key in ("symbols", "bars", "intraday_bars", "repeat", "seed")},
+        },
+        "results": results,
+    }
+    write_json(config.output, report)
+    print(f"📝 Results written to {config.output}")
+
+    status = 0
+    if config.save_baseline:
+        write_json(config.baseline, report)
+        print(f"📌 Baseline saved to {config.baseline}")
+    elif os.path.exists(config.baseline):
+        with open(config.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["config"] != report["meta"]["config"]:
+            print("⚠️ Baseline was recorded with different settings; comparing anyway.")
+        regressions = compare(results, baseline, config.threshold)
+        for name, metric, before, after in regressions:
+            print(f"🚨 REGRESSION {name} {metric}: {before:.4g} -> {after:.4g} ({(after / before - 1) * 100:+.0f}%)")
+        if not regressions:
+            print("✅ No regressions against the baseline.")
+        status = 1 if regressions else 0
+
+    shutil.rmtree(_scratch, ignore_errors=True)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
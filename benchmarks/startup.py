@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# ✅ Modules that must not be imported just to start an entry point (they load on first use)
+HEAVY_MODULES = ("pandas", "numpy", "backtrader", "alpaca", "websockets")
+
+# ✅ Entry point -> (import budget in ms, heavy modules it may load at import)
+ENTRY_POINTS = {
+    "bot": (250, ()),
+    "config.settings": (100, ()),
+    "utils.clients": (150, ()),
+    "trading.market_status": (300, ()),
+}
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from `python -X importtime` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def measure_import(module):
+    """
+    Imports `module` in a fresh interpreter without Alpaca credentials (so building a client at import
+    fails loudly) and returns (cumulative import ms, heavy modules loaded, slowest imports).
+    """
+    env = {k: v for k, v in os.environ.items() if k not in ("ALPACA_TEST_API_KEY", "ALPACA_TEST_SECRET_KEY")}
+    code = f"import json, sys, {module}; print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    times = parse_importtime(result.stderr)
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    return times[module][1] / 1000, json.loads(result.stdout.strip().splitlines()[-1]), slowest
+
+def check(modules, repeat):
+    """Prints each entry point's import time against its budget; returns the list of failures."""
+    failures = []
+    for module in modules:
+        budget, allowed = ENTRY_POINTS[module]
+        runs = [measure_import(module) for _ in range(repeat)]
+        elapsed, heavy, slowest = min(runs, key=lambda run: run[0])  # ✅ Best run; the rest is disk/CPU noise
+        unexpected = [m for m in heavy if m not in allowed]
+
+        status = "✅" if elapsed <= budget and not unexpected else "❌"
+        print(f"{status} import {module}: {elapsed:.0f} ms (budget {budget} ms)")
+        if unexpected:
+            print(f"   loads {', '.join(unexpected)} at import")
+        if status == "❌":
+            print("   slowest imports: " + ", ".join(f"{name} {self_us / 1000:.0f} ms" for name, (self_us, _) in slowest))
+            failures.append(module)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that entry points import within their startup budget.")
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS), help="Entry points to check")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per entry point (the fastest counts)")
+    args = parser.parse_args()
+
+    failures = check(args.modules, args.repeat)
+    if failures:
+        print(f"⚠️ {len(failures)} entry point(s) over their startup budget.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import zlib
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+# ✅ pandas frequency for each timeframe the bot uses
+FREQUENCIES = {"1Min": "1min", "5Min": "5min", "15Min": "15min", "1Hour": "1h", "day": "D"}
+
+def _seed(symbol, seed):
+    """Stable per-symbol seed (Python's hash() changes between runs)."""
+    return zlib.crc32(f"{symbol}:{seed}".encode())
+
+def _utc(value):
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+
+def random_walk_bars(symbol, timestamps, seed=0, start_price=100.0, volatility=0.01):
+    """OHLCV bars shaped like Alpaca's (symbol, timestamp) MultiIndex frame, following a geometric random walk."""
+    rng = np.random.default_rng(_seed(symbol, seed))
+    n = len(timestamps)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+    open_ = close * (1 + rng.normal(0, volatility / 5, n))
+    spread = np.abs(rng.normal(0, volatility / 3, n))
+    volume = rng.integers(1_000, 100_000, n).astype(np.float64)
+
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + spread),
+            "low": np.minimum(open_, close) * (1 - spread),
+            "close": close,
+            "volume": volume,
+            "trade_count": np.maximum(volume // 100, 1),
+            "vwap": (open_ + close) / 2,
+        },
+        index=pd.MultiIndex.from_arrays([[symbol] * n, timestamps], names=["symbol", "timestamp"]),
+    )
+
+def synthetic_bars(symbol, bars=1000, timeframe="day", end="2025-01-01", seed=0):
+    """The last `bars` bars of `timeframe` ending at `end`."""
+    timestamps = pd.date_range(end=pd.Timestamp(end, tz="UTC"), periods=bars, freq=FREQUENCIES[timeframe])
+    return random_walk_bars(symbol, timestamps, seed)
+
+def synthetic_universe(n_symbols, bars=1000, timeframe="day", end="2025-01-01", seed=0):
+    """{symbol: bars} for `n_symbols` made-up tickers."""
+    return {f"SYM{i:04d}": synthetic_bars(f"SYM{i:04d}", bars, timeframe, end, seed) for i in range(n_symbols)}
+
+def synthetic_bar_source(seed=0):
+    """A bar source for `data.market_data.set_bar_source` that makes up bars for any symbol and range."""
+    def fetch(symbol, start_date, end_date, timeframe="day"):
+        timestamps = pd.date_range(_utc(start_date), _utc(end_date), freq=FREQUENCIES[timeframe])
+        if len(timestamps) == 0:
+            return pd.DataFrame()
+        return random_walk_bars(symbol, timestamps, seed)
+
+    return fetch
+
+class FakeDataClient:
+    """Stand-in for `StockHistoricalDataClient` answering latest-trade and bar requests with synthetic data."""
+
+    def __init__(self, seed=0):
+        self.fetch = synthetic_bar_source(seed)
+        self.tick = 0
+
+    def get_stock_latest_trade(self, request):
+        self.tick += 1
+        symbols = request.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        rng = np.random.default_rng(self.tick)
+        prices = 100 * np.exp(rng.normal(0, 0.02, len(symbols)))
+        return {symbol: SimpleNamespace(price=float(price)) for symbol, price in zip(symbols, prices)}
+
+    def get_stock_bars(self, request):
+        symbols = request.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        timeframe = f"{request.timeframe.amount}Min" if request.timeframe.unit.value == "Min" else "day"
+        end = request.end or pd.Timestamp.now(tz="UTC")
+        frames = [self.fetch(symbol, request.start, end, timeframe) for symbol in symbols]
+        frames = [df for df in frames if not df.empty]
+        return SimpleNamespace(df=pd.concat(frames) if frames else pd.DataFrame())
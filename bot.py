@@ -1,89 +1,175 @@
-from strategies.swing_trade import swing_trade_strategy
-from strategies.day_trade import day_trade_strategy
-from trading.execute import execute_trade, open_trades
-from trading.market_status import is_market_open, wait_until_market_opens, wait_until_market_closes
-from backtesting.backtest import run_swing_trade_backtest, run_day_trade_backtest
-from data.market_data import get_real_time_price
-from notifications.telegram import send_telegram_message
-from config.settings import STOCKS
-import time
+from config.settings import STOCKS, USE_STREAMING
+from utils import clock
+from utils.lazy import lazy_import
+from utils.metrics import counter_total, observe, set_gauge, start_metrics_export, timer
+from datetime import timedelta
+
+# ✅ Loaded on first use so `import bot` (and every CLI that imports it) starts without pandas, backtrader, alpaca-py or websockets
+asyncio = lazy_import("asyncio")
+backtest = lazy_import("backtesting.backtest")
+bar_store = lazy_import("data.bar_store")
+execute = lazy_import("trading.execute")
+live_signals = lazy_import("strategies.live_signals")
+market_data = lazy_import("data.market_data")
+market_status = lazy_import("trading.market_status")
+pd = lazy_import("pandas")
+runner = lazy_import("backtesting.runner")
+stream = lazy_import("data.stream")
 
 INTERVAL = 60  # ✅ Check every 60 seconds when market is open
 QTY = 10  # ✅ Default quantity per trade
 
-def exit_trade(symbol):
-    """Exits a trade early if stop-loss or take-profit is triggered."""
-    if symbol not in open_trades:
-        return
+def exit_trades(prices):
+    """Sells every open trade whose stop-loss, trailing stop or take-profit is hit by this batch of prices."""
+    with timer("risk_check_seconds"):
+        exits = execute.risk_monitor.check(prices)
+    execute.record_high_water(prices)
+    for symbol, qty, reason, price in exits:
+        if reason == "stop_loss":
+            print(f"🚨 {symbol} hit STOP-LOSS at ${price:.2f}. Exiting trade.")
+        else:
+            print(f"🎯 {symbol} hit TAKE-PROFIT at ${price:.2f}. Exiting trade.")
+        execute.execute_trade(symbol, qty, "sell", strategy=execute.open_trades.get(symbol, {}).get("strategy", "swing"))  # ✅ open_trades is settled from the fill
+
+def check_symbol(symbol, strategies, swing_signals, day_signals):
+    """Runs the entry signals for one approved symbol."""
+    if strategies["swing"]:
+        print(f"Checking {symbol} for swing trades...")
+        if swing_signals.signal(symbol) == 1:
+            execute.execute_trade(symbol, QTY, "buy", strategy="swing")
+
+    if strategies["day_trade"]:
+        print(f"Checking {symbol} for day trades...")
+        if day_signals.signal(symbol) == 1:
+            execute.execute_trade(symbol, QTY, "buy", strategy="day")
+
+def poll_tick(approved_stocks, swing_signals, day_signals):
+    """One polling pass over every approved symbol."""
+    api_calls = counter_total("api_calls_total")
+    with timer("tick_seconds"):
+        # ✅ One batched quote request per tick, shared by the exit check and the price cache
+        prices = market_data.get_latest_prices(list(approved_stocks) + list(execute.open_trades))
+        exit_trades(prices)  # ✅ Check stop-losses and take-profits before making new trades
+        swing_signals.update()
+        day_signals.update()
 
-    real_time_price = get_real_time_price(symbol)
-    if real_time_price is None:
-        return
-
-    trade_details = open_trades[symbol]
-
-    if real_time_price <= trade_details["stop_loss"]:
-        print(f"🚨 {symbol} hit STOP-LOSS at ${real_time_price:.2f}. Exiting trade.")
-        execute_trade(symbol, trade_details["qty"], "sell")
-        del open_trades[symbol]
-
-    elif real_time_price >= trade_details["take_profit"]:
-        print(f"🎯 {symbol} hit TAKE-PROFIT at ${real_time_price:.2f}. Exiting trade.")
-        execute_trade(symbol, trade_details["qty"], "sell")
-        del open_trades[symbol]
-
-def trading_bot():
+        for symbol, strategies in approved_stocks.items():
+            check_symbol(symbol, strategies, swing_signals, day_signals)
+
+    observe("tick_api_calls", counter_total("api_calls_total") - api_calls)
+    set_gauge("open_positions", len(execute.open_trades))
+
+def stream_session(approved_stocks, swing_signals, day_signals):
+    """Trades until the market closes, reacting to each streamed trade and bar instead of polling."""
+    def on_trade(symbol, price, timestamp):
+        exit_trades({symbol: price})
+
+    def on_bar(symbol, timestamp, bar):
+        day_signals.on_stream_bar(symbol, timestamp, bar)
+        if symbol in approved_stocks:
+            check_symbol(symbol, approved_stocks[symbol], swing_signals, day_signals)
+            session.subscribe(list(execute.open_trades))  # ✅ Exit checks need trades for every position opened since
+
+    def poll():
+        poll_tick(approved_stocks, swing_signals, day_signals)
+        session.subscribe(list(execute.open_trades))
+
+    # ✅ Positions recovered from the ledger need exit checks even when their symbol wasn't approved today
+    session = stream.MarketStream(dict.fromkeys([*approved_stocks, *execute.open_trades]), on_bar=on_bar, on_trade=on_trade)
+    asyncio.run(stream.run_session(
+        session,
+        poll=poll,
+        until=pd.Timestamp(market_status.get_market_close_time()),
+        interval=INTERVAL
+    ))
+
+def approve_stocks(symbols, frames=None):
+    """
+    Backtests every symbol (on `frames` if already loaded) and returns
+    {symbol: {"swing": passed, "day_trade": passed}} for those that passed either strategy.
+    """
+    approved_stocks = {}
+    backtests = runner.run_backtests(symbols, frames=frames)  # ✅ All symbols and strategies in parallel
+    results = {(row["symbol"], row["strategy"]): row for row in backtests.to_dict("records")}
+
+    for symbol in symbols:
+        swing_backtest = results.get((symbol, "swing"))
+        day_trade_backtest = results.get((symbol, "day_trade"))
+
+        if swing_backtest and day_trade_backtest:
+            swing_pass = swing_backtest["win_rate"] >= 60 and swing_backtest["profit_loss_pct"] > 5
+            day_trade_pass = day_trade_backtest["win_rate"] >= 60 and day_trade_backtest["profit_loss_pct"] > 5
+
+            if swing_pass or day_trade_pass:
+                approved_stocks[symbol] = {"swing": swing_pass, "day_trade": day_trade_pass}
+                print(f"✅ Approved {symbol} for trading (Swing: {swing_pass}, Day Trade: {day_trade_pass})")
+            else:
+                print(f"❌ Skipping {symbol} (Swing: {swing_pass}, Day Trade: {day_trade_pass})")
+
+    return approved_stocks
+
+def prepare_session(symbols, swing_signals, day_signals):
+    """
+    Pre-market stage: loads each symbol's history once, backtests it and warms the signal books from
+    the same bars, so the first tick after the open needs no historical fetches. Returns the approved stocks.
+    """
+    print("📊 Running backtests and warming up signals before the open...")
+    books = {"swing": swing_signals, "day_trade": day_signals}
+    start_date, end_date = backtest.get_dynamic_dates()
+    now = clock.now()
+    start = min([bar_store.to_utc(start_date)] + [now - book.lookback for book in books.values()])
+    timeframes = {job["timeframe"] for job in runner.BACKTEST_JOBS.values()} | {book.timeframe for book in books.values()}
+    frames = runner.prefetch_bars(symbols, timeframes, start, now, compact=True)  # ✅ One load per symbol/timeframe covers both windows
+
+    approved_stocks = approve_stocks(symbols, frames=frames.window(start_date, end_date))
+
+    # ✅ Load history once; after this each tick only consumes newly completed bars
+    for name, book in books.items():
+        history = frames.select(book.timeframe)
+        book.warm_up([symbol for symbol, strategies in approved_stocks.items() if strategies[name]], frames=history)
+
+    return approved_stocks
+
+def trading_bot(symbols=STOCKS):
+    start_metrics_export()  # ✅ Prometheus endpoint and/or JSON dump, if configured
     approved_stocks = {}
+    swing_signals = live_signals.make_book("swing", timeframe="day", lookback=timedelta(days=365))
+    day_signals = live_signals.make_book("day_trade", timeframe="5Min", lookback=timedelta(days=5))
     market_was_closed = True  # ✅ Only rerun backtests when market was previously closed
+    prepared = None  # ✅ Approved stocks from the pre-market stage, handed to the first tick
+    execute.recover_open_trades()  # ✅ Pick up positions (entry, stop, target) from before a restart
+
+    def prepare():
+        nonlocal prepared
+        try:
+            prepared = prepare_session(symbols, swing_signals, day_signals)
+        except Exception as e:
+            print(f"⚠️ Pre-market preparation failed: {e}. Retrying at the open.")
 
     while True:
-        if not is_market_open():
-            wait_until_market_opens()  # ✅ Sleeps until 5 minutes before market opens
+        if not market_status.is_market_open():
+            prepared = None
+            market_status.wait_until_market_opens(before_open=prepare)  # ✅ Prepares in the 5 minutes before the open
             market_was_closed = True  # ✅ Ensures backtests are refreshed
 
         if market_was_closed:
-            print("📊 Running backtests at market open...")
-            approved_stocks.clear()  # ✅ Clear old backtest results
-
-            for symbol in STOCKS:
-                swing_backtest = run_swing_trade_backtest(symbol)
-                day_trade_backtest = run_day_trade_backtest(symbol)
-
-                if swing_backtest and day_trade_backtest:
-                    swing_pass = swing_backtest["win_rate"] >= 60 and swing_backtest["profit_loss_pct"] > 5
-                    day_trade_pass = day_trade_backtest["win_rate"] >= 60 and day_trade_backtest["profit_loss_pct"] > 5
-
-                    if swing_pass or day_trade_pass:
-                        approved_stocks[symbol] = {"swing": swing_pass, "day_trade": day_trade_pass}
-                        print(f"✅ Approved {symbol} for trading (Swing: {swing_pass}, Day Trade: {day_trade_pass})")
-                    else:
-                        print(f"❌ Skipping {symbol} (Swing: {swing_pass}, Day Trade: {day_trade_pass})")
+            if prepared is None:  # ✅ Started during the session (or preparation failed); prepare now
+                prepare()
+            approved_stocks, prepared = prepared, None  # ✅ Replaces old backtest results
 
             if not approved_stocks:
                 print("⚠️ No stocks passed the backtest criteria. Pausing until next market open.")
-                wait_until_market_closes()
+                market_status.wait_until_market_closes()
                 continue  # ✅ Skip to next loop iteration
 
             market_was_closed = False  # ✅ Reset flag since backtests have been rerun
 
-        for symbol, strategies in approved_stocks.items():
-            exit_trade(symbol)  # ✅ Check if stop-loss or take-profit is hit before making new trades
-
-            if strategies["swing"]:
-                print(f"Checking {symbol} for swing trades...")
-                swing_df = swing_trade_strategy(symbol)
-                latest_swing_signal = swing_df["Signal"].iloc[-1]
-                if latest_swing_signal == 1:
-                    execute_trade(symbol, QTY, "buy", strategy="swing")
-
-            if strategies["day_trade"]:
-                print(f"Checking {symbol} for day trades...")
-                day_df = day_trade_strategy(symbol)
-                latest_day_signal = day_df["Signal"].iloc[-1]
-                if latest_day_signal == 1:
-                    execute_trade(symbol, QTY, "buy", strategy="day")
-
-        time.sleep(INTERVAL)  # ✅ Runs every 60 seconds when market is open
+        if USE_STREAMING:
+            stream_session(approved_stocks, swing_signals, day_signals)
+            continue  # ✅ Stream ends at the close; loop back to wait for the next open
+
+        poll_tick(approved_stocks, swing_signals, day_signals)
+        clock.sleep(INTERVAL)  # ✅ Runs every 60 seconds when market is open (instant under a replay's virtual clock)
 
 if __name__ == "__main__":
     trading_bot()
@@ -1,6 +1,5 @@
 import os
 from dotenv import load_dotenv
-from alpaca.trading.client import TradingClient
 
 # Load environment variables
 load_dotenv()
@@ -13,9 +12,70 @@ BASE_URL = os.getenv("ALPACA_TEST_BASE_URL")  # Use live URL for real trading
 # Telegram Bot Credentials
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")  # Point at notifications.stub_server for local testing
 
-# Initialize Alpaca Trading Client
-trading_client = TradingClient(API_KEY, API_SECRET, paper=True)  # Set `paper=False` for live trading
+# Alpaca request scheduling (clients are shared through utils.clients)
+ALPACA_TRADING_RATE_LIMIT = int(os.getenv("ALPACA_TRADING_RATE_LIMIT", 200))  # Requests per minute
+ALPACA_DATA_RATE_LIMIT = int(os.getenv("ALPACA_DATA_RATE_LIMIT", 200))  # Requests per minute
+BULK_RESERVE = float(os.getenv("BULK_RESERVE", 0.25))  # Share of the bucket historical backfills may not use
+RATE_LIMIT_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", 5))  # Retries after a 429 before giving up
+
+# Local bar store (columnar NumPy partitions per symbol/timeframe)
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", os.path.join("data", "bars"))
+BAR_FIXTURE_DIR = os.getenv("BAR_FIXTURE_DIR")  # Set to a folder of `<symbol>_<timeframe>.csv` files to skip Alpaca
+
+# Multi-timeframe bars: these timeframes are resampled from the stored base feed instead of downloaded separately
+BASE_TIMEFRAME = os.getenv("BASE_TIMEFRAME", "1Min")
+# 5Min stays native by default: deriving the year-long 5Min backtests would download ~5x as much 1Min data
+DERIVED_TIMEFRAMES = [tf for tf in os.getenv("DERIVED_TIMEFRAMES", "15Min,1Hour").split(",") if tf]  # Add "day" to derive daily bars too
+DERIVED_CACHE_SIZE = int(os.getenv("DERIVED_CACHE_SIZE", 64))  # Derived (symbol, timeframe) frames kept in memory
+BAR_BUFFER_CAPACITY = int(os.getenv("BAR_BUFFER_CAPACITY", 100000))  # Most bars held per symbol/timeframe by the compact in-memory buffers
+
+# Parallelism for the morning backtest pass
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", os.cpu_count() or 1))  # Processes running backtests
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", 8))  # Threads downloading bars
+BACKTEST_ENGINE = os.getenv("BACKTEST_ENGINE", "backtrader")  # "backtrader", "vectorized" (NumPy fast path), "incremental", "walk_forward" or "panel" (all symbols in one registry pass)
+BACKTEST_STATE_DIR = os.getenv("BACKTEST_STATE_DIR", os.path.join("data", "backtest_state"))  # Carried-forward simulations for the incremental engine
+BACKTEST_CACHE_FILE = os.getenv("BACKTEST_CACHE_FILE", os.path.join("data", "backtest_cache.db"))  # Results keyed by bars, strategy, parameters and engine
+BACKTEST_CACHE_SIZE = int(os.getenv("BACKTEST_CACHE_SIZE", 20000))  # Cached results kept (least recently used evicted first); 0 disables the cache
+
+# Market session calendar cache (Alpaca's calendar format: [{"date", "open", "close"}] in New York time)
+MARKET_CALENDAR_FILE = os.getenv("MARKET_CALENDAR_FILE", os.path.join("data", "market_calendar.json"))
+
+# Live signal evaluation: "streaming" (per-symbol indicator state) or "panel" (strategies.registry over all symbols in one batched pass)
+SIGNAL_ENGINE = os.getenv("SIGNAL_ENGINE", "streaming")
+
+# Real-time market data stream (falls back to polling while it is down)
+USE_STREAMING = os.getenv("USE_STREAMING", "false").lower() == "true"
+STREAM_URL = os.getenv("ALPACA_STREAM_URL", "wss://stream.data.alpaca.markets/v2/iex")  # Point at data.replay_server to replay locally
+STREAM_DATA_TIMEOUT = float(os.getenv("STREAM_DATA_TIMEOUT", 30))  # Seconds of silence before the stream counts as dropped
+
+# Universe screening
+ASSET_CACHE_FILE = os.getenv("ASSET_CACHE_FILE", os.path.join("data", "assets.json"))  # Tradable asset list, refreshed daily
+
+# Order execution
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", 8))  # Orders submitted concurrently
+ORDER_POLL_INTERVAL = float(os.getenv("ORDER_POLL_INTERVAL", 0.5))  # Seconds between fill checks
+ORDER_FILL_TIMEOUT = float(os.getenv("ORDER_FILL_TIMEOUT", 120))  # Cancel an order still working after this long
+
+# Position limits shared by live trading and the portfolio backtester
+DAILY_INVESTMENT_LIMIT = float(os.getenv("DAILY_INVESTMENT_LIMIT", 1000))  # Dollars committed to new buys per day
+MAX_OPEN_POSITIONS = int(os.getenv("MAX_OPEN_POSITIONS", 10))
+
+# Exit rules applied to every new position
+STOP_LOSS_PCT = float(os.getenv("STOP_LOSS_PCT", 2))
+TAKE_PROFIT_PCT = float(os.getenv("TAKE_PROFIT_PCT", 5))
+TRAILING_STOP_PCT = float(os.getenv("TRAILING_STOP_PCT", 0))  # Trail this far below the high since entry (0 = off)
+HIGH_WATER_STEP_PCT = float(os.getenv("HIGH_WATER_STEP_PCT", 0.5))  # Rise in a trailing position's high before it is saved to the ledger
+
+# Open-trade ledger (SQLite journal used for crash recovery)
+LEDGER_FILE = os.getenv("LEDGER_FILE", os.path.join("data", "trades.db"))
+LEDGER_SNAPSHOT_EVERY = int(os.getenv("LEDGER_SNAPSHOT_EVERY", 1000))  # Journal entries between full snapshots
+
+# Metrics export (both off by default)
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # Serve Prometheus text on http://0.0.0.0:<port>/metrics
+METRICS_DUMP_FILE = os.getenv("METRICS_DUMP_FILE")  # Periodically write a JSON snapshot here
+METRICS_DUMP_INTERVAL = float(os.getenv("METRICS_DUMP_INTERVAL", 60))
 
 # List of stocks to monitor
 STOCKS = ["AAPL", "TSLA", "MSFT", "NVDA", "AMZN", "SQQQ", "SPY", "QQQ", "AMD", "GOOGL", "OKLO", "RGTI", "TEM", "SMR", "APLD", "NBIS", "HIMS", "RXRX"]
@@ -0,0 +1,167 @@
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+from config.settings import BAR_BUFFER_CAPACITY
+from data import bar_store
+
+# ✅ float32 prices (ample for cent-priced quotes), uint32 counts and int64 ns timestamps: 36 bytes a bar
+PRICE_COLUMNS = ["open", "high", "low", "close", "vwap"]
+COUNT_COLUMNS = ["volume", "trade_count"]
+COUNT_MAX = np.iinfo(np.uint32).max
+
+def _readonly(array):
+    array.flags.writeable = False
+    return array
+
+class BarBuffer:
+    """
+    One symbol's bars for one timeframe in fixed-capacity columnar arrays. Once `capacity` bars are held,
+    appending drops the oldest ones. Bars always sit contiguously, so `view` and `frame` hand out slices of
+    the buffer itself instead of copies. Handed-out views stay valid: making room always moves the kept
+    bars into new arrays rather than shifting them in place.
+    """
+
+    def __init__(self, capacity=BAR_BUFFER_CAPACITY):
+        self.capacity = capacity
+        self.slack = max(capacity // 4, 1)  # ✅ Spare room past the newest bar, so dropping old bars is amortized
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self.prices = np.empty((len(PRICE_COLUMNS), 0), dtype=np.float32)
+        self.counts = np.empty((len(COUNT_COLUMNS), 0), dtype=np.uint32)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.prices.nbytes + self.counts.nbytes
+
+    @property
+    def last_timestamp(self):
+        """UTC ns timestamp of the newest bar (None when empty)."""
+        return int(self.timestamps[self.end - 1]) if self.end > self.start else None
+
+    def _reserve(self, n):
+        """Makes room for `n` more bars after the newest one (n <= capacity)."""
+        if self.end + n <= self.timestamps.shape[0]:
+            return
+
+        keep = min(len(self), self.capacity - n)
+        width = min(max(2 * self.timestamps.shape[0], keep + n), self.capacity + self.slack)
+        lo, hi = self.end - keep, self.end
+
+        timestamps = np.empty(width, dtype=np.int64)
+        prices = np.empty((len(PRICE_COLUMNS), width), dtype=np.float32)
+        counts = np.empty((len(COUNT_COLUMNS), width), dtype=np.uint32)
+        timestamps[:keep] = self.timestamps[lo:hi]
+        prices[:, :keep] = self.prices[:, lo:hi]
+        counts[:, :keep] = self.counts[:, lo:hi]
+
+        self.timestamps, self.prices, self.counts = timestamps, prices, counts
+        self.start, self.end = 0, keep
+
+    def extend_arrays(self, timestamps, columns):
+        """Appends sorted UTC ns timestamps and {column: values}; bars at or before the newest one are ignored."""
+        last = self.last_timestamp
+        if last is not None:
+            newer = timestamps > last
+            timestamps = timestamps[newer]
+            columns = {col: values[newer] for col, values in columns.items()}
+        if len(timestamps) > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            columns = {col: values[-self.capacity:] for col, values in columns.items()}
+
+        n = len(timestamps)
+        if n == 0:
+            return 0
+        self._reserve(n)
+
+        rows = slice(self.end, self.end + n)
+        self.timestamps[rows] = timestamps
+        for i, col in enumerate(PRICE_COLUMNS):
+            self.prices[i, rows] = columns[col]
+        for i, col in enumerate(COUNT_COLUMNS):
+            # ✅ Missing counts become 0; counts beyond uint32 saturate instead of wrapping
+            self.counts[i, rows] = np.clip(np.nan_to_num(columns[col], nan=0.0), 0, COUNT_MAX)
+        self.end += n
+        self.start = max(self.start, self.end - self.capacity)  # ✅ Bars past capacity live on only in the slack
+        return n
+
+    def extend(self, df):
+        """Appends the bars of an Alpaca (symbol, timestamp) or timestamp-indexed frame; returns how many were new."""
+        if df is None or df.empty:
+            return 0
+        return self.extend_arrays(*bar_store.frame_to_arrays(df))
+
+    def append(self, timestamp, bar):
+        """Appends one bar ({column: value}) stamped `timestamp`, e.g. a bar completed on the stream."""
+        ts = bar_store.to_utc(timestamp).as_unit("ns").value
+        columns = {col: np.array([bar.get(col, np.nan)], dtype=np.float64) for col in PRICE_COLUMNS + COUNT_COLUMNS}
+        return self.extend_arrays(np.array([ts], dtype=np.int64), columns)
+
+    def _bounds(self, start=None, end=None):
+        timestamps = self.timestamps[self.start:self.end]
+        lo = 0 if start is None else timestamps.searchsorted(bar_store.to_utc(start).as_unit("ns").value, side="left")
+        hi = len(timestamps) if end is None else timestamps.searchsorted(bar_store.to_utc(end).as_unit("ns").value, side="right")
+        return self.start + lo, self.start + max(lo, hi)
+
+    def view(self, start=None, end=None):
+        """(timestamps, {column: values}) for the bars within [start, end], as read-only views of the buffer."""
+        lo, hi = self._bounds(start, end)
+        columns = {col: _readonly(self.prices[i, lo:hi]) for i, col in enumerate(PRICE_COLUMNS)}
+        columns.update({col: _readonly(self.counts[i, lo:hi]) for i, col in enumerate(COUNT_COLUMNS)})
+        return _readonly(self.timestamps[lo:hi]), columns
+
+    def frame(self, start=None, end=None):
+        """
+        The bars within [start, end] as a timestamp-indexed DataFrame whose columns are views of the buffer
+        (only the index is rebuilt), ready for the backtest engines and `SignalBook.warm_up`.
+        """
+        timestamps, columns = self.view(start, end)
+        index = pd.DatetimeIndex(timestamps.view("datetime64[ns]"), name="timestamp").tz_localize("UTC")
+        return pd.DataFrame({col: columns[col] for col in bar_store.COLUMNS}, index=index, copy=False)
+
+class CompactFrames(Mapping):
+    """
+    Drop-in for a {key: bars} dict (e.g. prefetched {(symbol, timeframe): bars}) that keeps every frame in a
+    BarBuffer. Looking a key up builds a DataFrame over the buffer's arrays, limited to [start, end].
+    """
+
+    def __init__(self, buffers=None, start=None, end=None, capacity=BAR_BUFFER_CAPACITY):
+        self.buffers = {} if buffers is None else buffers
+        self.start = start
+        self.end = end
+        self.capacity = capacity
+
+    def add(self, key, df):
+        """Appends a frame's bars to the buffer for `key`."""
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = BarBuffer(self.capacity)
+        buffer.extend(df)
+
+    def __getitem__(self, key):
+        return self.buffers[key].frame(self.start, self.end)
+
+    def __iter__(self):
+        return iter(self.buffers)
+
+    def __len__(self):
+        return len(self.buffers)
+
+    def __contains__(self, key):
+        return key in self.buffers
+
+    def window(self, start=None, end=None):
+        """The same buffers, limited to the bars within [start, end]."""
+        return CompactFrames(self.buffers, start, end, self.capacity)
+
+    def select(self, timeframe):
+        """{symbol: bars} over the (symbol, `timeframe`) buffers, sharing their arrays."""
+        buffers = {symbol: buffer for (symbol, tf), buffer in self.buffers.items() if tf == timeframe}
+        return CompactFrames(buffers, self.start, self.end, self.capacity)
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self.buffers.values())
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from config.settings import BAR_STORE_DIR
+
+# ✅ Columns kept for every bar (same names Alpaca returns in `BarSet.df`)
+COLUMNS = ["open", "high", "low", "close", "volume", "trade_count", "vwap"]
+
+def _partition_dir(symbol, timeframe):
+    """Returns the directory holding one symbol/timeframe partition."""
+    return os.path.join(BAR_STORE_DIR, symbol, timeframe)
+
+def to_utc(value):
+    """Converts a date string, datetime or Timestamp into a UTC Timestamp."""
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+def load_meta(symbol, timeframe):
+    """Returns the sync metadata for a partition, or None if nothing is stored yet."""
+    path = os.path.join(_partition_dir(symbol, timeframe), "meta.json")
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        meta = json.load(f)
+
+    return {
+        "start": to_utc(meta["start"]),
+        "synced_through": to_utc(meta["synced_through"]),
+        "last_bar": to_utc(meta["last_bar"]) if meta.get("last_bar") else None,
+        "rows": meta["rows"],
+        "generation": meta.get("generation"),
+    }
+
+def _column_path(directory, name, generation):
+    """File of one column; partitions written before generations existed use the bare `<name>.npy`."""
+    return os.path.join(directory, f"{name}.npy" if generation is None else f"{name}.{generation}.npy")
+
+def _load_arrays(symbol, timeframe, meta):
+    """Memory-maps the column arrays of the generation `meta` describes."""
+    directory = _partition_dir(symbol, timeframe)
+    timestamps = np.load(_column_path(directory, "timestamp", meta["generation"]), mmap_mode="r")
+    columns = {col: np.load(_column_path(directory, col, meta["generation"]), mmap_mode="r") for col in COLUMNS}
+    return timestamps, columns
+
+def _load_current(symbol, timeframe, attempts=3):
+    """
+    (meta, timestamps, columns) of the partition's current generation, or (None, None, None) when it is empty.
+    A writer may swap in a new generation and delete the old files between reading meta and opening them; retry then.
+    """
+    for attempt in range(attempts):
+        meta = load_meta(symbol, timeframe)
+        if meta is None or meta["rows"] == 0:
+            return meta, None, None
+        try:
+            return (meta, *_load_arrays(symbol, timeframe, meta))
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+
+def load_bars(symbol, timeframe, start=None, end=None):
+    """
+    Loads stored bars for [start, end] in the same shape Alpaca returns
+    (a DataFrame indexed by symbol and timestamp). Only the requested slice is read from disk.
+    """
+    meta, timestamps, columns = _load_current(symbol, timeframe)
+    if timestamps is None:
+        return pd.DataFrame(columns=COLUMNS)
+
+    lo = 0 if start is None else np.searchsorted(timestamps, to_utc(start).value, side="left")
+    hi = len(timestamps) if end is None else np.searchsorted(timestamps, to_utc(end).value, side="right")
+
+    index = pd.MultiIndex.from_arrays(
+        [np.full(hi - lo, symbol, dtype=object), pd.DatetimeIndex(np.asarray(timestamps[lo:hi]), tz="UTC")],
+        names=["symbol", "timestamp"]
+    )
+    return pd.DataFrame({col: np.asarray(values[lo:hi]) for col, values in columns.items()}, index=index)
+
+def slice_bars(df, start=None, end=None):
+    """The bars of an already loaded frame (sorted by timestamp) within [start, end], like `load_bars` would return them."""
+    if df.empty:
+        return df
+    timestamps = df.index.get_level_values("timestamp") if isinstance(df.index, pd.MultiIndex) else df.index
+    lo = 0 if start is None else timestamps.searchsorted(to_utc(start), side="left")
+    hi = len(df) if end is None else timestamps.searchsorted(to_utc(end), side="right")
+    return df.iloc[lo:hi]
+
+def frame_to_arrays(df):
+    """Flattens an Alpaca bars DataFrame into sorted timestamp/column arrays."""
+    if df.empty:
+        return np.empty(0, dtype=np.int64), {col: np.empty(0) for col in COLUMNS}
+
+    timestamps = df.index.get_level_values("timestamp") if isinstance(df.index, pd.MultiIndex) else df.index
+    timestamps = pd.DatetimeIndex(timestamps).as_unit("ns")
+    timestamps = timestamps.tz_localize("UTC") if timestamps.tz is None else timestamps.tz_convert("UTC")
+
+    timestamps = timestamps.asi8
+    values = df.reindex(columns=COLUMNS).to_numpy(dtype=np.float64)  # ✅ All columns in one conversion; missing ones are NaN
+    if len(timestamps) > 1 and (timestamps[1:] < timestamps[:-1]).any():
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, values = timestamps[order], values[order]
+    values = np.ascontiguousarray(values.T)
+    return timestamps, {col: values[i] for i, col in enumerate(COLUMNS)}
+
+def _tmp_suffix():
+    """Makes file names unique per process and thread, so concurrent writers never swap in each other's files."""
+    return f"{os.getpid()}-{threading.get_ident()}"
+
+def _new_generation():
+    return f"{time.time_ns():x}-{_tmp_suffix()}"
+
+def write_bars(symbol, timeframe, df, start, synced_through):
+    """
+    Merges freshly fetched bars into a partition and records how far it has been synced.
+    Bars already on disk are replaced when a fetch returns the same timestamp (e.g. a bar that was still forming).
+    """
+    directory = _partition_dir(symbol, timeframe)
+    os.makedirs(directory, exist_ok=True)
+
+    new_ts, new_cols = frame_to_arrays(df)
+    meta, old_ts, old_cols = _load_current(symbol, timeframe)
+
+    if old_ts is not None:
+        keep = ~np.isin(old_ts, new_ts)
+        merged_ts = np.concatenate([np.asarray(old_ts)[keep], new_ts])
+        order = np.argsort(merged_ts, kind="stable")
+        merged_ts = merged_ts[order]
+        merged_cols = {col: np.concatenate([np.asarray(old_cols[col])[keep], new_cols[col]])[order] for col in COLUMNS}
+        start = min(to_utc(start), meta["start"])
+        synced_through = max(to_utc(synced_through), meta["synced_through"])
+    else:
+        merged_ts, merged_cols = new_ts, new_cols
+
+    # ✅ Every column goes to new files of a fresh generation; swapping meta.json in is the one step that makes them
+    # current, so a crash leaves either the old partition or the new one (plus unused files), never a mix
+    previous = meta["generation"] if meta is not None else None
+    generation = _new_generation()
+    for name, values in [("timestamp", merged_ts)] + list(merged_cols.items()):
+        np.save(_column_path(directory, name, generation), values)
+
+    meta = {
+        "start": to_utc(start).isoformat(),
+        "synced_through": to_utc(synced_through).isoformat(),
+        "last_bar": pd.Timestamp(merged_ts[-1], tz="UTC").isoformat() if len(merged_ts) else None,
+        "rows": int(len(merged_ts)),
+        "generation": generation,
+    }
+    tmp_meta = os.path.join(directory, f"meta.json.{_tmp_suffix()}.tmp")
+    with open(tmp_meta, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, os.path.join(directory, "meta.json"))
+
+    for name in ["timestamp"] + COLUMNS:
+        try:
+            os.remove(_column_path(directory, name, previous))  # ✅ Open memory maps keep their data until closed
+        except FileNotFoundError:
+            pass
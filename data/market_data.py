@@ -1,36 +1,232 @@
-from alpaca.data.requests import StockLatestTradeRequest, StockBarsRequest
-from alpaca.data.historical import StockHistoricalDataClient
-from config.settings import API_KEY, API_SECRET
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from alpaca.data.requests import StockLatestTradeRequest, StockBarsRequest, StockSnapshotRequest
+from config.settings import BAR_FIXTURE_DIR, BASE_TIMEFRAME, DERIVED_TIMEFRAMES, FETCH_WORKERS
 import pandas as pd
 from alpaca.data.timeframe import TimeFrame  # ✅ Ensure TimeFrame is imported
+from data import bar_store, resample
+from utils import clock
+from utils.clients import PRIORITY_LIVE, get_data_client, request_priority
+from utils.metrics import increment, timer
 
-# Initialize Alpaca Data Client (for historical and real-time data)
-data_client = StockHistoricalDataClient(API_KEY, API_SECRET)
+PRICE_CACHE_TTL = 15  # ✅ Seconds a fetched price is reused within a tick
+QUOTE_BATCH_SIZE = 200  # ✅ Symbols per StockLatestTradeRequest
+SNAPSHOT_BATCH_SIZE = 500  # ✅ Symbols per StockSnapshotRequest
+
+# ✅ symbol -> (price, monotonic fetch time)
+_price_cache = {}
+
+def get_latest_prices(symbols, max_age=PRICE_CACHE_TTL):
+    """
+    Fetches the latest trade price for many symbols at once.
+    Prices fetched within `max_age` seconds are served from the cache; the rest are
+    requested in batches of QUOTE_BATCH_SIZE. Symbols without a trade are left out.
+    """
+    now = clock.monotonic()
+    prices = {}
+    missing = []
+
+    for symbol in dict.fromkeys(symbols):
+        cached = _price_cache.get(symbol)
+        if cached is not None and now - cached[1] <= max_age:
+            prices[symbol] = cached[0]
+        else:
+            missing.append(symbol)
+
+    for i in range(0, len(missing), QUOTE_BATCH_SIZE):
+        request_params = StockLatestTradeRequest(symbol_or_symbols=missing[i:i + QUOTE_BATCH_SIZE])
+        increment("api_calls_total", endpoint="latest_trade")
+        with timer("data_fetch_seconds", endpoint="latest_trade"):
+            latest_trades = get_data_client().get_stock_latest_trade(request_params)
+        fetched_at = clock.monotonic()
+
+        for symbol, trade in latest_trades.items():
+            _price_cache[symbol] = (trade.price, fetched_at)
+            prices[symbol] = trade.price
+
+    return prices
+
+def record_price(symbol, price):
+    """Stores a price pushed by the market data stream so lookups use it instead of polling."""
+    _price_cache[symbol] = (price, clock.monotonic())
+
+def clear_price_cache():
+    """Drops all cached prices so the next lookup goes to Alpaca."""
+    _price_cache.clear()
 
 def get_real_time_price(symbol):
     """Fetches the latest real-time price of a stock."""
-    request_params = StockLatestTradeRequest(symbol_or_symbols=symbol)
-    latest_trade = data_client.get_stock_latest_trade(request_params)
-    
-    return latest_trade[symbol].price if symbol in latest_trade else None
-
-
-def get_historical_data(symbol, start_date, end_date, timeframe="day"):
-    """Fetches historical stock data from Alpaca."""
-    tf_map = {
-        "1Min": TimeFrame.Minute,
-        "5Min": TimeFrame(5, TimeFrame.Minute),
-        "15Min": TimeFrame(15, TimeFrame.Minute),
-        "day": TimeFrame.Day
-    }
-    
+    return get_latest_prices([symbol]).get(symbol)
+
+
+TIMEFRAMES = {
+    "1Min": TimeFrame.Minute,
+    "5Min": TimeFrame(5, TimeFrame.Minute),
+    "15Min": TimeFrame(15, TimeFrame.Minute),
+    "1Hour": TimeFrame.Hour,
+    "day": TimeFrame.Day
+}
+
+def _snapshot_rows(symbols):
+    """Fetches one chunk of snapshots and flattens them into rows."""
+    increment("api_calls_total", endpoint="snapshot")
+    with timer("data_fetch_seconds", endpoint="snapshot"):
+        snapshots = get_data_client().get_stock_snapshot(StockSnapshotRequest(symbol_or_symbols=symbols))
+    rows = []
+    for symbol, snapshot in snapshots.items():
+        # ✅ Before the open today's daily bar is empty, so fall back to the previous session
+        daily_bar = snapshot.daily_bar or snapshot.previous_daily_bar
+        rows.append({
+            "symbol": symbol,
+            "price": snapshot.latest_trade.price if snapshot.latest_trade else None,
+            "volume": daily_bar.volume if daily_bar else None,
+            "previous_volume": snapshot.previous_daily_bar.volume if snapshot.previous_daily_bar else None,
+        })
+    return rows
+
+def get_snapshots(symbols):
+    """
+    Returns latest price and daily volume for many symbols as one DataFrame indexed by symbol,
+    fetched in chunks of SNAPSHOT_BATCH_SIZE on a thread pool.
+    """
+    symbols = list(symbols)
+    chunks = [symbols[i:i + SNAPSHOT_BATCH_SIZE] for i in range(0, len(symbols), SNAPSHOT_BATCH_SIZE)]
+    rows = []
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        for chunk_rows in pool.map(_snapshot_rows, chunks):
+            rows.extend(chunk_rows)
+
+    fetched_at = clock.monotonic()
+    for row in rows:
+        if row["price"] is not None:
+            _price_cache[row["symbol"]] = (row["price"], fetched_at)
+
+    return pd.DataFrame(rows, columns=["symbol", "price", "volume", "previous_volume"]).set_index("symbol")
+
+def fetch_alpaca_bars(symbol, start_date, end_date, timeframe="day"):
+    """Downloads bars straight from Alpaca, bypassing the local bar store."""
     request_params = StockBarsRequest(
         symbol_or_symbols=symbol,
-        timeframe=tf_map[timeframe],
+        timeframe=TIMEFRAMES[timeframe],
         start=start_date,
         end=end_date
     )
-    
-    bars = data_client.get_stock_bars(request_params).df
+
+    increment("api_calls_total", endpoint="bars")
+    with timer("data_fetch_seconds", endpoint="bars"):
+        bars = get_data_client().get_stock_bars(request_params).df
 
     return bars
+
+def csv_bar_source(directory):
+    """
+    Returns a bar source that reads local fixture files named `<symbol>_<timeframe>.csv`
+    (columns: timestamp, open, high, low, close, volume[, trade_count, vwap]) instead of calling Alpaca.
+    """
+    def fetch(symbol, start_date, end_date, timeframe="day"):
+        path = os.path.join(directory, f"{symbol}_{timeframe}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+
+        df = pd.read_csv(path, parse_dates=["timestamp"])
+        df["timestamp"] = pd.DatetimeIndex(df["timestamp"]).tz_localize("UTC") if df["timestamp"].dt.tz is None \
+            else df["timestamp"].dt.tz_convert("UTC")
+        df = df[(df["timestamp"] >= bar_store.to_utc(start_date)) & (df["timestamp"] <= bar_store.to_utc(end_date))]
+        df.insert(0, "symbol", symbol)
+        return df.set_index(["symbol", "timestamp"])
+
+    return fetch
+
+# ✅ Where missing bars come from; swap with `set_bar_source` to run against a local fixture feed
+bar_source = csv_bar_source(BAR_FIXTURE_DIR) if BAR_FIXTURE_DIR else fetch_alpaca_bars
+
+def set_bar_source(source):
+    """Replaces the function used to download bars that are not in the local store yet."""
+    global bar_source
+    bar_source = source
+
+# ✅ (symbol, timeframe) -> lock serializing the sync of one partition (derived timeframes share the base one)
+_partition_locks = {}
+_partition_locks_lock = threading.Lock()
+
+def _partition_lock(symbol, timeframe):
+    with _partition_locks_lock:
+        return _partition_locks.setdefault((symbol, timeframe), threading.Lock())
+
+def get_derived_data(symbol, start_date, end_date, timeframe):
+    """
+    `timeframe` bars resampled from the stored BASE_TIMEFRAME bars, syncing only the base partition.
+    Returns None when the source has no base bars for the range (e.g. a fixture folder without 1Min files).
+    """
+    start = resample.bucket_start(start_date, timeframe)  # ✅ Whole first bucket, so its open is the real open
+    base = get_historical_data(symbol, start, end_date, BASE_TIMEFRAME)
+    if base.empty:
+        return None
+    return resample.derived_bars(symbol, BASE_TIMEFRAME, timeframe, start, end_date)
+
+def get_historical_data(symbol, start_date, end_date, timeframe="day", use_store=True):
+    """
+    Fetches historical stock data, serving it from the local bar store when possible.
+    Only the part of the range that has not been synced yet is downloaded; timeframes in
+    DERIVED_TIMEFRAMES are resampled from the base feed so each symbol is downloaded once.
+    """
+    if not use_store:
+        return bar_source(symbol, start_date, end_date, timeframe)
+
+    if timeframe in DERIVED_TIMEFRAMES and timeframe != BASE_TIMEFRAME:
+        derived = get_derived_data(symbol, start_date, end_date, timeframe)
+        if derived is not None:
+            return derived
+
+    start = bar_store.to_utc(start_date)
+    end = bar_store.to_utc(end_date)
+    now = clock.now()
+    with _partition_lock(symbol, timeframe):  # ✅ Concurrent requests for a partition download it once
+        meta = bar_store.load_meta(symbol, timeframe)
+
+        if meta is None:
+            bars = bar_source(symbol, start, end, timeframe)
+            bar_store.write_bars(symbol, timeframe, bars, start=start, synced_through=min(end, now))
+            return bar_store.load_bars(symbol, timeframe, start, end)
+
+        if start < meta["start"]:
+            # ✅ Requested range reaches further back than what was synced; backfill the head
+            head = bar_source(symbol, start, meta["start"], timeframe)
+            bar_store.write_bars(symbol, timeframe, head, start=start, synced_through=meta["synced_through"])
+
+        if end > meta["synced_through"]:
+            # ✅ Re-fetch from the last stored bar so a bar that was still forming gets completed
+            tail_start = min(meta["last_bar"], meta["synced_through"]) if meta["last_bar"] is not None else meta["synced_through"]
+            tail = bar_source(symbol, tail_start, end, timeframe)
+            bar_store.write_bars(symbol, timeframe, tail, start=meta["start"], synced_through=min(end, now))
+
+        return bar_store.load_bars(symbol, timeframe, start, end)
+
+def get_recent_bars(symbols, start, timeframe="5Min"):
+    """
+    Fetches bars since `start` for many symbols and returns {symbol: DataFrame indexed by timestamp}.
+    Uses one multi-symbol request against Alpaca; fixture feeds are read symbol by symbol.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+
+    if bar_source is fetch_alpaca_bars:
+        request_params = StockBarsRequest(symbol_or_symbols=symbols, timeframe=TIMEFRAMES[timeframe], start=start)
+        increment("api_calls_total", endpoint="bars")
+        with timer("data_fetch_seconds", endpoint="bars"), request_priority(PRIORITY_LIVE):  # ✅ A live tick is waiting on these
+            bars = get_data_client().get_stock_bars(request_params).df
+    else:
+        end = clock.now()
+        frames = {symbol: bar_source(symbol, start, end, timeframe) for symbol in symbols}
+        return {
+            symbol: df.droplevel("symbol") if isinstance(df.index, pd.MultiIndex) else df
+            for symbol, df in frames.items() if not df.empty
+        }
+
+    if bars.empty:
+        return {}
+
+    return {symbol: frame.droplevel("symbol") for symbol, frame in bars.groupby(level="symbol")}
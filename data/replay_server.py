@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import json
+import pandas as pd
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+from data import bar_store
+
+def load_events(symbols, start, end, timeframe="1Min"):
+    """
+    Builds the playback sequence from bars recorded in the local bar store: for every bar,
+    a bar message followed by a trade at the bar's close, ordered by time.
+    """
+    frames = [bar_store.load_bars(symbol, timeframe, start, end) for symbol in symbols]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return []
+
+    bars = pd.concat(frames).reset_index().sort_values(["timestamp", "symbol"], kind="stable")
+    events = []
+    for row in bars.itertuples(index=False):
+        ts = row.timestamp.isoformat().replace("+00:00", "Z")
+        events.append((row.timestamp, {
+            "T": "b", "S": row.symbol, "t": ts, "o": row.open, "h": row.high, "l": row.low,
+            "c": row.close, "v": row.volume, "n": row.trade_count, "vw": row.vwap,
+        }))
+        events.append((row.timestamp, {"T": "t", "S": row.symbol, "t": ts, "p": row.close, "s": 1}))
+    return events
+
+def make_handler(events, speed):
+    """
+    Returns a connection handler speaking Alpaca's JSON stream protocol.
+    `speed` is market seconds played per real second (0 plays back as fast as possible).
+    """
+    async def handler(ws):
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        json.loads(await ws.recv())  # auth; any key is accepted
+        await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+
+        request = json.loads(await ws.recv())
+        bars, trades = set(request.get("bars", [])), set(request.get("trades", []))
+        await ws.send(json.dumps([{"T": "subscription", "bars": sorted(bars), "trades": sorted(trades)}]))
+
+        async def follow_subscriptions():
+            try:
+                async for raw in ws:  # ✅ Symbols subscribed mid-session are played from then on
+                    request = json.loads(raw)
+                    bars.update(request.get("bars", []))
+                    trades.update(request.get("trades", []))
+                    await ws.send(json.dumps([{"T": "subscription", "bars": sorted(bars), "trades": sorted(trades)}]))
+            except ConnectionClosed:
+                pass
+
+        follower = asyncio.create_task(follow_subscriptions())
+        previous = None
+        for timestamp, msg in events:
+            wanted = bars if msg["T"] == "b" else trades
+            if msg["S"] not in wanted:
+                continue
+            if speed and previous is not None and timestamp > previous:
+                await asyncio.sleep((timestamp - previous).total_seconds() / speed)
+            previous = timestamp
+            await ws.send(json.dumps([msg]))
+
+        await follower  # ✅ Ends when the client disconnects
+
+    return handler
+
+async def serve_replay(symbols, start, end, host="localhost", port=8765, speed=0):
+    """Serves recorded bars on ws://host:port until cancelled."""
+    events = load_events(symbols, start, end)
+    print(f"📼 Replaying {len(events)} events for {len(symbols)} symbols on ws://{host}:{port}")
+    async with serve(make_handler(events, speed), host, port):
+        await asyncio.Future()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play back recorded 1-minute bars over a local market data stream.")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--start", required=True)
+    parser.add_argument("--end", required=True)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=0, help="Market seconds per real second (0 = no delay)")
+    args = parser.parse_args()
+
+    asyncio.run(serve_replay(args.symbols, args.start, args.end, port=args.port, speed=args.speed))
@@ -0,0 +1,139 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from config.settings import DERIVED_CACHE_SIZE
+from data import bar_store
+
+MARKET_TZ = "America/New_York"
+MINUTE_NS = 60 * 10**9
+DAY_NS = 24 * 60 * MINUTE_NS
+
+# ✅ Bucket width of every timeframe that can be derived from finer bars
+STEPS = {"1Min": MINUTE_NS, "5Min": 5 * MINUTE_NS, "15Min": 15 * MINUTE_NS, "1Hour": 60 * MINUTE_NS, "day": DAY_NS}
+
+# ✅ Regular session in New York time; intraday buckets restart at the open and the close so none straddles them
+SESSION_OPEN_NS = (9 * 60 + 30) * MINUTE_NS
+SESSION_CLOSE_NS = 16 * 60 * MINUTE_NS
+
+def _local_offsets(timestamps):
+    """New York wall-clock minus UTC (ns) for each UTC int64 timestamp."""
+    index = pd.DatetimeIndex(timestamps.astype("datetime64[ns]")).tz_localize("UTC")
+    return index.tz_convert(MARKET_TZ).tz_localize(None).asi8 - timestamps
+
+def bucket_keys(timestamps, timeframe):
+    """
+    Start (UTC ns) of the `timeframe` bucket each UTC ns timestamp falls into. Intraday buckets are
+    aligned to New York time and anchored at the session open and close (hourly bars run 9:30-10:30, ...);
+    daily buckets are New York dates, labelled at local midnight like Alpaca's daily bars.
+    """
+    offsets = _local_offsets(timestamps)
+    local = timestamps + offsets
+    day = local - local % DAY_NS
+    if timeframe == "day":
+        # ✅ Midnight's own UTC offset, which differs from the bar's on daylight-saving switch days
+        return pd.DatetimeIndex(day.astype("datetime64[ns]")).tz_localize(MARKET_TZ).asi8
+
+    step = STEPS[timeframe]
+    time_of_day = local - day
+    anchor = np.where(time_of_day < SESSION_OPEN_NS, 0, np.where(time_of_day < SESSION_CLOSE_NS, SESSION_OPEN_NS, SESSION_CLOSE_NS))
+    return day + anchor + (time_of_day - anchor) // step * step - offsets
+
+def bucket_start(value, timeframe):
+    """UTC Timestamp at which the `timeframe` bar containing `value` starts."""
+    ts = bar_store.to_utc(value).as_unit("ns")
+    return pd.Timestamp(int(bucket_keys(np.array([ts.value], dtype=np.int64), timeframe)[0]), tz="UTC")
+
+def in_regular_session(timestamps):
+    """Mask of UTC ns timestamps inside 9:30-16:00 New York time."""
+    time_of_day = (timestamps + _local_offsets(timestamps)) % DAY_NS
+    return (time_of_day >= SESSION_OPEN_NS) & (time_of_day < SESSION_CLOSE_NS)
+
+def resample_bars(df, timeframe):
+    """
+    Aggregates one symbol's bars into `timeframe` OHLCV bars: first open, max high, min low, last close,
+    summed volume/trade_count and volume-weighted vwap. Takes Alpaca's (symbol, timestamp) frame or a
+    timestamp-indexed one and returns the same shape. Daily bars only use regular-session bars, the way
+    exchanges report the day's OHLC.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=bar_store.COLUMNS)
+
+    symbol = df.index.get_level_values("symbol")[0] if isinstance(df.index, pd.MultiIndex) else None
+    timestamps, columns = bar_store.frame_to_arrays(df)
+    if timeframe == "day":
+        regular = in_regular_session(timestamps)
+        timestamps = timestamps[regular]
+        columns = {col: values[regular] for col, values in columns.items()}
+        if len(timestamps) == 0:
+            return pd.DataFrame(columns=bar_store.COLUMNS)
+
+    keys = bucket_keys(timestamps, timeframe)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    volume = np.add.reduceat(columns["volume"], starts)
+    dollar_volume = np.add.reduceat(columns["vwap"] * columns["volume"], starts)
+    close = columns["close"][ends]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = np.where(volume > 0, dollar_volume / volume, close)
+
+    index = pd.DatetimeIndex(keys[starts].astype("datetime64[ns]"), name="timestamp").tz_localize("UTC")
+    if symbol is not None:
+        index = pd.MultiIndex.from_arrays([np.full(len(starts), symbol, dtype=object), index], names=["symbol", "timestamp"])
+    return pd.DataFrame({
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": close,
+        "volume": volume,
+        "trade_count": np.add.reduceat(columns["trade_count"], starts),
+        "vwap": vwap,
+    }, index=index)
+
+# ✅ (symbol, base timeframe, timeframe) -> (base partition signature, derived bars), least recently used first
+_derived = OrderedDict()
+_derived_lock = threading.Lock()
+
+def _signature(meta):
+    return meta["rows"], meta["last_bar"], meta["synced_through"]
+
+def derived_bars(symbol, base_timeframe, timeframe, start=None, end=None):
+    """
+    `timeframe` bars for [start, end] derived from the stored `base_timeframe` partition. The whole
+    partition is resampled once and cached until the partition changes, so other ranges and repeated
+    warm-ups only slice the cached frame.
+    """
+    meta = bar_store.load_meta(symbol, base_timeframe)
+    if meta is None or meta["rows"] == 0:
+        return pd.DataFrame(columns=bar_store.COLUMNS)
+
+    key = (symbol, base_timeframe, timeframe)
+    signature = _signature(meta)
+    with _derived_lock:
+        cached = _derived.get(key)
+        if cached is not None and cached[0] == signature:
+            _derived.move_to_end(key)
+            bars = cached[1]
+        else:
+            bars = None
+
+    if bars is None:
+        bars = resample_bars(bar_store.load_bars(symbol, base_timeframe), timeframe)
+        with _derived_lock:
+            _derived[key] = (signature, bars)
+            _derived.move_to_end(key)
+            while len(_derived) > DERIVED_CACHE_SIZE:
+                _derived.popitem(last=False)
+
+    if bars.empty:
+        return bars
+    timestamps = bars.index.get_level_values("timestamp")
+    lo = 0 if start is None else timestamps.searchsorted(bucket_start(start, timeframe), side="left")
+    hi = len(bars) if end is None else timestamps.searchsorted(bar_store.to_utc(end), side="right")
+    return bars.iloc[lo:hi]
+
+def clear_cache():
+    """Drops every cached derived frame."""
+    with _derived_lock:
+        _derived.clear()
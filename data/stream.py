@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+import pandas as pd
+from websockets.asyncio.client import connect
+from websockets.exceptions import WebSocketException
+from config.settings import API_KEY, API_SECRET, STREAM_DATA_TIMEOUT, STREAM_URL
+from data.market_data import record_price
+
+class StreamError(Exception):
+    """Raised when the market data stream is rejected, drops or goes silent."""
+
+# ✅ Failures that switch the session to polling until the stream reconnects
+STREAM_ERRORS = (StreamError, WebSocketException, OSError, asyncio.TimeoutError)
+
+def parse_bar(msg):
+    """Converts an Alpaca stream bar message into (symbol, timestamp, bar dict)."""
+    bar = {
+        "open": msg["o"],
+        "high": msg["h"],
+        "low": msg["l"],
+        "close": msg["c"],
+        "volume": msg["v"],
+        "trade_count": msg.get("n"),
+        "vwap": msg.get("vw"),
+    }
+    return msg["S"], pd.Timestamp(msg["t"]).tz_convert("UTC"), bar
+
+class MarketStream:
+    """
+    Subscribes to 1-minute bars and trades for a set of symbols over Alpaca's market data
+    WebSocket (JSON protocol) and hands every event to the callbacks, in arrival order.
+    Point STREAM_URL at `data.replay_server` to play back recorded bars locally.
+    """
+
+    def __init__(self, symbols, on_bar, on_trade, url=STREAM_URL, data_timeout=STREAM_DATA_TIMEOUT):
+        self.symbols = list(symbols)
+        self.on_bar = on_bar
+        self.on_trade = on_trade
+        self.url = url
+        self.data_timeout = data_timeout
+        self.received_data = False
+        self.pending = []  # ✅ Symbols added mid-session, subscribed on the open connection by `run`
+
+    def subscribe(self, symbols):
+        """Adds symbols to the subscription (e.g. a position opened mid-session); safe to call from the callbacks."""
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.symbols]
+        self.symbols.extend(new)  # ✅ A reconnect's handshake subscribes them too
+        self.pending.extend(new)
+
+    async def _subscribe_pending(self, ws):
+        if self.pending:
+            symbols, self.pending = self.pending, []
+            await ws.send(json.dumps({"action": "subscribe", "bars": symbols, "trades": symbols}))
+
+    async def _expect(self, ws, msg_type, text=None):
+        """Reads one control message and checks it is the expected reply."""
+        reply = json.loads(await asyncio.wait_for(ws.recv(), self.data_timeout))[0]
+        if reply.get("T") == "error" or reply.get("T") != msg_type or (text and reply.get("msg") != text):
+            raise StreamError(f"Unexpected stream reply: {reply}")
+
+    async def _handshake(self, ws):
+        await self._expect(ws, "success", "connected")
+        await ws.send(json.dumps({"action": "auth", "key": API_KEY, "secret": API_SECRET}))
+        await self._expect(ws, "success", "authenticated")
+        await ws.send(json.dumps({"action": "subscribe", "bars": self.symbols, "trades": self.symbols}))
+        await self._expect(ws, "subscription")
+
+    async def _dispatch(self, msg):
+        msg_type = msg.get("T")
+        if msg_type == "t":
+            timestamp = pd.Timestamp(msg["t"]).tz_convert("UTC")
+            record_price(msg["S"], msg["p"])  # ✅ Keeps exit checks and order pricing on the freshest trade
+            await asyncio.to_thread(self.on_trade, msg["S"], msg["p"], timestamp)
+        elif msg_type == "b":
+            await asyncio.to_thread(self.on_bar, *parse_bar(msg))
+        elif msg_type == "error":
+            raise StreamError(msg.get("msg", "stream error"))
+
+    async def run(self, until):
+        """
+        Streams events until the UTC timestamp `until`.
+        Raises one of STREAM_ERRORS if the connection fails, drops, or stays silent for `data_timeout` seconds.
+        """
+        async with connect(self.url, open_timeout=self.data_timeout) as ws:
+            self.pending = []
+            await self._handshake(ws)
+            print(f"📡 Streaming bars and trades for {len(self.symbols)} symbols.")
+
+            while True:
+                remaining = (until - pd.Timestamp.now(tz="UTC")).total_seconds()
+                if remaining <= 0:
+                    return
+
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), min(remaining, self.data_timeout))
+                except asyncio.TimeoutError:
+                    if pd.Timestamp.now(tz="UTC") >= until:
+                        return
+                    raise StreamError(f"No market data for {self.data_timeout}s")
+
+                self.received_data = True
+                for msg in json.loads(raw):
+                    await self._dispatch(msg)
+                await self._subscribe_pending(ws)
+
+async def run_session(stream, poll, until, interval):
+    """
+    Runs the stream until `until`. Whenever it drops, `poll` (the regular polling tick) runs every
+    `interval` seconds while reconnects are retried with exponential backoff.
+    """
+    retries = 0
+    last_poll = float("-inf")
+
+    while pd.Timestamp.now(tz="UTC") < until:
+        stream.received_data = False
+        try:
+            await stream.run(until)
+            return
+        except STREAM_ERRORS as e:
+            print(f"⚠️ Market data stream unavailable ({e}). Falling back to polling.")
+
+        if stream.received_data:
+            retries = 0  # ✅ The stream was healthy before this drop; reconnect quickly
+
+        if time.monotonic() - last_poll >= interval:
+            await asyncio.to_thread(poll)
+            last_poll = time.monotonic()
+
+        retries += 1
+        await asyncio.sleep(min(2 ** retries, interval))
@@ -0,0 +1,59 @@
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+def make_handler(received, rate_limit_every=0, retry_after=1):
+    """
+    Returns a request handler imitating Telegram's sendMessage endpoint. Every message is appended
+    to `received`; with `rate_limit_every` set, every Nth request gets a 429 instead.
+    """
+    counter = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+            counter["requests"] += 1
+
+            if rate_limit_every and counter["requests"] % rate_limit_every == 0:
+                status, reply = 429, {"ok": False, "error_code": 429, "parameters": {"retry_after": retry_after}}
+            else:
+                received.append((time.time(), parse_qs(body).get("text", [""])[0]))
+                status, reply = 200, {"ok": True, "result": {"message_id": len(received)}}
+
+            payload = json.dumps(reply).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def start_stub(port=8081, rate_limit_every=0, retry_after=1):
+    """Starts the stub on a background thread; returns (server, list of received messages)."""
+    import threading
+
+    received = []
+    server = ThreadingHTTPServer(("localhost", port), make_handler(received, rate_limit_every, retry_after))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Telegram Bot API.")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with a 429")
+    args = parser.parse_args()
+
+    server, received = start_stub(args.port, args.rate_limit_every)
+    print(f"📨 Telegram stub listening on http://localhost:{args.port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"📨 {len(received)} messages received")
+    except KeyboardInterrupt:
+        server.shutdown()
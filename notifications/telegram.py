@@ -1,13 +1,159 @@
+import atexit
+import queue
+import threading
+import time
 import requests
-from config.settings import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from config.settings import TELEGRAM_API_URL, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from utils.metrics import increment, set_gauge, timer
 
-def send_telegram_message(message):
-    """Sends a notification message via Telegram."""
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+MAX_MESSAGE_LENGTH = 4096  # ✅ Telegram's limit per message
+QUEUE_SIZE = 1000  # ✅ Messages waiting to be sent before new ones are dropped
+COALESCE_WINDOW = 1.0  # ✅ Seconds to gather a burst into one message
+MIN_SEND_INTERVAL = 1.0  # ✅ Telegram allows about one message per second per chat
+MAX_ATTEMPTS = 5
+
+# ✅ Pooled connection reused by every send
+_session = requests.Session()
+
+def escape_markdown(value):
+    """Escapes a value interpolated into a Markdown message (e.g. the `_` in `day_trade`), so it can't open an entity."""
+    text = str(value)
+    for char in ("_", "*", "`", "["):
+        text = text.replace(char, f"\\{char}")
+    return text
+
+def send_telegram_message_now(message, parse_mode="Markdown"):
+    """Sends a notification message via Telegram, blocking until Telegram answers (`parse_mode=None` sends plain text)."""
+    url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     data = {
         "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "parse_mode": "Markdown"
+        "text": message
     }
-    response = requests.post(url, data=data)
+    if parse_mode:
+        data["parse_mode"] = parse_mode
+    response = _session.post(url, data=data, timeout=10)
     return response.json()
+
+def _chunks(messages):
+    """Groups queued messages into as few Telegram-sized texts as possible, keeping their order."""
+    groups = []
+    current, length = [], 0
+    for message in messages:
+        message = message[:MAX_MESSAGE_LENGTH]
+        added = len(message) + (2 if current else 0)  # ✅ Messages are joined by a blank line
+        if current and length + added > MAX_MESSAGE_LENGTH:
+            groups.append(current)
+            current, length, added = [], 0, len(message)
+        current.append(message)
+        length += added
+    if current:
+        groups.append(current)
+    return groups
+
+class TelegramDispatcher:
+    """
+    Sends Telegram notifications from a background thread so callers never wait on the network.
+    Bursts are coalesced into a single message, 429 responses are retried after Telegram's
+    `retry_after`, and `flush` blocks until everything queued has been delivered.
+    """
+
+    def __init__(self, send=send_telegram_message_now, queue_size=QUEUE_SIZE, window=COALESCE_WINDOW):
+        self.send = send
+        self.window = window
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.last_sent = 0.0
+        self.thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, message):
+        """Queues a message; drops it (with a warning) if the queue is full."""
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            print(f"⚠️ Telegram queue full. Dropping notification: {message[:60]}")
+
+    def flush(self, timeout=None):
+        """Waits until every queued message has been sent (or given up on)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            set_gauge("notification_queue_depth", self.queue.qsize())
+            for messages in _chunks(batch):
+                self._deliver_group(messages)
+            for _ in batch:
+                self.queue.task_done()
+
+    def _deliver_group(self, messages):
+        """
+        Sends coalesced messages as one text. If Telegram rejects it (e.g. Markdown it can't parse), each
+        message is resent on its own, and a message rejected alone goes out once more as plain text.
+        """
+        if self._deliver("\n\n".join(messages)) != "rejected":
+            return
+        if len(messages) > 1:
+            for message in messages:
+                self._deliver_group([message])
+        else:
+            self._deliver(messages[0], parse_mode=None)
+
+    def _deliver(self, text, parse_mode="Markdown"):
+        """
+        Sends one message, respecting Telegram's rate limit and retrying transient failures.
+        Returns "sent", "rejected" (Telegram refused it) or "failed".
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            wait = self.last_sent + MIN_SEND_INTERVAL - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            try:
+                increment("api_calls_total", endpoint="telegram_send")
+                with timer("notification_send_seconds"):
+                    result = self.send(text) if parse_mode else self.send(text, parse_mode=None)
+                self.last_sent = time.monotonic()
+            except requests.RequestException as e:
+                print(f"⚠️ Telegram send failed (attempt {attempt}): {e}")
+                time.sleep(2 ** attempt)
+                continue
+
+            if result.get("ok", True):
+                return "sent"
+            retry_after = result.get("parameters", {}).get("retry_after")
+            if retry_after is None:
+                print(f"⚠️ Telegram rejected notification: {result.get('description')}")
+                return "rejected"
+            time.sleep(retry_after)  # ✅ Rate limited; Telegram says how long to back off
+
+        print("❌ Giving up on Telegram notification after repeated failures.")
+        return "failed"
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    """Returns the shared dispatcher, starting its thread on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = TelegramDispatcher()
+            atexit.register(_dispatcher.flush, 30)
+        return _dispatcher
+
+def send_telegram_message(message):
+    """Queues a notification message for Telegram and returns immediately."""
+    get_dispatcher().submit(message)
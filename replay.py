@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+# ✅ Replays never touch real services or the real data folders: dummy credentials, polling mode,
+# no metrics exporters and a scratch directory for every store
+_scratch = tempfile.mkdtemp(prefix="replay-")
+os.environ.setdefault("ALPACA_TEST_API_KEY", "replay")
+os.environ.setdefault("ALPACA_TEST_SECRET_KEY", "replay")
+os.environ["BAR_STORE_DIR"] = os.path.join(_scratch, "bars")
+os.environ["LEDGER_FILE"] = os.path.join(_scratch, "trades.db")
+os.environ["BACKTEST_CACHE_FILE"] = os.path.join(_scratch, "backtest_cache.db")
+os.environ["USE_STREAMING"] = "false"
+os.environ["METRICS_PORT"] = "0"
+os.environ.pop("METRICS_DUMP_FILE", None)
+os.environ.pop("BAR_FIXTURE_DIR", None)
+
+import numpy as np
+import pandas as pd
+import bot
+from benchmarks.synthetic import random_walk_bars
+from data import bar_store, market_data, resample
+from notifications import telegram
+from strategies.live_signals import BAR_DURATION
+from trading import execute, market_status
+from trading.fake_broker import FakeBroker
+from trading.order_manager import OrderManager
+from utils import clock, metrics
+from utils.clients import set_client
+
+WARM_UP_DAYS = 7  # ✅ Calendar days of 1-minute history before the first replayed session (the 5Min book looks back 5)
+DAILY_HISTORY = 300  # ✅ Daily bars before the first session (the swing book needs 200)
+
+def replay_sessions(start, days):
+    """Regular 9:30-16:00 sessions for `days` weekdays from `start` (holidays are not skipped)."""
+    return [
+        {"date": day.date().isoformat(), "open": "09:30", "close": "16:00"}
+        for day in pd.bdate_range(start, periods=days)
+    ]
+
+def _session_bounds(session):
+    """UTC open and close of a session."""
+    open_ = pd.Timestamp(f"{session['date']} {session['open']}", tz=resample.MARKET_TZ).tz_convert("UTC")
+    close = pd.Timestamp(f"{session['date']} {session['close']}", tz=resample.MARKET_TZ).tz_convert("UTC")
+    return open_, close
+
+class ReplayFeed:
+    """
+    Bars for every replayed symbol, held in memory (indexed by timestamp) and served as a bar source for
+    `market_data`. Only bars that have completed by the virtual clock are returned, so nothing can look ahead.
+    """
+
+    def __init__(self, frames):
+        self.frames = {}  # ✅ (symbol, timeframe) -> (UTC ns timestamps, bars)
+        self.closes = {}  # ✅ symbol -> 1-minute closes, for quotes and fills
+        for (symbol, timeframe), df in frames.items():
+            self._add(symbol, timeframe, df)
+
+    def _add(self, symbol, timeframe, df):
+        if isinstance(df.index, pd.MultiIndex):
+            df = df.droplevel("symbol")  # ✅ Once here instead of on every slice served
+        timestamps = df.index.as_unit("ns").asi8 if not df.empty else np.empty(0, dtype=np.int64)
+        self.frames[(symbol, timeframe)] = (timestamps, df)
+        if timeframe == "1Min":
+            self.closes[symbol] = df["close"].to_numpy() if not df.empty else np.empty(0)
+        return self.frames[(symbol, timeframe)]
+
+    def _frame(self, symbol, timeframe):
+        frame = self.frames.get((symbol, timeframe))
+        if frame is None and timeframe in resample.STEPS and (symbol, "1Min") in self.frames:
+            frame = self._add(symbol, timeframe, resample.resample_bars(self.frames[(symbol, "1Min")][1], timeframe))
+        return frame
+
+    def fetch(self, symbol, start_date, end_date, timeframe="day"):
+        frame = self._frame(symbol, timeframe)
+        if frame is None:
+            return pd.DataFrame()
+
+        timestamps, df = frame
+        end = min(bar_store.to_utc(end_date), clock.now() - BAR_DURATION[timeframe])  # ✅ Completed bars only
+        lo = np.searchsorted(timestamps, bar_store.to_utc(start_date).value, side="left")
+        hi = np.searchsorted(timestamps, end.value, side="right")
+        return df.iloc[lo:hi]
+
+    def last_price(self, symbol):
+        """Close of the last completed 1-minute bar, or None before the first one."""
+        frame = self.frames.get((symbol, "1Min"))
+        if frame is None:
+            return None
+        i = np.searchsorted(frame[0], (clock.now() - BAR_DURATION["1Min"]).value, side="right") - 1
+        return float(self.closes[symbol][i]) if i >= 0 else None
+
+class ReplayDataClient:
+    """Answers the latest-trade requests of `get_latest_prices` from the replay feed."""
+
+    def __init__(self, feed):
+        self.feed = feed
+
+    def get_stock_latest_trade(self, request):
+        symbols = request.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        prices = {symbol: self.feed.last_price(symbol) for symbol in symbols}
+        return {symbol: SimpleNamespace(price=price) for symbol, price in prices.items() if price is not None}
+
+class RecordingNotifier:
+    """Stands in for the Telegram dispatcher: messages are kept in memory instead of sent."""
+
+    def __init__(self):
+        self.messages = []
+
+    def submit(self, message):
+        self.messages.append(message)
+
+    def flush(self, timeout=None):
+        return True
+
+class InlineExecutor:
+    """Runs submitted orders on the calling thread so fills land in the same tick, in the same order every replay."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+def synthetic_feed(symbols, sessions, seed=0):
+    """Random-walk 1-minute bars for every session minute (plus WARM_UP_DAYS before) and DAILY_HISTORY daily bars."""
+    first_day = pd.Timestamp(sessions[0]["date"])
+    warm_up = replay_sessions(first_day - pd.Timedelta(days=WARM_UP_DAYS), WARM_UP_DAYS)
+    warm_up = [session for session in warm_up if session["date"] < sessions[0]["date"]]
+
+    minutes = []
+    for session in warm_up + sessions:
+        open_, close = _session_bounds(session)
+        minutes.append(pd.date_range(open_, close, freq="1min", inclusive="left"))
+    minutes = minutes[0].append(minutes[1:])
+    days = pd.bdate_range(end=first_day - pd.Timedelta(days=1), periods=DAILY_HISTORY).tz_localize(resample.MARKET_TZ).tz_convert("UTC")
+
+    frames = {}
+    for symbol in symbols:
+        frames[(symbol, "1Min")] = random_walk_bars(symbol, minutes, seed, volatility=0.001)
+        frames[(symbol, "day")] = random_walk_bars(symbol, days, seed, volatility=0.02)
+    return ReplayFeed(frames)
+
+def fixture_feed(symbols, directory, start, end):
+    """Recorded bars from `<symbol>_1Min.csv` and `<symbol>_day.csv` files (the BAR_FIXTURE_DIR format)."""
+    source = market_data.csv_bar_source(directory)
+    frames = {}
+    for symbol in symbols:
+        frames[(symbol, "1Min")] = source(symbol, start - pd.Timedelta(days=WARM_UP_DAYS), end, "1Min")
+        frames[(symbol, "day")] = source(symbol, start - pd.Timedelta(days=2 * DAILY_HISTORY), end, "day")
+    return ReplayFeed(frames)
+
+def approve_all(symbols, frames=None):
+    """Approves every symbol for both strategies (replays skip the morning backtests)."""
+    return {symbol: {"swing": True, "day_trade": True} for symbol in symbols}
+
+def _outcome(broker, feed):
+    """What the session did, rounded so identical replays compare equal."""
+    buys = sells = 0
+    cash = 0.0
+    for state in broker.orders.values():
+        value = sum(qty * price for qty, price in state["slices"])
+        if state["request"].side.value == "buy":
+            buys += 1
+            cash -= value
+        else:
+            sells += 1
+            cash += value
+    positions = {symbol: p["qty"] for symbol, p in sorted(broker.positions.items())}
+    marked = sum(qty * (feed.last_price(symbol) or 0.0) for symbol, qty in positions.items())
+    return {"buys": buys, "sells": sells, "open_positions": len(positions), "profit_loss": round(cash + marked, 2)}
+
+def run_replay(symbols, sessions, feed, approve=approve_all):
+    """
+    Runs `bot.trading_bot` over `sessions` against `feed` with a virtual clock, FakeBroker and a recording
+    notifier, and returns a summary (tick latency, throughput and the trading outcome).
+    """
+    broker = FakeBroker(price_of=feed.last_price, latency=0, fill_duration=0)
+    manager = OrderManager(broker, poll_interval=0)
+    manager.pool = InlineExecutor()
+    notifier = RecordingNotifier()
+
+    calendar = market_status.MarketCalendar(path=None)
+    before = replay_sessions(pd.Timestamp(sessions[0]["date"]) - pd.offsets.BDay(1), 1)
+    after = replay_sessions(pd.Timestamp(sessions[-1]["date"]) + pd.offsets.BDay(1), 1)
+    calendar._set_sessions(before + sessions + after)  # ✅ A session either side so the calendar covers the whole replay
+    first_open, _ = _session_bounds(sessions[0])
+    _, last_close = _session_bounds(sessions[-1])
+
+    virtual = clock.VirtualClock(start=(first_open - pd.Timedelta(minutes=30)).timestamp(), end=last_close.timestamp())
+    previous = clock.set_clock(virtual)
+    saved = (market_status.market_calendar, telegram._dispatcher, execute.order_manager, market_data.bar_source, bot.approve_stocks)
+    market_status.market_calendar = calendar
+    telegram._dispatcher = notifier
+    execute.order_manager = manager
+    market_data.set_bar_source(feed.fetch)
+    market_data.clear_price_cache()
+    bot.approve_stocks = approve
+    set_client("data", ReplayDataClient(feed))
+    set_client("trading", broker)
+    metrics.reset()
+
+    started = time.perf_counter()
+    try:
+        bot.trading_bot(symbols)
+    except clock.ClockStopped:
+        pass  # ✅ The virtual clock reached the last close
+    finally:
+        elapsed = time.perf_counter() - started
+        clock.set_clock(previous)
+        market_status.market_calendar, telegram._dispatcher, execute.order_manager, source, bot.approve_stocks = saved
+        market_data.set_bar_source(source)
+
+    tick = metrics.snapshot()["histograms"].get("tick_seconds", {"count": 0, "mean": 0.0, "max": 0.0})
+    return {
+        "symbols": len(symbols),
+        "sessions": len(sessions),
+        "ticks": tick["count"],
+        "wall_seconds": round(elapsed, 3),
+        "ticks_per_second": round(tick["count"] / elapsed, 1) if elapsed else 0.0,
+        "tick_mean_ms": round(tick["mean"] * 1000, 2),
+        "tick_max_ms": round(tick["max"] * 1000, 2),
+        "notifications": len(notifier.messages),
+        "outcome": _outcome(broker, feed),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay trading sessions through the live bot loop with a virtual clock and simulated broker.")
+    parser.add_argument("--symbols", type=int, default=100, help="Synthetic symbols to trade")
+    parser.add_argument("--tickers", nargs="*", help="Trade these symbols instead (with --fixtures)")
+    parser.add_argument("--fixtures", help="Folder of recorded <symbol>_1Min.csv / <symbol>_day.csv bars (default: synthetic bars)")
+    parser.add_argument("--start", default="2024-03-04", help="First session to replay")
+    parser.add_argument("--days", type=int, default=1, help="Sessions to replay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the summary here as JSON")
+    parser.add_argument("--expected", help="Summary from an earlier replay; exit 1 if this run's outcome differs")
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's own output")
+    args = parser.parse_args()
+
+    symbols = args.tickers or [f"SYM{i:04d}" for i in range(args.symbols)]
+    sessions = replay_sessions(args.start, args.days)
+    if args.fixtures:
+        _, last_close = _session_bounds(sessions[-1])
+        feed = fixture_feed(symbols, args.fixtures, pd.Timestamp(args.start, tz="UTC"), last_close)
+    else:
+        feed = synthetic_feed(symbols, sessions, args.seed)
+
+    print(f"▶️ Replaying {len(sessions)} session(s) for {len(symbols)} symbols...")
+    if args.verbose:
+        summary = run_replay(symbols, sessions, feed)
+    else:
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                summary = run_replay(symbols, sessions, feed)
+            finally:
+                sys.stdout = stdout
+
+    print(f"✅ {summary['ticks']} ticks in {summary['wall_seconds']}s ({summary['ticks_per_second']} ticks/s), "
+          f"tick mean {summary['tick_mean_ms']} ms / max {summary['tick_max_ms']} ms")
+    print(f"📊 Outcome: {summary['outcome']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    status = 0
+    if args.expected:
+        with open(args.expected) as f:
+            expected = json.load(f)["outcome"]
+        if expected != summary["outcome"]:
+            print(f"🚨 Outcome changed: expected {expected}")
+            status = 1
+        else:
+            print("✅ Outcome matches the expected replay.")
+
+    shutil.rmtree(_scratch, ignore_errors=True)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+from collections import deque
+
+NAN = float("nan")
+
+class SMA:
+    """Simple moving average updated one value at a time (matches `rolling(window).mean()`)."""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        self.value = self.total / self.period if len(self.window) == self.period else NAN
+        return self.value
+
+class EMA:
+    """Exponential moving average updated one value at a time (matches pandas `ewm(span=period).mean()`)."""
+
+    def __init__(self, period):
+        self.decay = 1 - 2 / (period + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        # ✅ pandas' adjust=True weighting, kept as two running sums
+        self.numerator = x + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        self.value = self.numerator / self.denominator
+        return self.value
+
+class SeededEMA:
+    """
+    Exponential moving average seeded with the SMA of the first `period` values, as backtrader's EMA
+    starts (matches `backtesting.vectorized.ema`). NaN inputs before the seed are skipped.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.seed = []
+        self.value = NAN
+
+    def update(self, x):
+        if self.seed is not None:
+            if x != x:  # ✅ NaN: the input series has not started yet
+                return self.value
+            self.seed.append(x)
+            if len(self.seed) == self.period:
+                self.value = sum(self.seed) / self.period
+                self.seed = None
+            return self.value
+
+        self.value += self.alpha * (x - self.value)
+        return self.value
+
+class MACD:
+    """MACD line and signal line built from streaming EMAs (`ema_class=SeededEMA` for backtrader's values)."""
+
+    def __init__(self, fast=12, slow=26, signal=9, ema_class=EMA):
+        self.fast = ema_class(fast)
+        self.slow = ema_class(slow)
+        self.signal_ema = ema_class(signal)
+        self.macd = NAN
+        self.signal = NAN
+
+    def update(self, x):
+        self.macd = self.fast.update(x) - self.slow.update(x)
+        self.signal = self.signal_ema.update(self.macd)
+        return self.macd, self.signal
+
+class RSI:
+    """Relative strength index with Wilder smoothing, seeded with the average of the first `period` changes."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.previous = None
+        self.seed_up = 0.0
+        self.seed_down = 0.0
+        self.count = 0
+        self.avg_up = NAN
+        self.avg_down = NAN
+        self.value = NAN
+
+    def update(self, x):
+        if self.previous is None:
+            self.previous = x
+            return self.value
+
+        change = x - self.previous
+        self.previous = x
+        up, down = max(change, 0.0), max(-change, 0.0)
+        self.count += 1
+
+        if self.count < self.period:
+            self.seed_up += up
+            self.seed_down += down
+            return self.value
+
+        if self.count == self.period:
+            self.avg_up = (self.seed_up + up) / self.period
+            self.avg_down = (self.seed_down + down) / self.period
+        else:
+            self.avg_up += (up - self.avg_up) / self.period
+            self.avg_down += (down - self.avg_down) / self.period
+
+        self.value = 100.0 if self.avg_down == 0 else 100 - 100 / (1 + self.avg_up / self.avg_down)
+        return self.value
+
+class VWAP:
+    """Session VWAP: cumulative price * volume over cumulative volume, reset whenever `session` changes."""
+
+    def __init__(self):
+        self.session = None
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.value = NAN
+
+    def update(self, price, volume, session=None):
+        if session != self.session:
+            self.session = session
+            self.price_volume = 0.0
+            self.volume = 0.0
+
+        self.price_volume += price * volume
+        self.volume += volume
+        self.value = self.price_volume / self.volume if self.volume > 0 else NAN
+        return self.value
+
+class RollingHigh:
+    """Highest value over the last `period` updates (monotonic deque, amortized O(1))."""
+
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.candidates = deque()  # (index, value), values decreasing
+        self.value = NAN
+
+    def _better(self, new, old):
+        return new >= old
+
+    def update(self, x):
+        while self.candidates and self._better(x, self.candidates[-1][1]):
+            self.candidates.pop()
+        self.candidates.append((self.count, x))
+        if self.candidates[0][0] <= self.count - self.period:
+            self.candidates.popleft()
+
+        self.count += 1
+        self.value = self.candidates[0][1] if self.count >= self.period else NAN
+        return self.value
+
+class RollingLow(RollingHigh):
+    """Lowest value over the last `period` updates."""
+
+    def _better(self, new, old):
+        return new <= old
@@ -0,0 +1,233 @@
+import pandas as pd
+from config.settings import SIGNAL_ENGINE
+from data import bar_store
+from data.bar_buffer import BarBuffer
+from data.market_data import get_historical_data, get_recent_bars
+from strategies import registry
+from strategies.indicators import EMA, MACD, SMA
+from trading import market_status
+from utils import clock
+from utils.metrics import timer
+
+# ✅ How long each timeframe's bar takes to complete (bars are timestamped at their start)
+BAR_DURATION = {
+    "1Min": pd.Timedelta(minutes=1),
+    "5Min": pd.Timedelta(minutes=5),
+    "15Min": pd.Timedelta(minutes=15),
+    "1Hour": pd.Timedelta(hours=1),
+    "day": pd.Timedelta(days=1),
+}
+
+class SwingTradeSignal:
+    """Streaming version of `swing_trade_strategy`: SMA 50/200 trend with MACD confirmation."""
+
+    def __init__(self, short_window=50, long_window=200, ema_class=EMA):
+        self.sma_short = SMA(short_window)
+        self.sma_long = SMA(long_window)
+        self.macd = MACD(ema_class=ema_class)
+        self.signal = 0
+
+    def update(self, bar):
+        close = bar["close"]
+        sma_short, sma_long = self.sma_short.update(close), self.sma_long.update(close)
+        macd, macd_signal = self.macd.update(close)
+
+        if sma_short > sma_long and macd > macd_signal:
+            self.signal = 1  # Buy
+        elif sma_short < sma_long and macd < macd_signal:
+            self.signal = -1  # Sell
+        else:
+            self.signal = 0
+        return self.signal
+
+class DayTradeSignal:
+    """Streaming version of `day_trade_strategy`: price vs SMA 10 with MACD confirmation."""
+
+    def __init__(self, sma_period=10, ema_class=EMA):
+        self.sma = SMA(sma_period)
+        self.macd = MACD(ema_class=ema_class)
+        self.signal = 0
+
+    def update(self, bar):
+        close = bar["close"]
+        sma = self.sma.update(close)
+        macd, macd_signal = self.macd.update(close)
+
+        if close > sma and macd > macd_signal:
+            self.signal = 1  # Buy
+        elif close < sma and macd < macd_signal:
+            self.signal = -1  # Sell
+        else:
+            self.signal = 0
+        return self.signal
+
+class SignalBook:
+    """
+    Per-symbol streaming signal state for one strategy. History is loaded once by `warm_up`;
+    afterwards `update` pulls only the bars completed since the last one seen, for all symbols in one request.
+    """
+
+    def __init__(self, signal_class, timeframe, lookback):
+        self.signal_class = signal_class
+        self.timeframe = timeframe
+        self.lookback = lookback
+        self.states = {}
+        self.last_bar = {}
+        self.pending = {}  # ✅ symbol -> [bucket start, partial bar] built from 1-minute stream bars
+
+    def warm_up(self, symbols, frames=None):
+        """
+        Rebuilds the indicator state of each symbol from recent history, taken from `frames`
+        ({symbol: bars covering the lookback}, e.g. loaded before the open) when given.
+        """
+        end = clock.now()
+        for symbol in symbols:
+            self.states[symbol] = self.signal_class()
+            self.last_bar.pop(symbol, None)
+            if frames is not None:
+                df = bar_store.slice_bars(frames.get(symbol, pd.DataFrame()), end - self.lookback, end)
+            else:
+                df = get_historical_data(symbol, end - self.lookback, end, self.timeframe)
+            if not df.empty:
+                with timer("indicator_seconds", stage="warm_up", timeframe=self.timeframe):
+                    self.on_bars(symbol, df.droplevel("symbol") if isinstance(df.index, pd.MultiIndex) else df)
+
+    def on_bar(self, symbol, timestamp, bar):
+        """Feeds one completed bar; bars at or before the last one seen are ignored."""
+        last = self.last_bar.get(symbol)
+        if last is not None and timestamp <= last:
+            return self.states[symbol].signal
+
+        self.last_bar[symbol] = timestamp
+        return self.states.setdefault(symbol, self.signal_class()).update(bar)
+
+    def completed_bars(self, symbol, df):
+        """The bars of a timestamp-indexed DataFrame completed since the last one fed for `symbol`."""
+        last = self.last_bar.get(symbol)
+        if df.empty or (last is not None and df.index[-1] <= last):
+            return df.iloc[0:0]  # ✅ Nothing newer than what was already fed (most polls)
+
+        cutoff = clock.now() - BAR_DURATION[self.timeframe]
+        lo = 0 if last is None else df.index.searchsorted(last, side="right")  # ✅ Skip bars already fed
+        hi = df.index.searchsorted(cutoff, side="right")  # ✅ Bars after the cutoff are still forming
+        return df.iloc[lo:max(lo, hi)]
+
+    def on_bars(self, symbol, df):
+        """Feeds the completed bars of a timestamp-indexed DataFrame in order."""
+        df = self.completed_bars(symbol, df)
+        if df.empty:
+            return
+        for timestamp, bar in zip(df.index, df.to_dict("records")):
+            self.on_bar(symbol, timestamp, bar)
+
+    def on_stream_bar(self, symbol, timestamp, bar):
+        """Aggregates 1-minute stream bars into this book's timeframe and feeds each bar once it completes."""
+        if symbol not in self.states:
+            return
+
+        duration = BAR_DURATION[self.timeframe]
+        bucket = timestamp.floor(duration)
+        pending = self.pending.get(symbol)
+
+        if pending is not None and pending[0] != bucket:
+            self.on_bar(symbol, *self.pending.pop(symbol))  # ✅ Bucket ended without its final minute
+            pending = None
+
+        if pending is None:
+            pending = self.pending[symbol] = [bucket, {k: bar[k] for k in ("open", "high", "low", "close", "volume")}]
+        else:
+            merged = pending[1]
+            merged["high"] = max(merged["high"], bar["high"])
+            merged["low"] = min(merged["low"], bar["low"])
+            merged["close"] = bar["close"]
+            merged["volume"] += bar["volume"]
+
+        if timestamp + BAR_DURATION["1Min"] >= bucket + duration:
+            self.on_bar(symbol, *self.pending.pop(symbol))
+
+    def _daily_bar_due(self, start):
+        """
+        Whether a daily bar newer than `start` can have completed: the newest complete one is the previous
+        trading session's, so weekends and holidays don't make every tick refetch.
+        """
+        session = market_status.market_calendar.previous_session(clock.time())
+        return session is None or start.tz_convert(market_status.MARKET_TZ).date() < session
+
+    def update(self):
+        """Fetches and feeds newly completed bars for every tracked symbol."""
+        if not self.last_bar:
+            return
+
+        start = min(self.last_bar.values())
+        if clock.now() < start + 2 * BAR_DURATION[self.timeframe]:
+            return  # ✅ The bar after the oldest one seen has not completed yet, so there is nothing new to fetch
+        if self.timeframe == "day" and not self._daily_bar_due(start):
+            return
+
+        bars = get_recent_bars(list(self.states), start, self.timeframe)
+        with timer("indicator_seconds", stage="update", timeframe=self.timeframe):
+            for symbol, df in bars.items():
+                if symbol in self.states:
+                    self.on_bars(symbol, df)
+
+    def signal(self, symbol):
+        """Latest signal for a symbol: 1 buy, -1 sell, 0 none."""
+        state = self.states.get(symbol)
+        return state.signal if state is not None else 0
+
+class PanelSignalBook(SignalBook):
+    """
+    SignalBook for a `strategies.registry` strategy: each symbol's bars are kept in a BarBuffer and the strategy
+    is evaluated for every symbol in one batched pass, the first time a signal is asked for after new bars.
+    """
+
+    def __init__(self, strategy, timeframe, lookback, params=None):
+        super().__init__(BarBuffer, timeframe, lookback)
+        self.strategy = strategy
+        self.params = params
+        self.latest = {}
+
+    def warm_up(self, symbols, frames=None):
+        super().warm_up(symbols, frames)
+        self.latest = None
+
+    def on_bar(self, symbol, timestamp, bar):
+        """Appends one completed bar; bars at or before the last one seen are ignored."""
+        last = self.last_bar.get(symbol)
+        if last is not None and timestamp <= last:
+            return
+        self.last_bar[symbol] = timestamp
+        self.states.setdefault(symbol, BarBuffer()).append(timestamp, bar)
+        self.latest = None
+
+    def on_bars(self, symbol, df):
+        """Appends the completed bars of a timestamp-indexed DataFrame at once."""
+        df = self.completed_bars(symbol, df)
+        if df.empty:
+            return
+        self.states.setdefault(symbol, BarBuffer()).extend(df)
+        self.last_bar[symbol] = df.index[-1]
+        self.latest = None
+
+    def evaluate(self):
+        """Recomputes the latest signal of every symbol from its buffered bars."""
+        panel = registry.BarPanel.from_arrays({symbol: buffer.view() for symbol, buffer in self.states.items()})
+        with timer("indicator_seconds", stage="evaluate", timeframe=self.timeframe):
+            self.latest = registry.latest_signals(panel, [self.strategy], {self.strategy: self.params})[self.strategy]
+
+    def signal(self, symbol):
+        """Latest signal for a symbol: 1 buy, -1 sell, 0 none."""
+        if symbol not in self.states:
+            return 0
+        if self.latest is None:
+            self.evaluate()
+        return self.latest.get(symbol, 0)
+
+# ✅ Streaming signal class behind each registry strategy the bot trades live
+STREAMING_SIGNALS = {"swing": SwingTradeSignal, "day_trade": DayTradeSignal}
+
+def make_book(strategy, timeframe, lookback, engine=SIGNAL_ENGINE):
+    """The signal book for one live strategy ("swing" or "day_trade"), streaming or registry-based per `engine`."""
+    if engine == "panel":
+        return PanelSignalBook(strategy, timeframe, lookback)
+    return SignalBook(STREAMING_SIGNALS[strategy], timeframe, lookback)
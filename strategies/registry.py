@@ -0,0 +1,264 @@
+import numpy as np
+import pandas as pd
+from data import bar_store
+
+class BarPanel:
+    """
+    Bars of many symbols stacked into flat float64 columns, one symbol after another (each in time order).
+    Every indicator below runs over the whole panel in one call and restarts at each symbol boundary, so
+    a whole universe is evaluated at once instead of one symbol at a time.
+    """
+
+    def __init__(self, symbols, offsets, timestamps, columns):
+        self.symbols = list(symbols)
+        self.offsets = offsets  # ✅ Symbol i owns rows offsets[i]:offsets[i + 1]
+        self.timestamps = timestamps
+        self.columns = columns
+        lengths = np.diff(offsets)
+        self.codes = np.repeat(np.arange(len(self.symbols)), lengths)
+        self.position = np.arange(len(timestamps)) - np.repeat(offsets[:-1], lengths)  # ✅ Bar number within its symbol
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Builds a panel from {symbol: (sorted UTC ns timestamps, {column: values})}; symbols without bars are left out."""
+        arrays = {symbol: pair for symbol, pair in arrays.items() if len(pair[0])}
+        lengths = [len(timestamps) for timestamps, _ in arrays.values()]
+        offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64)
+        if not arrays:
+            return cls([], offsets, np.empty(0, dtype=np.int64), {col: np.empty(0) for col in bar_store.COLUMNS})
+
+        timestamps = np.concatenate([timestamps for timestamps, _ in arrays.values()])
+        columns = {
+            col: np.concatenate([np.asarray(columns[col], dtype=np.float64) for _, columns in arrays.values()])
+            for col in bar_store.COLUMNS
+        }
+        return cls(list(arrays), offsets, timestamps, columns)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Builds a panel from {symbol: bars} (Alpaca's frames, timestamp-indexed ones or CompactFrames)."""
+        return cls.from_arrays({symbol: bar_store.frame_to_arrays(df) for symbol, df in frames.items() if df is not None})
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def rows(self, i):
+        """Row slice of the i-th symbol."""
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def last_rows(self):
+        """Row of each symbol's newest bar."""
+        return self.offsets[1:] - 1
+
+    def grouped(self, values):
+        """`values` (one per row) grouped by symbol; a one-symbol panel skips the grouping (e.g. optimizer sweeps)."""
+        if len(self.symbols) == 1:
+            return pd.Series(values)
+        return pd.Series(values).groupby(self.codes, sort=False)
+
+# ✅ Indicators over a whole panel; `column` names a panel column, anything else is an indicator parameter
+
+def sma(panel, column, period):
+    """Simple moving average; NaN until `period` bars are available (matches `rolling(window).mean()`)."""
+    return panel.grouped(panel[column]).rolling(period).mean().to_numpy()
+
+def _ewm(panel, values, period):
+    """pandas `ewm(span=period).mean()` per symbol, as the streaming `EMA` and the original pandas strategies compute it."""
+    return panel.grouped(values).ewm(span=period).mean().to_numpy()
+
+def _seeded_ewm(panel, values, period, alpha):
+    """Exponential smoothing seeded with the SMA of each symbol's first `period` non-NaN values (NaNs only lead)."""
+    valid = ~np.isnan(values)
+    total = np.cumsum(valid)
+    count = total - np.repeat((total - valid)[panel.offsets[:-1]], np.diff(panel.offsets))  # ✅ Non-NaN values so far within each symbol
+    seed_rows = np.flatnonzero(valid & (count == period))
+    if len(seed_rows) == 0:
+        return np.full(len(values), np.nan)
+
+    seeded = np.where(count >= period, values, np.nan)  # ✅ NaN until the seed, so smoothing starts there
+    seeded[seed_rows] = values[seed_rows[:, None] - np.arange(period - 1, -1, -1)].mean(axis=1)
+    return panel.grouped(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def ewm(panel, column, period):
+    """EMA the live signal classes use: pandas `ewm(span=period)` from each symbol's first bar."""
+    return _ewm(panel, panel[column], period)
+
+def ema(panel, column, period):
+    """EMA seeded with the SMA of the first `period` bars, which is how backtrader's EMA starts."""
+    return _seeded_ewm(panel, panel[column], period, 2 / (period + 1))
+
+def macd(panel, column, fast=12, slow=26, signal=9, kind="ewm"):
+    """MACD line and signal line, from `ewm` (live) or seeded `ema` (backtrader) averages."""
+    values = panel[column]
+    if kind == "ewm":
+        line = _ewm(panel, values, fast) - _ewm(panel, values, slow)
+        return line, _ewm(panel, line, signal)
+    line = _seeded_ewm(panel, values, fast, 2 / (fast + 1)) - _seeded_ewm(panel, values, slow, 2 / (slow + 1))
+    return line, _seeded_ewm(panel, line, signal, 2 / (signal + 1))
+
+def rsi(panel, column, period=14):
+    """Relative strength index with Wilder smoothing, as backtrader's RSI computes it."""
+    change = np.diff(panel[column], prepend=np.nan)
+    change[panel.position == 0] = np.nan
+    up = _seeded_ewm(panel, np.where(np.isnan(change), np.nan, np.maximum(change, 0)), period, 1 / period)
+    down = _seeded_ewm(panel, np.where(np.isnan(change), np.nan, np.maximum(-change, 0)), period, 1 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + up / down)
+
+def highest(panel, column, period):
+    """Rolling maximum over `period` bars."""
+    return panel.grouped(panel[column]).rolling(period).max().to_numpy()
+
+def lowest(panel, column, period):
+    """Rolling minimum over `period` bars."""
+    return panel.grouped(panel[column]).rolling(period).min().to_numpy()
+
+def _wma(panel, values, period):
+    """Linearly weighted moving average; the newest bar gets weight `period`."""
+    weights = np.arange(period, 0, -1, dtype=np.float64) / (period * (period + 1) / 2)
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        result[period - 1:] = np.convolve(values, weights, mode="valid")
+    result[panel.position < period - 1] = np.nan  # ✅ Windows reaching into the previous symbol
+    return result
+
+def vwap(panel, period):
+    """Rolling volume-weighted price: WMA(close * volume) / WMA(volume)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _wma(panel, panel["close"] * panel["volume"], period) / _wma(panel, panel["volume"], period)
+
+def previous(panel, values):
+    """Shifts an indicator one bar back within each symbol (backtrader's `line[-1]`)."""
+    shifted = np.concatenate([[np.nan], values[:-1]])
+    shifted[panel.position == 0] = np.nan
+    return shifted
+
+INDICATORS = {
+    "sma": sma,
+    "ewm": ewm,
+    "ema": ema,
+    "macd": macd,
+    "rsi": rsi,
+    "highest": highest,
+    "lowest": lowest,
+    "vwap": vwap,
+}
+
+# ✅ Signal functions: parameters and indicator arrays in, (entries, exits) masks over the panel rows out
+
+def swing_signals(panel, params, sma_short, sma_long, macd):
+    macd_line, macd_signal = macd
+    return (sma_short > sma_long) & (macd_line > macd_signal), (sma_short < sma_long) & (macd_line < macd_signal)
+
+def day_trade_signals(panel, params, sma, macd):
+    close = panel["close"]
+    macd_line, macd_signal = macd
+    return (close > sma) & (macd_line > macd_signal), (close < sma) & (macd_line < macd_signal)
+
+def sma_crossover_signals(panel, params, short, long):
+    return short > long, short < long
+
+def ema_crossover_signals(panel, params, short, long):
+    prev_short, prev_long = previous(panel, short), previous(panel, long)
+    return (short > long) & (prev_short <= prev_long), (short < long) & (prev_short >= prev_long)
+
+def rsi_signals(panel, params, rsi):
+    return rsi < params["rsi_oversold"], rsi > params["rsi_overbought"]
+
+def breakout_signals(panel, params, highest, lowest):
+    close = panel["close"]
+    return close > previous(panel, highest), close < previous(panel, lowest)
+
+def vwap_signals(panel, params, vwap):
+    close = panel["close"]
+    return close > vwap, close < vwap
+
+# ✅ name -> default params, the indicators it needs ({argument: (indicator, *args)} for given params) and its signal function.
+# "swing"/"day_trade" default to the live definitions; backtests pass ema="ema" for backtrader's seeded averages.
+STRATEGIES = {
+    "swing": {
+        "params": {"short_window": 50, "long_window": 200, "ema": "ewm"},
+        "indicators": lambda p: {
+            "sma_short": ("sma", "close", p["short_window"]),
+            "sma_long": ("sma", "close", p["long_window"]),
+            "macd": ("macd", "close", 12, 26, 9, p["ema"]),
+        },
+        "signals": swing_signals,
+    },
+    "day_trade": {
+        "params": {"sma_period": 10, "ema": "ewm"},
+        "indicators": lambda p: {"sma": ("sma", "close", p["sma_period"]), "macd": ("macd", "close", 12, 26, 9, p["ema"])},
+        "signals": day_trade_signals,
+    },
+    "sma_crossover": {
+        "params": {"short_period": 50, "long_period": 200},
+        "indicators": lambda p: {"short": ("sma", "close", p["short_period"]), "long": ("sma", "close", p["long_period"])},
+        "signals": sma_crossover_signals,
+    },
+    "ema_crossover": {
+        "params": {"short_period": 9, "long_period": 21},
+        "indicators": lambda p: {"short": ("ema", "close", p["short_period"]), "long": ("ema", "close", p["long_period"])},
+        "signals": ema_crossover_signals,
+    },
+    "rsi": {
+        "params": {"rsi_period": 14, "rsi_oversold": 30, "rsi_overbought": 70},
+        "indicators": lambda p: {"rsi": ("rsi", "close", p["rsi_period"])},
+        "signals": rsi_signals,
+    },
+    "breakout": {
+        "params": {"period": 20},
+        "indicators": lambda p: {"highest": ("highest", "high", p["period"]), "lowest": ("lowest", "low", p["period"])},
+        "signals": breakout_signals,
+    },
+    "vwap": {
+        "params": {"period": 14},
+        "indicators": lambda p: {"vwap": ("vwap", p["period"])},
+        "signals": vwap_signals,
+    },
+}
+
+def register(name, signals, indicators, params=None):
+    """
+    Adds (or replaces) a strategy: `indicators(params)` returns {argument: (indicator name, *args)} and
+    `signals(panel, params, **arrays)` turns those indicator arrays into (entries, exits) masks.
+    """
+    STRATEGIES[name] = {"params": dict(params or {}), "indicators": indicators, "signals": signals}
+
+def strategy_params(name, overrides=None):
+    """A strategy's default parameters updated with `overrides`."""
+    return {**STRATEGIES[name]["params"], **(overrides or {})}
+
+def evaluate(panel, names=None, params=None, cache=None):
+    """
+    Entry/exit masks over every panel row for each strategy in `names` (all registered by default), with
+    `params` ({name: overrides}). Every distinct indicator is computed once for the whole panel and shared
+    by all strategies; pass the same `cache` dict across calls on one panel to share them further.
+    """
+    names = list(STRATEGIES) if names is None else list(names)
+    params = params or {}
+    cache = {} if cache is None else cache
+    signals = {}
+
+    for name in names:
+        spec = STRATEGIES[name]
+        p = strategy_params(name, params.get(name))
+        arrays = {}
+        for argument, indicator in spec["indicators"](p).items():
+            if indicator not in cache:
+                cache[indicator] = INDICATORS[indicator[0]](panel, *indicator[1:])
+            arrays[argument] = cache[indicator]
+        signals[name] = spec["signals"](panel, p, **arrays)
+
+    return signals
+
+def latest_signals(panel, names=None, params=None):
+    """{name: {symbol: 1 buy, -1 sell, 0 none}} from each symbol's newest bar."""
+    last = panel.last_rows()
+    latest = {}
+    for name, (entries, exits) in evaluate(panel, names, params).items():
+        values = np.where(entries[last], 1, np.where(exits[last], -1, 0))
+        latest[name] = dict(zip(panel.symbols, values.tolist()))
+    return latest
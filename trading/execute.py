@@ -1,62 +1,155 @@
+import threading
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
-from config.settings import trading_client
-from data.market_data import get_real_time_price
-from trading.risk_management import set_stop_loss, set_take_profit
-from notifications.telegram import send_telegram_message
+from config.settings import HIGH_WATER_STEP_PCT, TRAILING_STOP_PCT
+from trading.ledger import get_ledger
+from trading.order_manager import OrderManager, filled_price, filled_quantity
+from trading.risk_management import RiskMonitor, set_stop_loss, set_take_profit
+from notifications.telegram import escape_markdown, send_telegram_message
+from utils.clients import get_trading_client
 
-# ✅ Track open trades
+# ✅ Track open trades (every change is written through to the trade ledger)
 open_trades = {}
+_trades_lock = threading.Lock()
 
-def execute_trade(symbol, qty, action, strategy="swing"):
-    """Executes a trade, calculates profit/loss, and sends a Telegram notification."""
-    
-    order_side = OrderSide.BUY if action == "buy" else OrderSide.SELL
-    time_in_force = TimeInForce.GTC if strategy == "swing" else TimeInForce.DAY
+# ✅ Stop-loss / take-profit levels of every open trade, checked in one pass per price batch
+risk_monitor = RiskMonitor()
 
-    # ✅ Get real-time stock price
-    last_price = get_real_time_price(symbol)
-
-    if last_price is None:
-        print(f"⚠️ Could not retrieve price for {symbol}. Skipping trade.")
-        return
-
-    # ✅ Submit trade order
-    order_request = MarketOrderRequest(
-        symbol=symbol,
-        qty=qty,
-        side=order_side,
-        time_in_force=time_in_force
-    )
+# ✅ Submits orders concurrently and reports their fills; created with the trading client on the first order
+order_manager = None
+_order_manager_lock = threading.Lock()
 
-    trading_client.submit_order(order_request)
+def get_order_manager():
+    """The shared OrderManager (assign `order_manager` first to trade against another broker)."""
+    global order_manager
+    with _order_manager_lock:
+        if order_manager is None:
+            order_manager = OrderManager(get_trading_client())
+        return order_manager
 
-    # ✅ If it's a buy, store the trade details
-    if action == "buy":
+def _record_buy_fill(symbol, strategy, previous, order):
+    """Updates the position from a buy order's cumulative fills (averaged in with any earlier position)."""
+    qty, price = filled_quantity(order), filled_price(order)
+    with _trades_lock:
+        if previous:
+            total_qty = previous["qty"] + qty
+            price = (previous["entry_price"] * previous["qty"] + price * qty) / total_qty
+            qty = total_qty
         open_trades[symbol] = {
-            "entry_price": last_price,
+            "entry_price": price,
             "qty": qty,
-            "strategy": strategy
+            "strategy": strategy,
+            "stop_loss": set_stop_loss(price),
+            "take_profit": set_take_profit(price),
+            "trailing_pct": TRAILING_STOP_PCT
         }
+        if previous and "high_water" in previous:
+            open_trades[symbol]["high_water"] = previous["high_water"]  # ✅ Averaging in keeps the trailing stop's mark
+        get_ledger().record(symbol, open_trades[symbol])
+        risk_monitor.upsert(symbol, open_trades[symbol])
+
+def record_high_water(symbols):
+    """
+    Writes the risk monitor's high-water marks back to `open_trades` and the ledger, so trailing stops pick up
+    where they were after a restart. Only trailing positions are saved, and only once their mark has risen
+    HIGH_WATER_STEP_PCT above the saved one, so a rally doesn't journal every streamed trade.
+    """
+    with _trades_lock:
+        for symbol in symbols:
+            trade = open_trades.get(symbol)
+            if trade is None or trade.get("trailing_pct", 0) <= 0:
+                continue
+            high = float(risk_monitor.high_water(symbol))
+            saved = trade.get("high_water", trade["entry_price"])
+            if high > saved and high >= saved * (1 + HIGH_WATER_STEP_PCT / 100):
+                trade["high_water"] = high
+                get_ledger().record(symbol, trade)
+
+def _finish_trade(symbol, action, strategy, order):
+    """Settles a finished order: books the sell against the position and sends the Telegram notification."""
+    qty, price = filled_quantity(order), filled_price(order)
+    if qty == 0:
+        print(f"⚠️ {action.capitalize()} order for {symbol} ended {order.status} without fills.")
+        return
 
     # ✅ If it's a sell, calculate profit/loss
     profit_loss = None
-    if action == "sell" and symbol in open_trades:
-        entry_price = open_trades[symbol]["entry_price"]
-        profit_loss = round((last_price - entry_price) * qty, 2)
-        del open_trades[symbol]  # ✅ Remove from open trades
+    if action == "sell":
+        with _trades_lock:
+            trade = open_trades.get(symbol)
+            if trade is not None:
+                profit_loss = round((price - trade["entry_price"]) * qty, 2)
+                trade["qty"] -= qty
+                if trade["qty"] <= 0:
+                    del open_trades[symbol]  # ✅ Remove from open trades
+                    risk_monitor.remove(symbol)
+                else:
+                    risk_monitor.upsert(symbol, trade)
+                get_ledger().record(symbol, open_trades.get(symbol))
 
     # ✅ Send Telegram notification
     message = f"📢 *Trade Executed!*\n\n" \
-              f"🔹 *Stock:* {symbol}\n" \
+              f"🔹 *Stock:* {escape_markdown(symbol)}\n" \
               f"🔹 *Action:* {action.capitalize()}\n" \
-              f"🔹 *Price:* ${last_price:.2f}\n" \
-              f"🔹 *Quantity:* {qty}\n" \
-              f"🔹 *Strategy:* {strategy.capitalize()}\n"
+              f"🔹 *Price:* ${price:.2f}\n" \
+              f"🔹 *Quantity:* {qty:g}\n" \
+              f"🔹 *Strategy:* {escape_markdown(strategy.capitalize())}\n"
 
     if profit_loss is not None:
         message += f"💰 *Profit/Loss:* ${profit_loss:.2f}\n"
 
     send_telegram_message(message)
 
-    print(f"{action.capitalize()}ing {qty} shares of {symbol} at ${last_price:.2f}.")
+    print(f"{action.capitalize()} filled: {qty:g} shares of {symbol} at ${price:.2f}.")
+
+def recover_open_trades(broker=None):
+    """Restores `open_trades` from the trade ledger after a restart and reconciles it with the broker's positions."""
+    broker = broker or get_trading_client()
+    ledger = get_ledger()
+    with _trades_lock:
+        open_trades.clear()
+        open_trades.update(ledger.reconcile(broker.get_all_positions()))
+        for symbol, trade in open_trades.items():
+            if "stop_loss" not in trade:  # ✅ Adopted from the broker; give it the default exits
+                trade.update(
+                    stop_loss=set_stop_loss(trade["entry_price"]),
+                    take_profit=set_take_profit(trade["entry_price"]),
+                    trailing_pct=TRAILING_STOP_PCT
+                )
+                ledger.record(symbol, trade)
+        risk_monitor.load(open_trades)
+    print(f"📒 Recovered {len(open_trades)} open trades from the ledger.")
+    return open_trades
+
+def execute_trade(symbol, qty, action, strategy="swing"):
+    """
+    Submits a trade without waiting for it. `open_trades` is updated from the actual fills
+    and a Telegram notification is sent once the order is done. Returns a Future for the final order.
+    """
+    manager = get_order_manager()
+    if manager.has_pending(symbol):
+        print(f"⏳ An order for {symbol} is still working. Skipping {action}.")
+        return None
+
+    order_side = OrderSide.BUY if action == "buy" else OrderSide.SELL
+    time_in_force = TimeInForce.GTC if strategy == "swing" else TimeInForce.DAY
+
+    # ✅ Submit trade order
+    order_request = MarketOrderRequest(
+        symbol=symbol,
+        qty=qty,
+        side=order_side,
+        time_in_force=time_in_force
+    )
+
+    on_fill = None
+    if action == "buy":
+        previous = dict(open_trades[symbol]) if symbol in open_trades else None
+        on_fill = lambda order: _record_buy_fill(symbol, strategy, previous, order)
+
+    print(f"{action.capitalize()}ing {qty} shares of {symbol}...")
+    return manager.submit(
+        order_request,
+        on_fill=on_fill,
+        on_done=lambda order: _finish_trade(symbol, action, strategy, order)
+    )
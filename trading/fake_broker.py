@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from alpaca.trading.enums import OrderSide, OrderStatus
+
+class FakeBroker:
+    """
+    In-process stand-in for `TradingClient`'s order methods. Orders fill after `latency` seconds,
+    in up to `partial_fills` slices spread over `fill_duration` seconds, at `price_of(symbol)`
+    moved by up to `slippage` (a fraction of the price). Positions and cash are tracked for reconciliation
+    and account summaries.
+    """
+
+    def __init__(self, price_of, latency=0.05, partial_fills=1, fill_duration=0.1, slippage=0.0, seed=None, cash=100000.0):
+        self.price_of = price_of
+        self.latency = latency
+        self.partial_fills = partial_fills
+        self.fill_duration = fill_duration
+        self.slippage = slippage
+        self.random = random.Random(seed)
+        self.orders = {}
+        self.positions = {}
+        self.starting_cash = self.cash = cash
+        self.lock = threading.Lock()
+
+    def submit_order(self, order_data):
+        time.sleep(self.latency)  # ✅ Simulated round trip
+        order_id = str(uuid.uuid4())
+        with self.lock:
+            self.orders[order_id] = {
+                "request": order_data,
+                "submitted_at": time.monotonic(),
+                "slices": [],  # (filled qty, price) per completed slice
+                "canceled": False,
+            }
+        return self.get_order_by_id(order_id)
+
+    def _advance(self, order_id):
+        """Applies every fill slice that is due by now."""
+        state = self.orders[order_id]
+        if state["canceled"]:
+            return
+        request = state["request"]
+        qty = float(request.qty)
+        slices = max(1, min(self.partial_fills, int(qty)))
+        elapsed = time.monotonic() - state["submitted_at"] - self.latency
+        due = slices if elapsed >= self.fill_duration else int(max(elapsed, 0) / self.fill_duration * slices)
+
+        while len(state["slices"]) < due:
+            remaining = qty - sum(q for q, _ in state["slices"])
+            slice_qty = remaining if len(state["slices"]) == slices - 1 else float(int(qty / slices))
+            price = self.price_of(request.symbol) * (1 + self.random.uniform(-self.slippage, self.slippage))
+            state["slices"].append((slice_qty, price))
+
+            signed = slice_qty if request.side == OrderSide.BUY else -slice_qty
+            self.cash -= signed * price
+            position = self.positions.setdefault(request.symbol, {"qty": 0.0, "cost": 0.0})
+            if signed > 0:
+                position["cost"] += signed * price
+            elif position["qty"]:
+                position["cost"] *= (position["qty"] + signed) / position["qty"]
+            position["qty"] += signed
+            if position["qty"] == 0:
+                del self.positions[request.symbol]
+
+    def get_order_by_id(self, order_id):
+        with self.lock:
+            self._advance(str(order_id))
+            state = self.orders[str(order_id)]
+            request = state["request"]
+            filled = sum(q for q, _ in state["slices"])
+            value = sum(q * p for q, p in state["slices"])
+
+        if filled >= float(request.qty):
+            status = OrderStatus.FILLED
+        elif state["canceled"]:
+            status = OrderStatus.CANCELED
+        elif filled == 0:
+            status = OrderStatus.ACCEPTED
+        else:
+            status = OrderStatus.PARTIALLY_FILLED
+
+        return SimpleNamespace(
+            id=str(order_id),
+            symbol=request.symbol,
+            qty=str(request.qty),
+            side=request.side,
+            status=status,
+            filled_qty=str(filled),
+            filled_avg_price=str(value / filled) if filled else None,
+        )
+
+    def cancel_order_by_id(self, order_id):
+        """Cancels the rest of an order; slices due by now still fill first, a filled order can't be cancelled."""
+        with self.lock:
+            self._advance(str(order_id))
+            state = self.orders[str(order_id)]
+            if sum(q for q, _ in state["slices"]) >= float(state["request"].qty):
+                raise ValueError(f"order {order_id} is already filled")
+            state["canceled"] = True
+
+    def get_all_positions(self):
+        with self.lock:
+            return [
+                SimpleNamespace(symbol=symbol, qty=str(p["qty"]), avg_entry_price=str(p["cost"] / p["qty"]))
+                for symbol, p in self.positions.items()
+            ]
+
+    def get_account(self):
+        """Equity marks open positions at `price_of`; `last_equity` is the starting cash."""
+        with self.lock:
+            holdings = [(symbol, p["qty"]) for symbol, p in self.positions.items()]
+            equity = self.cash + sum(qty * self.price_of(symbol) for symbol, qty in holdings)
+            return SimpleNamespace(equity=str(equity), last_equity=str(self.starting_cash), cash=str(self.cash))
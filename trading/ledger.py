@@ -0,0 +1,113 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from config.settings import LEDGER_FILE, LEDGER_SNAPSHOT_EVERY
+
+class TradeLedger:
+    """
+    Append-only journal of open-trade changes in SQLite (WAL mode). Every change to a position is
+    one journal row holding the symbol's full state (or None once it is closed). Every
+    `snapshot_every` rows the whole book is written as a snapshot, so `recover` only loads the latest
+    snapshot plus the rows after it, however long the history grows.
+
+    WAL with `synchronous=NORMAL` makes each commit survive a crash of the bot immediately, while
+    fsyncs are batched at checkpoints instead of paid on every fill.
+    """
+
+    def __init__(self, path=LEDGER_FILE, snapshot_every=LEDGER_SNAPSHOT_EVERY):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.snapshot_every = snapshot_every
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS journal (seq INTEGER PRIMARY KEY, ts REAL, symbol TEXT, state TEXT)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS snapshots (seq INTEGER PRIMARY KEY, ts REAL, book TEXT)")
+
+        self.book, self.last_snapshot = self._load()
+
+    def _load(self):
+        """Rebuilds the book from the latest snapshot and the journal rows written after it."""
+        row = self.conn.execute("SELECT seq, book FROM snapshots ORDER BY seq DESC LIMIT 1").fetchone()
+        snapshot_seq, book = (row[0], json.loads(row[1])) if row else (0, {})
+
+        for symbol, state in self.conn.execute(
+            "SELECT symbol, state FROM journal WHERE seq > ? ORDER BY seq", (snapshot_seq,)
+        ):
+            if state is None:
+                book.pop(symbol, None)
+            else:
+                book[symbol] = json.loads(state)
+        return book, snapshot_seq
+
+    def recover(self):
+        """Returns a copy of the open trades as of the last journal entry."""
+        with self.lock:
+            return {symbol: dict(state) for symbol, state in self.book.items()}
+
+    def record(self, symbol, state):
+        """Journals the new state of one position (None closes it)."""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO journal (ts, symbol, state) VALUES (?, ?, ?)",
+                (time.time(), symbol, json.dumps(state) if state is not None else None)
+            )
+            if state is None:
+                self.book.pop(symbol, None)
+            else:
+                self.book[symbol] = dict(state)
+
+            if cursor.lastrowid - self.last_snapshot >= self.snapshot_every:
+                self._snapshot(cursor.lastrowid)
+
+    def _snapshot(self, seq):
+        """Writes the whole book as of `seq` and drops older snapshots (the journal itself is kept)."""
+        self.conn.execute("INSERT INTO snapshots (seq, ts, book) VALUES (?, ?, ?)", (seq, time.time(), json.dumps(self.book)))
+        self.conn.execute("DELETE FROM snapshots WHERE seq < ?", (seq,))
+        self.last_snapshot = seq
+
+    def reconcile(self, positions):
+        """
+        Aligns the book with the broker's positions, which win on any disagreement: positions the
+        broker no longer holds are closed, unknown ones are adopted at their average entry price,
+        and quantities are corrected. Returns the reconciled open trades.
+        """
+        held = {position.symbol: position for position in positions}
+
+        for symbol in list(self.book):
+            if symbol not in held:
+                print(f"⚠️ {symbol} is in the trade ledger but not held at the broker. Closing it.")
+                self.record(symbol, None)
+
+        for symbol, position in held.items():
+            qty = float(position.qty)
+            state = self.book.get(symbol)
+            if state is None:
+                print(f"⚠️ {symbol} is held at the broker but missing from the trade ledger. Adopting it.")
+                self.record(symbol, {"entry_price": float(position.avg_entry_price), "qty": qty, "strategy": "swing"})
+            elif state["qty"] != qty:
+                print(f"⚠️ {symbol} quantity differs (ledger {state['qty']:g}, broker {qty:g}). Using the broker's.")
+                self.record(symbol, dict(state, qty=qty))
+
+        return self.recover()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_ledger():
+    """Returns the shared ledger, opening the database on first use."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = TradeLedger()
+        return _ledger
@@ -1,36 +1,128 @@
-from alpaca.trading.client import TradingClient
-from config.settings import API_KEY, API_SECRET
+import json
+import os
+from bisect import bisect_right
+from config.settings import MARKET_CALENDAR_FILE
 from datetime import datetime, timedelta
 import pytz
-import time
 from notifications.telegram import send_telegram_message  # ✅ Import Telegram notifications
-
-# Initialize Alpaca Trading Client
-trading_client = TradingClient(API_KEY, API_SECRET, paper=True)
+from utils import clock
+from utils.clients import get_trading_client
+from utils.metrics import increment
+
+MARKET_TZ = pytz.timezone("America/New_York")
+CALENDAR_DAYS = 60  # ✅ Sessions fetched ahead each time the calendar is loaded
+
+class MarketCalendar:
+    """
+    Session schedule (open/close per trading day, early closes included) loaded once from
+    Alpaca or a local calendar file, so market-hours questions are answered without API calls.
+    """
+
+    def __init__(self, path=MARKET_CALENDAR_FILE):
+        self.path = path
+        self.opens = []  # ✅ Session opens/closes as UTC epoch seconds, sorted
+        self.closes = []
+
+    def _set_sessions(self, sessions):
+        opens, closes = [], []
+        for session in sorted(sessions, key=lambda s: s["date"]):
+            day = session["date"]
+            opens.append(MARKET_TZ.localize(datetime.strptime(f"{day} {session['open']}", "%Y-%m-%d %H:%M")).timestamp())
+            closes.append(MARKET_TZ.localize(datetime.strptime(f"{day} {session['close']}", "%Y-%m-%d %H:%M")).timestamp())
+        self.opens, self.closes = opens, closes
+
+    def _fetch(self, today):
+        """Downloads the schedule from Alpaca and saves it to the calendar file."""
+        from alpaca.trading.requests import GetCalendarRequest  # ✅ Only needed when the calendar file is stale
+
+        increment("api_calls_total", endpoint="calendar")
+        days = get_trading_client().get_calendar(GetCalendarRequest(start=today - timedelta(days=7), end=today + timedelta(days=CALENDAR_DAYS)))
+        sessions = [
+            {"date": day.date.isoformat(), "open": day.open.strftime("%H:%M"), "close": day.close.strftime("%H:%M")}
+            for day in days
+        ]
+        if self.path:
+            with open(self.path, "w") as f:
+                json.dump(sessions, f)
+        return sessions
+
+    def _covers(self, now):
+        return bool(self.opens) and self.opens[0] <= now < self.opens[-1]
+
+    def _ensure_loaded(self, now):
+        """Loads the schedule unless the loaded one covers `now` and the next session."""
+        if self._covers(now):
+            return
+
+        if self.path and os.path.exists(self.path):
+            with open(self.path) as f:
+                sessions = json.load(f)
+            self._set_sessions(sessions)
+            if self._covers(now):
+                return
+
+        print("📅 Loading market calendar from Alpaca...")
+        self._set_sessions(self._fetch(datetime.fromtimestamp(now, MARKET_TZ).date()))
+
+    def is_open(self, now=None):
+        now = clock.time() if now is None else now
+        self._ensure_loaded(now)
+        i = bisect_right(self.opens, now) - 1
+        return i >= 0 and now < self.closes[i]
+
+    def next_open(self, now=None):
+        """Next session open strictly after `now` (like Alpaca's clock.next_open)."""
+        now = clock.time() if now is None else now
+        self._ensure_loaded(now)
+        return self.opens[bisect_right(self.opens, now)]
+
+    def next_close(self, now=None):
+        """Next session close strictly after `now` (like Alpaca's clock.next_close)."""
+        now = clock.time() if now is None else now
+        self._ensure_loaded(now)
+        return self.closes[bisect_right(self.closes, now)]
+
+    def previous_session(self, now=None):
+        """Date (market time) of the last session before `now`'s day, e.g. Friday's on a Monday (None if not loaded)."""
+        now = clock.time() if now is None else now
+        self._ensure_loaded(now)
+        midnight = MARKET_TZ.localize(datetime.combine(datetime.fromtimestamp(now, MARKET_TZ).date(), datetime.min.time()))
+        i = bisect_right(self.opens, midnight.timestamp()) - 1
+        return datetime.fromtimestamp(self.opens[i], MARKET_TZ).date() if i >= 0 else None
+
+# ✅ Shared calendar used by every market-hours check
+market_calendar = MarketCalendar()
+
+def sleep_until(target):
+    """Sleeps until the UTC epoch time `target`, waking at most hourly to stay accurate across clock changes."""
+    while True:
+        remaining = target - clock.time()
+        if remaining <= 0:
+            return
+        clock.sleep(min(remaining, 3600))
 
 def is_market_open():
     """Checks if the stock market is currently open."""
-    clock = trading_client.get_clock()
-    return clock.is_open
+    return market_calendar.is_open()
 
 def get_market_open_time():
     """Returns the market open time in UTC."""
-    clock = trading_client.get_clock()
-    return clock.next_open.astimezone(pytz.utc)  # ✅ Ensure timezone consistency
+    return datetime.fromtimestamp(market_calendar.next_open(), pytz.utc)
 
 def get_market_close_time():
     """Returns the market close time in UTC."""
-    clock = trading_client.get_clock()
-    return clock.next_close.astimezone(pytz.utc)  # ✅ Ensure timezone consistency
+    return datetime.fromtimestamp(market_calendar.next_close(), pytz.utc)
 
 def get_total_portfolio_value():
     """Fetches total portfolio value from Alpaca."""
-    account = trading_client.get_account()
+    increment("api_calls_total", endpoint="account")
+    account = get_trading_client().get_account()
     return float(account.equity)
 
 def get_daily_profit_loss():
     """Calculates the daily profit/loss."""
-    account = trading_client.get_account()
+    increment("api_calls_total", endpoint="account")
+    account = get_trading_client().get_account()
     return float(account.equity) - float(account.last_equity)
 
 def time_until_market_opens():
@@ -38,43 +130,43 @@ def time_until_market_opens():
     if is_market_open():
         return 0  # Market is already open
 
-    now = datetime.utcnow().replace(tzinfo=pytz.utc)  # ✅ Ensure UTC timezone
+    now = datetime.fromtimestamp(clock.time(), pytz.utc)  # ✅ Ensure UTC timezone
     market_open_time = get_market_open_time()
     time_diff = (market_open_time - now).total_seconds() / 60  # ✅ Convert seconds to minutes
 
     return max(0, int(time_diff))
 
-def wait_until_market_opens():
-    """Pauses execution until 5 minutes before the market opens and sends a Telegram notification."""
-    while not is_market_open():
-        minutes_remaining = time_until_market_opens()
-        
-        if minutes_remaining > 5:
-            print(f"📉 Market is closed. Sleeping for {minutes_remaining - 5} minutes until 5 minutes before open...")
-            time.sleep((minutes_remaining - 5) * 60)  # Sleep until 5 minutes before open
-        
-        elif minutes_remaining > 0:
-            print(f"⏳ Market opening soon. Waiting {minutes_remaining} more minutes...")
-            time.sleep(60)  # Check every minute when it's close
+def wait_until_market_opens(before_open=None):
+    """
+    Pauses execution until the market opens, sending a Telegram notification 5 minutes before.
+    `before_open` runs in that 5-minute window (pre-market preparation).
+    """
+    if is_market_open():
+        return
+
+    open_time = market_calendar.next_open()
+    minutes_remaining = time_until_market_opens()
+
+    if minutes_remaining > 5:
+        print(f"📉 Market is closed. Sleeping for {minutes_remaining - 5} minutes until 5 minutes before open...")
+        sleep_until(open_time - 5 * 60)  # Sleep until 5 minutes before open
 
     print("✅ Market is opening in 5 minutes. Resuming bot execution...")
 
     # ✅ Send Telegram notification
     send_telegram_message("🚀 *Market Opening Soon!* The bot is resuming trading in 5 minutes.")
 
+    if before_open is not None:
+        before_open()
+
+    sleep_until(open_time)
+
 def wait_until_market_closes():
     """Pauses execution until the market closes and sends a Telegram notification with a P/L summary."""
-    while is_market_open():
-        now = datetime.utcnow().replace(tzinfo=pytz.utc)  # ✅ Ensure timezone consistency
-        market_close_time = get_market_close_time()
-        time_until_close = (market_close_time - now).total_seconds() / 60  # ✅ Convert seconds to minutes
-        
-        if time_until_close > 5:
-            print(f"📈 Market is open. Sleeping for {int(time_until_close - 5)} minutes until 5 minutes before close...")
-            time.sleep((time_until_close - 5) * 60)  # Sleep until 5 minutes before close
-        elif time_until_close > 0:
-            print(f"⏳ Market closing soon. Waiting {int(time_until_close)} more minutes...")
-            time.sleep(60)  # Check every minute when it's close
+    if is_market_open():
+        close_time = market_calendar.next_close()
+        print(f"📈 Market is open. Sleeping for {int((close_time - clock.time()) / 60)} minutes until the close...")
+        sleep_until(close_time)
 
     print("📉 Market has closed. Pausing execution until next market open.")
 
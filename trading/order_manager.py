@@ -0,0 +1,116 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from alpaca.trading.enums import OrderStatus
+from config.settings import ORDER_FILL_TIMEOUT, ORDER_POLL_INTERVAL, ORDER_WORKERS
+from utils.metrics import increment, observe, set_gauge, timer
+
+# ✅ States after which an order will not fill any further
+TERMINAL_STATUSES = {
+    OrderStatus.FILLED,
+    OrderStatus.CANCELED,
+    OrderStatus.EXPIRED,
+    OrderStatus.REJECTED,
+    OrderStatus.DONE_FOR_DAY,
+    OrderStatus.REPLACED,
+    OrderStatus.STOPPED,
+    OrderStatus.SUSPENDED,
+}
+
+def filled_quantity(order):
+    """Shares filled so far (Alpaca reports it as a string)."""
+    return float(order.filled_qty or 0)
+
+def filled_price(order):
+    """Average fill price so far, or None before the first fill."""
+    return float(order.filled_avg_price) if order.filled_avg_price is not None else None
+
+class OrderManager:
+    """
+    Submits orders on a worker pool so one slow order never holds up the others, then follows
+    each order until it stops filling. `on_fill(order)` runs whenever the filled quantity grows and
+    `on_done(order)` once the order reaches a terminal state. An order still working after `fill_timeout`
+    is cancelled and followed until the broker confirms, so fills up to the cancel are still reported.
+    """
+
+    def __init__(self, broker, max_workers=ORDER_WORKERS, poll_interval=ORDER_POLL_INTERVAL, fill_timeout=ORDER_FILL_TIMEOUT):
+        self.broker = broker
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="orders")
+        self.poll_interval = poll_interval
+        self.fill_timeout = fill_timeout
+        self.orders = {}  # ✅ order id -> latest order state
+        self.pending = {}  # ✅ symbol -> number of orders still working
+        self.lock = threading.Lock()
+
+    def has_pending(self, symbol):
+        """True while an order for `symbol` is being submitted or is still working."""
+        with self.lock:
+            return self.pending.get(symbol, 0) > 0
+
+    def submit(self, order_request, on_fill=None, on_done=None):
+        """Queues an order for submission and returns a Future resolving to its final state."""
+        with self.lock:
+            self.pending[order_request.symbol] = self.pending.get(order_request.symbol, 0) + 1
+            set_gauge("orders_pending", sum(self.pending.values()))
+        return self.pool.submit(self._run, order_request, on_fill, on_done)
+
+    def _run(self, order_request, on_fill, on_done):
+        try:
+            submitted = time.perf_counter()
+            increment("api_calls_total", endpoint="submit_order")
+            with timer("order_submit_seconds"):
+                order = self.broker.submit_order(order_request)
+            self.orders[str(order.id)] = order
+            order = self._track(order, on_fill)
+            observe("order_fill_seconds", time.perf_counter() - submitted)
+            increment("orders_total", status=str(getattr(order.status, "value", order.status)))
+            if on_done:
+                on_done(order)
+            return order
+        except Exception as e:
+            print(f"❌ Order for {order_request.symbol} failed: {e}")
+            raise
+        finally:
+            with self.lock:
+                self.pending[order_request.symbol] -= 1
+                set_gauge("orders_pending", sum(self.pending.values()))
+
+    def _track(self, order, on_fill):
+        """Polls the order until it stops filling, reporting every increase in filled quantity."""
+        deadline = time.monotonic() + self.fill_timeout
+        reported = 0.0
+        cancel_requested = False
+
+        while True:
+            if filled_quantity(order) > reported:
+                reported = filled_quantity(order)
+                if on_fill:
+                    on_fill(order)
+
+            if order.status in TERMINAL_STATUSES:
+                return order
+            if not cancel_requested and time.monotonic() >= deadline:
+                print(f"⚠️ Order {order.id} for {order.symbol} still {order.status} after {self.fill_timeout}s. Cancelling it.")
+                cancel_requested = True
+                try:
+                    increment("api_calls_total", endpoint="cancel_order")
+                    self.broker.cancel_order_by_id(order.id)
+                except Exception as e:
+                    print(f"⚠️ Could not cancel order {order.id} for {order.symbol}: {e}")  # ✅ e.g. it filled meanwhile
+                # ✅ Keep polling: the symbol stays pending and late fills still reach `on_fill`
+
+            time.sleep(self.poll_interval)
+            increment("api_calls_total", endpoint="get_order")
+            order = self.broker.get_order_by_id(order.id)
+            self.orders[str(order.id)] = order
+
+    def wait(self, timeout=None):
+        """Blocks until every submitted order has finished (used on shutdown and in tests)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                if not any(self.pending.values()):
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
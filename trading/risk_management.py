@@ -1,7 +1,111 @@
-def set_stop_loss(entry_price, stop_loss_pct=2):
+import threading
+import numpy as np
+from config.settings import STOP_LOSS_PCT, TAKE_PROFIT_PCT
+
+def set_stop_loss(entry_price, stop_loss_pct=STOP_LOSS_PCT):
     """Calculates stop-loss price (default: 2% below entry price)."""
     return entry_price * (1 - stop_loss_pct / 100)
 
-def set_take_profit(entry_price, take_profit_pct=5):
+def set_take_profit(entry_price, take_profit_pct=TAKE_PROFIT_PCT):
     """Calculates take-profit price (default: 5% above entry price)."""
     return entry_price * (1 + take_profit_pct / 100)
+
+class RiskMonitor:
+    """
+    Stop-loss / take-profit state for every open position, kept in contiguous arrays so a whole
+    batch of prices is checked in one vectorized pass. A position with `trailing_pct` > 0 also has
+    a trailing stop that follows its high-water mark; the effective stop is the higher of the two.
+    """
+
+    FIELDS = ("entry", "qty", "stop", "target", "high", "trail")
+
+    def __init__(self, capacity=64):
+        self.symbols = []
+        self.index = {}  # ✅ symbol -> row
+        self.size = 0
+        self.arrays = {field: np.zeros(capacity) for field in self.FIELDS}
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        for field, array in self.arrays.items():
+            self.arrays[field] = np.concatenate([array, np.zeros(len(array))])
+
+    def upsert(self, symbol, trade):
+        """Adds or updates a position from its `open_trades` entry."""
+        with self.lock:
+            row = self.index.get(symbol)
+            if row is None:
+                if self.size == len(self.arrays["entry"]):
+                    self._grow()
+                row = self.index[symbol] = self.size
+                self.symbols.append(symbol)
+                self.size += 1
+                self.arrays["high"][row] = 0.0
+
+            a = self.arrays
+            a["entry"][row] = trade["entry_price"]
+            a["qty"][row] = trade["qty"]
+            a["stop"][row] = trade["stop_loss"]
+            a["target"][row] = trade["take_profit"]
+            a["trail"][row] = trade.get("trailing_pct", 0)
+            a["high"][row] = max(a["high"][row], trade.get("high_water", trade["entry_price"]))
+
+    def remove(self, symbol):
+        """Drops a closed position, moving the last row into its slot."""
+        with self.lock:
+            row = self.index.pop(symbol, None)
+            if row is None:
+                return
+            last = self.size - 1
+            if row != last:
+                for array in self.arrays.values():
+                    array[row] = array[last]
+                moved = self.symbols[last]
+                self.symbols[row] = moved
+                self.index[moved] = row
+            self.symbols.pop()
+            self.size -= 1
+
+    def load(self, open_trades):
+        """Replaces every position with the contents of `open_trades`."""
+        with self.lock:
+            self.symbols, self.index, self.size = [], {}, 0
+        for symbol, trade in open_trades.items():
+            self.upsert(symbol, trade)
+
+    def prices_for(self, prices):
+        """Aligns a {symbol: price} dict with the rows; symbols without a price get NaN."""
+        return np.fromiter((prices.get(symbol, np.nan) for symbol in self.symbols), dtype=float, count=self.size)
+
+    def check_array(self, price):
+        """
+        Evaluates every position against prices aligned with the rows (NaN = no update).
+        Raises high-water marks and returns [(symbol, qty, reason, price)] for positions to exit.
+        """
+        with self.lock:
+            n = self.size
+            a = {field: array[:n] for field, array in self.arrays.items()}
+            np.fmax(a["high"], price, out=a["high"])
+
+            trailing_stop = np.where(a["trail"] > 0, a["high"] * (1 - a["trail"] / 100), 0.0)
+            stop = np.maximum(a["stop"], trailing_stop)
+            stopped = price <= stop
+            target_hit = price >= a["target"]
+
+            return [
+                (self.symbols[row], float(a["qty"][row]), "stop_loss" if stopped[row] else "take_profit", float(price[row]))
+                for row in np.flatnonzero(stopped | target_hit)
+            ]
+
+    def check(self, prices):
+        """Evaluates every position against a {symbol: price} batch."""
+        with self.lock:
+            return self.check_array(self.prices_for(prices))
+
+    def high_water(self, symbol):
+        """Highest price seen since entry (used for the trailing stop)."""
+        with self.lock:
+            return self.arrays["high"][self.index[symbol]]
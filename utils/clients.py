@@ -0,0 +1,182 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from config.settings import (
+    ALPACA_DATA_RATE_LIMIT, ALPACA_TRADING_RATE_LIMIT, API_KEY, API_SECRET, BULK_RESERVE, RATE_LIMIT_RETRIES
+)
+from utils.metrics import increment, observe
+
+# ✅ Lower number = served first when requests queue up for the rate limit
+PRIORITY_ORDERS = 0  # Order submission, order status, positions (exits must never wait on bulk traffic)
+PRIORITY_LIVE = 1  # Quotes and the bars a live tick needs
+PRIORITY_BULK = 2  # Historical backfills for the morning backtest pass
+PRIORITY_NAMES = {PRIORITY_ORDERS: "orders", PRIORITY_LIVE: "live", PRIORITY_BULK: "bulk"}
+
+CONNECTION_POOL_SIZE = 32  # ✅ Keep-alive connections per host, enough for every fetch and order worker
+
+_priority = contextvars.ContextVar("request_priority", default=None)
+
+@contextmanager
+def request_priority(priority):
+    """Overrides the priority of every Alpaca request made inside the block (in this thread)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def classify(path):
+    """Default priority of an Alpaca REST path."""
+    if path.startswith("/orders") or path.startswith("/positions"):
+        return PRIORITY_ORDERS
+    if "/bars" in path:
+        return PRIORITY_BULK
+    return PRIORITY_LIVE
+
+class RequestScheduler:
+    """
+    Token bucket shared by every request to one Alpaca API. Tokens refill at `rate_per_minute`;
+    when requests queue up they are served by priority, and bulk requests may not dip into the last
+    `reserve` fraction of the bucket so orders and exits always find a token. A 429 pauses the bucket.
+    """
+
+    def __init__(self, rate_per_minute, burst=None, reserve=BULK_RESERVE):
+        self.rate = rate_per_minute / 60
+        self.capacity = burst or max(1, rate_per_minute // 4)
+        self.reserve = self.capacity * reserve
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = []  # ✅ heap of (priority, arrival) tickets
+        self.arrivals = itertools.count()
+        self.cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=PRIORITY_LIVE):
+        """Blocks until this request may be sent."""
+        started = time.monotonic()
+        ticket = (priority, next(self.arrivals))
+        floor = 1 + (self.reserve if priority == PRIORITY_BULK else 0)
+
+        with self.cond:
+            heapq.heappush(self.waiting, ticket)
+            self.cond.notify_all()  # ✅ A more urgent request may now be at the head of the queue
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self.waiting[0] == ticket:
+                        if now >= self.paused_until and self.tokens >= floor:
+                            heapq.heappop(self.waiting)
+                            self.tokens -= 1
+                            self.cond.notify_all()
+                            break
+                        self.cond.wait(max(self.paused_until - now, (floor - self.tokens) / self.rate, 0.001))
+                    else:
+                        self.cond.wait()
+            except BaseException:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.cond.notify_all()
+                raise
+
+        observe("rate_limit_wait_seconds", time.monotonic() - started, priority=PRIORITY_NAMES.get(priority, priority))
+
+    def pause(self, seconds):
+        """Stops all requests for `seconds` (after Alpaca answered 429)."""
+        with self.cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.cond.notify_all()
+
+def _retry_after(error, attempt):
+    """Seconds to back off after a 429: Retry-After, else Alpaca's X-RateLimit-Reset, else exponential."""
+    headers = error.response.headers if error.response is not None else {}
+    if headers.get("Retry-After"):
+        return float(headers["Retry-After"])
+    if headers.get("X-RateLimit-Reset"):
+        return max(float(headers["X-RateLimit-Reset"]) - time.time(), 0.5)
+    return 2 ** attempt
+
+class ScheduledRequests:
+    """Mixin for Alpaca REST clients: every request waits for the scheduler and 429s are retried transparently."""
+
+    scheduler = None
+    name = "alpaca"
+
+    def _request(self, method, path, data=None, base_url=None, api_version=None):
+        from alpaca.common.exceptions import APIError  # ✅ Already loaded by the client itself; kept out of import time
+
+        priority = _priority.get()
+        if priority is None:
+            priority = classify(path)
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.scheduler.acquire(priority)
+            try:
+                return super()._request(method, path, data, base_url, api_version)
+            except APIError as e:
+                if e.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                wait = _retry_after(e, attempt)
+                increment("rate_limited_total", api=self.name)
+                print(f"⏳ Alpaca {self.name} rate limit hit. Backing off {wait:.1f}s (attempt {attempt + 1}).")
+                self.scheduler.pause(wait)
+
+def _scheduled(name, base):
+    """`base` (an alpaca-py client class) with the ScheduledRequests mixin in front of it."""
+    return type(f"Scheduled{base.__name__}", (ScheduledRequests, base), {"name": name})
+
+def _configure(client, rate_per_minute):
+    """
+    Attaches the scheduler, lets 429s reach the scheduler instead of alpaca-py's fixed-wait retry,
+    and sizes the connection pool so many threads can share the client's session.
+    """
+    from requests.adapters import HTTPAdapter
+
+    client.scheduler = RequestScheduler(rate_per_minute)
+    client._retry_codes = [504]
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=CONNECTION_POOL_SIZE)
+    client._session.mount("https://", adapter)
+    client._session.mount("http://", adapter)
+    return client
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _get(name, build):
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = build()
+        return _clients[name]
+
+def set_client(name, client):
+    """Replaces the shared "trading" or "data" client, e.g. with a fake broker or data source."""
+    with _clients_lock:
+        _clients[name] = client
+
+# ✅ alpaca-py is imported by these builders, not at module import, so nothing pays for it until a client is needed
+def _build_trading_client():
+    from alpaca.trading.client import TradingClient
+
+    client = _scheduled("trading", TradingClient)(API_KEY, API_SECRET, paper=True)  # Set `paper=False` for live trading
+    return _configure(client, ALPACA_TRADING_RATE_LIMIT)
+
+def _build_data_client():
+    from alpaca.data.historical import StockHistoricalDataClient
+
+    return _configure(_scheduled("data", StockHistoricalDataClient)(API_KEY, API_SECRET), ALPACA_DATA_RATE_LIMIT)
+
+def get_trading_client():
+    """The process-wide TradingClient (paper account); built on first use."""
+    return _get("trading", _build_trading_client)
+
+def get_data_client():
+    """The process-wide StockHistoricalDataClient; built on first use."""
+    return _get("data", _build_data_client)
@@ -0,0 +1,70 @@
+import time as _time
+
+class ClockStopped(Exception):
+    """Raised by a virtual clock asked to sleep past the end of its replay."""
+
+class RealClock:
+    """Wall-clock time; what the bot uses outside of replays."""
+
+    def time(self):
+        return _time.time()
+
+    def monotonic(self):
+        return _time.monotonic()
+
+    def sleep(self, seconds):
+        _time.sleep(seconds)
+
+class VirtualClock:
+    """
+    Time that only moves when someone sleeps: `sleep` returns at once after advancing the clock, running
+    `on_sleep` first (e.g. to settle in-flight orders). Sleeping past `end` stops the replay with ClockStopped.
+    """
+
+    def __init__(self, start, end=None, on_sleep=None):
+        self.now = float(start)
+        self.end = end
+        self.on_sleep = on_sleep
+        self.sleeps = 0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if self.on_sleep is not None:
+            self.on_sleep()
+        self.sleeps += 1
+        target = self.now + max(seconds, 0)
+        if self.end is not None and target > self.end:
+            self.now = self.end
+            raise ClockStopped(f"replay ended at {self.end}")
+        self.now = target
+
+# ✅ Every market-hours check, sleep and "now" in the live path goes through this clock
+_clock = RealClock()
+
+def set_clock(clock):
+    """Replaces the clock (a VirtualClock for replays); returns the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+def time():
+    """Epoch seconds."""
+    return _clock.time()
+
+def monotonic():
+    """Seconds for measuring intervals (cache ages, timeouts)."""
+    return _clock.monotonic()
+
+def sleep(seconds):
+    _clock.sleep(seconds)
+
+def now():
+    """Current time as a UTC pandas Timestamp."""
+    import pandas as pd  # ✅ Callers already have pandas loaded; keeps this module cheap to import
+
+    return pd.Timestamp(_clock.time(), unit="s", tz="UTC")
@@ -1,70 +1,91 @@
+import json
 import os
-from dotenv import load_dotenv
-from alpaca.trading.client import TradingClient
+from datetime import date
 from alpaca.trading.requests import GetAssetsRequest
 from alpaca.trading.enums import AssetClass
-from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockLatestTradeRequest, StockBarsRequest
-from alpaca.data.timeframe import TimeFrame
-from trading.execute import place_trade
-from trading.risk_management import risk_managed_trade
-from backtesting.backtest import backtest_strategy
-from notifications.telegram import send_telegram_alert
-
-# Load environment variables
-load_dotenv()
-ALPACA_TEST_API_KEY = os.getenv("ALPACA_TEST_API_KEY")
-ALPACA_TEST_SECRET_KEY = os.getenv("ALPACA_TEST_SECRET_KEY")
-
-# Initialize Alpaca Clients
-trading_client = TradingClient(ALPACA_TEST_API_KEY, ALPACA_TEST_SECRET_KEY)
-data_client = StockHistoricalDataClient(ALPACA_TEST_API_KEY, ALPACA_TEST_SECRET_KEY)
-
-# Set the daily investment limit
-DAILY_INVESTMENT_LIMIT = 1000
+from backtesting.runner import run_backtests
+from config.settings import ASSET_CACHE_FILE, DAILY_INVESTMENT_LIMIT
+from data.market_data import get_real_time_price, get_snapshots
+from trading.execute import execute_trade, open_trades
+from utils.clients import get_trading_client
+from notifications.telegram import escape_markdown, send_telegram_message
+
+# Track the daily investment limit
 remaining_investment = DAILY_INVESTMENT_LIMIT
 
+# ✅ Backtest job names mapped to the strategy names execute_trade uses
+TRADE_STRATEGIES = {"swing": "swing", "day_trade": "day"}
+
+def get_asset_list():
+    """
+    Returns the symbols of active, tradable NYSE/NASDAQ equities.
+    The list is cached in ASSET_CACHE_FILE and refreshed once a day.
+    """
+    today = date.today().isoformat()
+    if os.path.exists(ASSET_CACHE_FILE):
+        with open(ASSET_CACHE_FILE) as f:
+            cached = json.load(f)
+        if cached.get("date") == today:
+            return cached["symbols"]
+
+    print("📋 Refreshing the tradable asset list from Alpaca...")
+    assets = get_trading_client().get_all_assets(GetAssetsRequest(asset_class=AssetClass.US_EQUITY))
+    symbols = sorted(
+        asset.symbol for asset in assets
+        if asset.tradable and asset.status == "active" and asset.exchange in ["NYSE", "NASDAQ"]
+    )
+
+    with open(ASSET_CACHE_FILE, "w") as f:
+        json.dump({"date": today, "symbols": symbols}, f)
+    return symbols
+
+def screen_universe(min_price=0.01, max_price=100, min_volume=100000):
+    """
+    Staged screen of the whole universe: bulk snapshots, one vectorized price/volume filter,
+    then parallel bar fetches and backtests for the survivors only.
+    Returns one row per survivor with its best backtest, best first.
+    """
+    symbols = get_asset_list()
+    snapshots = get_snapshots(symbols)
+
+    survivors = snapshots[snapshots["price"].between(min_price, max_price) & (snapshots["volume"] >= min_volume)]
+    print(f"🔍 {len(survivors)} of {len(symbols)} stocks between ${min_price} and ${max_price} with volume >= {min_volume}.")
+    if survivors.empty:
+        return survivors.assign(best_strategy=None, success=False)
+
+    backtests = run_backtests(list(survivors.index))
+    if backtests.empty:
+        return survivors.iloc[0:0].assign(best_strategy=None, success=False)
+
+    backtests["success"] = (backtests["win_rate"] >= 60) & (backtests["profit_loss_pct"] > 5)
+    best = (
+        backtests.sort_values(["success", "profit_loss_pct"], ascending=False)
+        .drop_duplicates("symbol")
+        .rename(columns={"strategy": "best_strategy"})
+        .set_index("symbol")
+    )
+    return survivors.join(best, how="inner").sort_values(["success", "profit_loss_pct"], ascending=False)
+
 def get_tradeable_stocks(min_price=0.01, max_price=100, min_volume=100000):
     """
     Fetches a list of tradeable stocks priced between $0.01 and $100 with at least the specified minimum volume and evaluates them using backtesting.
     """
     global remaining_investment
     print("🔍 Fetching and analyzing tradable stocks between $0.01 and $100...")
-    assets = trading_client.get_all_assets(GetAssetsRequest(asset_class=AssetClass.US_EQUITY))
-    
-    for asset in assets:
+    candidates = screen_universe(min_price, max_price, min_volume)
+
+    for symbol, performance in candidates[candidates["success"]].iterrows():
         if remaining_investment <= 1:
-            send_telegram_alert("🚨 Daily investment limit reached. Stopping further trades.")
+            send_telegram_message("🚨 Daily investment limit reached. Stopping further trades.")
             print("🚨 Daily investment limit reached. Stopping further trades.")
             return
 
-        if asset.tradable and asset.status == "active" and asset.exchange in ["NYSE", "NASDAQ"]:
-            try:
-                # Fetch latest trade data to check price and volume
-                trade_request = StockLatestTradeRequest(symbol_or_symbols=asset.symbol)
-                latest_trade = data_client.get_stock_latest_trade(trade_request)
-                price = latest_trade[asset.symbol].price
-                volume = latest_trade[asset.symbol].size
-
-                if not (min_price <= price <= max_price and volume >= min_volume):
-                    continue
-
-                # Fetch historical price data
-                request_params = StockBarsRequest(symbol_or_symbols=asset.symbol, timeframe=TimeFrame.Day, limit=50)
-                historical_data = data_client.get_stock_bars(request_params).df
-                
-                if historical_data.empty:
-                    continue
-                
-                # Perform backtesting to determine best strategy
-                performance = backtest_strategy(asset.symbol)
-                
-                if performance.get("success"):
-                    send_telegram_alert(f"📈 Analyzing {asset.symbol} with best strategy: {performance['best_strategy']}")
-                    execute_trade_based_on_backtesting(asset.symbol, performance["best_strategy"], performance.get("risk_score", 0))
-            except Exception as e:
-                print(f"⚠️ Skipping {asset.symbol}: {e}")
-                continue  # Skip stocks without sufficient data
+        try:
+            send_telegram_message(f"📈 Analyzing {escape_markdown(symbol)} with best strategy: {escape_markdown(performance['best_strategy'])}")
+            execute_trade_based_on_backtesting(symbol, performance["best_strategy"], 0)
+        except Exception as e:
+            print(f"⚠️ Skipping {symbol}: {e}")
+            continue
 
 def execute_trade_based_on_backtesting(symbol, best_strategy, risk_score):
     """
@@ -74,17 +95,15 @@ def execute_trade_based_on_backtesting(symbol, best_strategy, risk_score):
     """
     global remaining_investment
 
-    # Fetch latest stock price
-    trade_request = StockLatestTradeRequest(symbol_or_symbols=symbol)
-    latest_trade = data_client.get_stock_latest_trade(trade_request)
-    price = latest_trade[symbol].price
+    # Fetch latest stock price (usually still cached from the screening snapshot)
+    price = get_real_time_price(symbol)
 
     # Determine investment allocation dynamically
     max_trade_allocation = min(remaining_investment, DAILY_INVESTMENT_LIMIT * 0.5)  # Max 50% per trade
     qty = max(1, int(max_trade_allocation / price))  # Ensure at least 1 share is purchased
 
     if qty * price > remaining_investment:
-        send_telegram_alert(f"⚠️ Not enough funds left to buy {symbol}. Skipping trade.")
+        send_telegram_message(f"⚠️ Not enough funds left to buy {symbol}. Skipping trade.")
         print(f"⚠️ Not enough funds left to buy {symbol}. Skipping trade.")
         return
     
@@ -95,20 +114,20 @@ def execute_trade_based_on_backtesting(symbol, best_strategy, risk_score):
 
     if expected_roi_risk_managed > expected_roi_normal and risk_score >= 5:
         print(f"⚠️ High Risk Trade: Executing Risk-Managed Trade for {symbol}, Buying {qty} shares at ${price}")
-        send_telegram_alert(f"⚠️ High Risk Trade: Executing Risk-Managed Trade for {symbol}, Buying {qty} shares at ${price}")
-        risk_managed_trade(symbol, "buy", qty)
+        send_telegram_message(f"⚠️ High Risk Trade: Executing Risk-Managed Trade for {symbol}, Buying {qty} shares at ${price}")
+        execute_trade(symbol, qty, "buy", strategy=TRADE_STRATEGIES[best_strategy])
     else:
         print(f"✅ Normal Trade: Executing Normal Trade for {symbol}, Buying {qty} shares at ${price}")
-        send_telegram_alert(f"✅ Normal Trade: Executing Normal Trade for {symbol}, Buying {qty} shares at ${price}")
-        place_trade(symbol, "buy", qty)
+        send_telegram_message(f"✅ Normal Trade: Executing Normal Trade for {symbol}, Buying {qty} shares at ${price}")
+        execute_trade(symbol, qty, "buy", strategy=TRADE_STRATEGIES[best_strategy])
     
     # Deduct spent amount from remaining investment
     remaining_investment -= qty * price
-    send_telegram_alert(f"💰 Remaining investment for the day: ${remaining_investment}")
+    send_telegram_message(f"💰 Remaining investment for the day: ${remaining_investment}")
     print(f"💰 Remaining investment for the day: ${remaining_investment}")
     
     if remaining_investment <= 1:
-        send_telegram_alert("🚨 Daily investment limit reached. Stopping further trades.")
+        send_telegram_message("🚨 Daily investment limit reached. Stopping further trades.")
         print("🚨 Daily investment limit reached. Stopping further trades.")
 
 def manage_portfolio(profit_target=1.15):
@@ -116,7 +135,7 @@ def manage_portfolio(profit_target=1.15):
     Checks current portfolio holdings and sells positions if profit target (15% ROI) is met.
     """
     print("🔍 Checking portfolio for profitable positions...")
-    positions = trading_client.get_all_positions()
+    positions = get_trading_client().get_all_positions()
     
     for position in positions:
         symbol = position.symbol
@@ -127,5 +146,5 @@ def manage_portfolio(profit_target=1.15):
 
         if current_price >= target_price:
             print(f"💰 Selling {symbol}: Reached {profit_target*100 - 100}% profit target!")
-            send_telegram_alert(f"💰 Selling {symbol}: Reached {profit_target*100 - 100}% profit target!")
-            place_trade(symbol, "sell", qty)
+            send_telegram_message(f"💰 Selling {symbol}: Reached {profit_target*100 - 100}% profit target!")
+            execute_trade(symbol, qty, "sell", strategy=open_trades.get(symbol, {}).get("strategy", "swing"))
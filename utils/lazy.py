@@ -0,0 +1,31 @@
+import importlib
+import threading
+
+class LazyModule:
+    """
+    Stands in for a module until one of its attributes is used, then imports it. Lets entry points
+    name heavy dependencies (pandas, backtrader, alpaca-py, websockets) at the top without paying
+    for them at startup.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_import(name):
+    """`import name`, deferred until first attribute access."""
+    return LazyModule(name)
@@ -0,0 +1,154 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.settings import METRICS_DUMP_FILE, METRICS_DUMP_INTERVAL, METRICS_PORT
+
+# ✅ Latency buckets in seconds, from sub-millisecond checks up to the 60-second tick
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_counters = {}  # ✅ (name, labels) -> value
+_gauges = {}  # ✅ (name, labels) -> value
+_histograms = {}  # ✅ (name, labels) -> {"buckets": [...], "sum", "count", "max"}
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def increment(name, amount=1, **labels):
+    """Adds to a counter, e.g. `increment("api_calls_total", endpoint="bars")`."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def set_gauge(name, value, **labels):
+    """Records the current value of something that goes up and down (queue depth, open positions)."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+def observe(name, value, **labels):
+    """Adds one observation (usually seconds) to a histogram."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0, "max": 0.0}
+        histogram["buckets"][bisect.bisect_left(BUCKETS, value)] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+        histogram["max"] = max(histogram["max"], value)
+
+@contextmanager
+def timer(name, **labels):
+    """Times the `with` block into the `name` histogram (recorded even if the block raises)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+def counter_total(name):
+    """Sum of a counter across all of its labels (used for API calls per tick)."""
+    with _lock:
+        return sum(value for (counter, _), value in _counters.items() if counter == name)
+
+def reset():
+    """Clears every metric."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters, gauges = dict(_counters), dict(_gauges)
+        histograms = {key: dict(h, buckets=list(h["buckets"])) for key, h in _histograms.items()}
+
+    lines = []
+    for kind, metrics in (("counter", counters), ("gauge", gauges)):
+        for name in sorted({name for name, _ in metrics}):
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in sorted(metrics.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels_text(labels)} {value}")
+
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, labels), h in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(list(BUCKETS) + ["+Inf"], h["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels_text(labels)} {h['sum']}")
+            lines.append(f"{name}_count{_labels_text(labels)} {h['count']}")
+
+    return "\n".join(lines) + "\n"
+
+def snapshot():
+    """All metrics as a JSON-friendly dict; histograms are summarized as count/mean/max."""
+    def label_name(name, labels):
+        return name + _labels_text(labels)
+
+    with _lock:
+        return {
+            "timestamp": time.time(),
+            "counters": {label_name(name, labels): value for (name, labels), value in _counters.items()},
+            "gauges": {label_name(name, labels): value for (name, labels), value in _gauges.items()},
+            "histograms": {
+                label_name(name, labels): {"count": h["count"], "sum": h["sum"], "mean": h["sum"] / h["count"], "max": h["max"]}
+                for (name, labels), h in _histograms.items()
+            },
+        }
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # ✅ Scrapes every few seconds would drown the bot's own output
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    """Serves http://host:port/metrics from a daemon thread and returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 Metrics available on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+def start_json_dump(path=METRICS_DUMP_FILE, interval=METRICS_DUMP_INTERVAL):
+    """Writes `snapshot()` to `path` every `interval` seconds from a daemon thread."""
+    def dump():
+        while True:
+            time.sleep(interval)
+            with open(path + ".tmp", "w") as f:
+                json.dump(snapshot(), f, indent=2)
+            os.replace(path + ".tmp", path)
+
+    threading.Thread(target=dump, name="metrics-dump", daemon=True).start()
+    print(f"📈 Dumping metrics to {path} every {interval:g}s")
+
+def start_metrics_export():
+    """Starts whichever exporters are configured (METRICS_PORT, METRICS_DUMP_FILE)."""
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    if METRICS_DUMP_FILE:
+        start_json_dump(METRICS_DUMP_FILE, METRICS_DUMP_INTERVAL)